@@ -0,0 +1,191 @@
+"""
+    Resumable batch runner for the facts and stats scrapers
+    1. run_batch(players_metadata, scrape_fn, driver, wait, output_path, checkpoint_path, key): Scrapes every player
+       not yet completed, appends the rows to output_path and retries failures from a dead-letter queue
+    2. load_checkpoint(checkpoint_path): Returns the latest checkpoint record of every key
+    3. compact_checkpoint(checkpoint_path): Rewrites the checkpoint with one record per key
+
+    The checkpoint is an append-only JSON lines file, one record per attempt:
+        {"key": "https://www.nhl.com/player/8451101", "status": "done", "attempts": 1, "error": null}
+    Only the latest record of a key counts. Rows go through a BatchWriter and a player is only checkpointed as done
+    once its rows are on disk, so a crash loses at most the buffered players, which are scraped again on the next run.
+"""
+
+import json
+import os
+import random
+import threading
+import time
+from collections import deque
+
+from batch_writer import BatchWriter
+from facts_tables import migrate_draft_columns
+from metrics import PLAYERS_FAILED, PLAYERS_SUCCEEDED, init_metrics
+from tracing import span
+
+_checkpoint_lock = threading.Lock()
+
+"""
+    The following section is checkpoint helpers
+"""
+def load_checkpoint(checkpoint_path):
+    """
+        Load the latest checkpoint record of every key
+        Parameters:
+            checkpoint_path (str): Path of the checkpoint file
+        Returns:
+            state (dict): key -> latest record
+    """
+    state = {}
+    if not os.path.exists(checkpoint_path):
+        return state
+
+    with open(checkpoint_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A crash can leave the last line half written
+                continue
+            state[record['key']] = record
+    return state
+
+def append_checkpoint(checkpoint_path, *records):
+    """
+        Append records to the checkpoint and flush them to disk
+    """
+    # The batch writer thread appends the done records while the scraping loop appends the failures
+    with _checkpoint_lock, open(checkpoint_path, 'a', encoding='utf-8') as f:
+        f.write(''.join(json.dumps(record) + '\n' for record in records))
+        f.flush()
+        os.fsync(f.fileno())
+
+def compact_checkpoint(checkpoint_path):
+    """
+        Rewrite the checkpoint with only the latest record of every key
+        Parameters:
+            checkpoint_path (str): Path of the checkpoint file
+        Returns:
+            state (dict): key -> latest record
+    """
+    state = load_checkpoint(checkpoint_path)
+    tmp_path = checkpoint_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        for record in state.values():
+            f.write(json.dumps(record) + '\n')
+    os.replace(tmp_path, checkpoint_path)
+    return state
+
+"""
+    The following section is the batch runner
+"""
+def run_batch(players_metadata, scrape_fn, driver, wait, output_path, checkpoint_path,
+              key='player_link_ep', max_attempts=3, backoff_base=30, backoff_max=600, flush_rows=200, flush_seconds=30,
+              migrate=migrate_draft_columns):
+    """
+        Scrape every player of players_metadata that is not completed in the checkpoint yet
+        Parameters:
+            players_metadata (pd.DataFrame): One row per player, as expected by scrape_fn
+            scrape_fn (callable): get_player_facts_with_reusable_driver or get_player_stats_with_reusable_driver
+            driver (webdriver.Chrome): A reusable undetected_chromedriver instance
+            wait (WebDriverWait): WebDriverWait instance for the driver
+            output_path (str): CSV the scraped rows are appended to
+            checkpoint_path (str): Checkpoint file of completed / failed keys
+            key (str): Column identifying a player, 'player_link_ep' or 'player_link_official'
+            max_attempts (int): Attempts per player before it stays in the dead-letter queue
+            backoff_base (float): Seconds before the first retry, doubled on every further attempt
+            backoff_max (float): Upper bound of a single backoff
+            flush_rows (int): Rows buffered before they are appended to output_path
+            flush_seconds (float): Seconds after which buffered rows are appended anyway
+            migrate (callable): Brings the rows already in output_path to the layout of new columns, see BatchWriter.
+                The default turns the draft column of facts files into the three draft columns
+        Returns:
+            summary (dict): Number of players done, skipped and failed, and the keys that failed for good
+    """
+    init_metrics()
+    state = load_checkpoint(checkpoint_path)
+    summary = {'done': 0, 'skipped': 0, 'failed': 0, 'failed_keys': []}
+
+    # Done records of players whose rows are still buffered, checkpointed once the rows are on disk
+    pending = {}
+
+    def checkpoint_flushed(keys):
+        append_checkpoint(checkpoint_path, *[pending.pop(player_key) for player_key in keys])
+
+    done_keys = [player_key for player_key, record in state.items() if record['status'] == 'done']
+    # Rows the output file already has, e.g. of a run stopped between a flush and its checkpoint, are checkpointed
+    # when the writer drops them so a resumed run does not fetch them again
+    writer = BatchWriter(output_path, key, flush_rows, flush_seconds, existing_keys=done_keys, on_flush=checkpoint_flushed,
+                         on_duplicate=checkpoint_flushed, migrate=migrate)
+
+    def attempt(player_metadata, attempts):
+        player_key = player_metadata[key]
+        with span('player', player=player_metadata['player_name'], scraper=scrape_fn.__name__, attempt=attempts + 1):
+            try:
+                rows = scrape_fn(player_metadata, driver, wait)
+            except Exception as e:
+                print(f"Failed to scrape {player_metadata['player_name']}: {e}")
+                record = {'key': player_key, 'status': 'failed', 'attempts': attempts + 1, 'error': str(e)}
+                if record['attempts'] >= max_attempts:
+                    PLAYERS_FAILED.labels(scrape_fn.__name__).inc()
+                append_checkpoint(checkpoint_path, record)
+                state[player_key] = record
+                return record
+
+            record = {'key': player_key, 'status': 'done', 'attempts': attempts + 1, 'error': None}
+            PLAYERS_SUCCEEDED.labels(scrape_fn.__name__).inc()
+            if rows is not None and len(rows) > 0:
+                pending[player_key] = record
+                # Only queues the rows, raises if the writer thread failed. The write is traced by the writer
+                writer.write(rows, player_key)
+            else:
+                append_checkpoint(checkpoint_path, record)
+            state[player_key] = record
+            return record
+
+    try:
+        # First pass - every player that is not done and still has attempts left
+        dead_letter = deque()
+        total = len(players_metadata)
+        for i in range(total):
+            player_metadata = players_metadata.iloc[i]
+            record = state.get(player_metadata[key])
+            if record is not None and (record['status'] == 'done' or record['attempts'] >= max_attempts):
+                summary['skipped'] += 1
+                continue
+
+            print(f"\n [{i + 1}/{total}] Scraping {player_metadata['player_name']}")
+            record = attempt(player_metadata, record['attempts'] if record else 0)
+            if record['status'] == 'done':
+                summary['done'] += 1
+            elif record['attempts'] < max_attempts:
+                dead_letter.append(player_metadata)
+            else:
+                summary['failed'] += 1
+                summary['failed_keys'].append(record['key'])
+
+        # Retry the dead-letter queue with exponential backoff
+        while dead_letter:
+            player_metadata = dead_letter.popleft()
+            attempts = state[player_metadata[key]]['attempts']
+            backoff = min(backoff_max, backoff_base * 2 ** (attempts - 1)) * random.uniform(0.8, 1.2)
+            print(f"Retrying {player_metadata['player_name']} (attempt {attempts + 1}/{max_attempts}) in {backoff:.0f}s")
+            time.sleep(backoff)
+
+            record = attempt(player_metadata, attempts)
+            if record['status'] == 'done':
+                summary['done'] += 1
+            elif record['attempts'] < max_attempts:
+                dead_letter.append(player_metadata)
+            else:
+                summary['failed'] += 1
+                summary['failed_keys'].append(record['key'])
+    finally:
+        # Flush the rows still buffered, their done records are checkpointed by the writer
+        writer.close()
+
+    print(f"Batch finished: {summary['done']} done, {summary['skipped']} skipped, {summary['failed']} failed")
+    return summary
@@ -0,0 +1,275 @@
+"""
+    Buffered background writer for scraped rows
+    1. BatchWriter(output_path, key_column, max_rows, max_seconds): Collects the rows of every player and appends
+       them to output_path from a background thread, every max_rows rows or max_seconds seconds
+    2. BatchWriter.write(rows, key): Queues the rows of one player and returns at once, rows of a key that is
+       already in the file or the buffer are dropped
+    3. BatchWriter.close(): Flushes what is left and stops the thread, also done when leaving a with block
+
+    Each flush is one append of the whole batch followed by an fsync, the header is only written to a new file
+    and a row torn by a crash is cut off when the file is opened again. on_flush(keys) is called after the rows
+    of keys are on disk, so a checkpoint written from it never marks a player done before its rows are saved.
+    on_duplicate(keys) is called with the keys whose rows were dropped because the file already has them, so a
+    checkpoint can mark those players done as well. A duplicate of a key still in the buffer is reported by the
+    flush of the buffer.
+
+    A batch with columns the file does not have yet is not cut down to the header: the file is rewritten once,
+    atomically, with the new columns added, after migrate(df) has brought the existing rows to the new layout
+    (e.g. facts_tables.migrate_draft_columns for facts files written before the draft split).
+"""
+
+import os
+import queue
+import tempfile
+import threading
+import time
+
+import pandas as pd
+
+from metrics import WRITE_SECONDS
+from tracing import span
+
+# Sentinel telling the writer thread to flush and stop
+_CLOSE = object()
+
+"""
+    The following section is helper functions
+"""
+def truncate_torn_row(path):
+    """
+        Cut a CSV file back to its last complete line
+        Parameters:
+            path (str): CSV file
+        Returns:
+            removed (int): Number of bytes removed
+    """
+    if not os.path.exists(path):
+        return 0
+
+    with open(path, 'rb+') as f:
+        size = f.seek(0, os.SEEK_END)
+        if size == 0:
+            return 0
+        f.seek(size - 1)
+        if f.read(1) == b'\n':
+            return 0
+
+        # Search backwards for the end of the last complete line
+        position = size
+        while position > 0:
+            step = min(65536, position)
+            f.seek(position - step)
+            chunk = f.read(step)
+            newline = chunk.rfind(b'\n')
+            if newline != -1:
+                end = position - step + newline + 1
+                break
+            position -= step
+        else:
+            end = 0
+        f.truncate(end)
+        return size - end
+
+def read_header(path):
+    """
+        Read the column names of an existing CSV file, None if the file is missing or empty
+    """
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return None
+    return list(pd.read_csv(path, nrows=0, encoding='utf-8-sig').columns)
+
+"""
+    The following section is the batch writer
+"""
+class BatchWriter:
+    def __init__(self, output_path, key_column=None, max_rows=200, max_seconds=30, existing_keys=None, on_flush=None,
+                 on_duplicate=None, migrate=None):
+        """
+            Parameters:
+                output_path (str): CSV the rows are appended to
+                key_column (str): Column identifying a player, e.g. 'player_link_ep', used to drop duplicates
+                max_rows (int): Flush once this many rows are buffered
+                max_seconds (float): Flush buffered rows at least this often
+                existing_keys (iterable): Keys already written, e.g. the done keys of a checkpoint
+                on_flush (callable): Called with the list of keys of every flush, after the rows are on disk
+                on_duplicate (callable): Called with the list of keys whose rows were dropped, already on disk
+                migrate (callable): Called with the existing rows when new columns make the writer rewrite the file,
+                    returns them in the layout of the new rows
+        """
+        self.output_path = output_path
+        self.key_column = key_column
+        self.max_rows = max_rows
+        self.max_seconds = max_seconds
+        self.on_flush = on_flush
+        self.on_duplicate = on_duplicate
+        self.migrate = migrate
+
+        output_dir = os.path.dirname(output_path)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+
+        removed = truncate_torn_row(output_path)
+        if removed:
+            print(f"Removed a torn row of {removed} bytes from {output_path}")
+
+        # Keys in the file or in the buffer, only the writer thread touches it once started
+        self.seen = set(existing_keys or [])
+        self.header = read_header(output_path)
+        if key_column and self.header and key_column in self.header:
+            self.seen.update(pd.read_csv(output_path, usecols=[key_column], encoding='utf-8-sig')[key_column].dropna())
+
+        self.rows_written = 0
+        self.duplicates = 0
+        self._queue = queue.Queue()
+        self._error = None
+        self._thread = threading.Thread(target=self._run, name='batch-writer', daemon=True)
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def write(self, rows, key=None):
+        """
+            Queue the rows of one player, never waits for the disk
+            Parameters:
+                rows (pd.DataFrame): Rows to append
+                key (str): Key of the player, defaults to the key_column values of the rows
+        """
+        self._raise_error()
+        if rows is None or len(rows) == 0:
+            return
+        self._queue.put((rows, key))
+
+    def close(self):
+        """
+            Flush the buffered rows and stop the writer thread
+        """
+        if self._thread.is_alive():
+            self._queue.put(_CLOSE)
+            self._thread.join()
+        self._raise_error()
+
+    def _raise_error(self):
+        if self._error is not None:
+            raise Exception(f"Batch writer for {self.output_path} failed: {self._error}")
+
+    def _run(self):
+        buffer, keys = [], []
+        num_rows = 0
+        deadline = time.monotonic() + self.max_seconds
+        while True:
+            try:
+                item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                item = None
+
+            if item is not None and item is not _CLOSE:
+                rows, key = item
+                rows, new_keys, dropped_keys = self._deduplicate(rows, key)
+                if len(rows) > 0:
+                    buffer.append(rows)
+                    keys.extend(new_keys)
+                    num_rows += len(rows)
+
+                # Keys still in the buffer are reported by its flush
+                dropped_keys = [dropped for dropped in dropped_keys if dropped not in keys]
+                if dropped_keys and self.on_duplicate is not None:
+                    try:
+                        self.on_duplicate(dropped_keys)
+                    except Exception as e:
+                        self._error = e
+                        return
+
+            if item is _CLOSE or num_rows >= self.max_rows or time.monotonic() >= deadline:
+                if buffer:
+                    try:
+                        self._flush(buffer, keys)
+                    except Exception as e:
+                        # Keep the keys out of the checkpoint and report the error to the scraping loop
+                        self._error = e
+                        return
+                buffer, keys = [], []
+                num_rows = 0
+                deadline = time.monotonic() + self.max_seconds
+
+            if item is _CLOSE:
+                return
+
+    def _deduplicate(self, rows, key):
+        if key is not None:
+            if key in self.seen:
+                self.duplicates += len(rows)
+                return rows.iloc[0:0], [], [key]
+            self.seen.add(key)
+            return rows, [key], []
+
+        if not self.key_column or self.key_column not in rows.columns:
+            return rows, [], []
+
+        # All rows of a new key are kept, a player's stats span several rows
+        is_new = ~rows[self.key_column].isin(self.seen)
+        self.duplicates += int((~is_new).sum())
+        dropped_keys = list(rows.loc[~is_new, self.key_column].unique())
+        rows = rows[is_new]
+        new_keys = list(rows[self.key_column].dropna().unique())
+        self.seen.update(new_keys)
+        return rows, new_keys, dropped_keys
+
+    def _flush(self, buffer, keys):
+        with WRITE_SECONDS.labels('batch_writer').time():
+            df = pd.concat(buffer, ignore_index=True)
+            if self.header is None:
+                self.header = list(df.columns)
+                text = df.to_csv(index=False)
+                # The BOM goes at the start of a new file only, like to_csv(encoding='utf-8-sig')
+                data = text.encode('utf-8-sig')
+            else:
+                extra = [column for column in df.columns if column not in self.header]
+                if extra:
+                    self._rewrite_with_columns(df.columns)
+                data = df.reindex(columns=self.header).to_csv(index=False, header=False).encode('utf-8')
+
+            # One append of the whole batch, then make it durable before reporting the keys
+            with span('write', rows=len(df), bytes=len(data), path=self.output_path):
+                fd = os.open(self.output_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+                try:
+                    view = memoryview(data)
+                    while view:
+                        view = view[os.write(fd, view):]
+                    os.fsync(fd)
+                finally:
+                    os.close(fd)
+
+        self.rows_written += len(df)
+        if self.on_flush is not None:
+            self.on_flush(keys)
+
+    def _rewrite_with_columns(self, columns):
+        """
+            Rewrite the file with the columns of a new batch added to its header, through a temporary file in the
+            same folder so a crash leaves the old file in place
+        """
+        df_old = pd.read_csv(self.output_path, encoding='utf-8-sig', low_memory=False)
+        if self.migrate is not None:
+            df_old = self.migrate(df_old)
+        header = list(df_old.columns) + [column for column in columns if column not in df_old.columns]
+        added = [column for column in header if column not in self.header]
+        print(f"Rewriting {self.output_path} with the new columns {', '.join(added)}")
+
+        output_dir = os.path.dirname(self.output_path) or '.'
+        fd, tmp_path = tempfile.mkstemp(dir=output_dir, prefix='.' + os.path.basename(self.output_path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8-sig', newline='') as f:
+                df_old.reindex(columns=header).to_csv(f, index=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.output_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self.header = header
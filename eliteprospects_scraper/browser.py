@@ -0,0 +1,167 @@
+"""
+    Central factory for lean headless Chrome sessions
+    1. create_driver(block_resources, headless): Creates an undetected Chrome driver that skips images, fonts, media,
+       ads and analytics through DevTools and turns off browser features the scrapers never use
+    2. page_load_stats(driver): Returns load time, bytes transferred and request count of the current page
+    3. compare_page_load(urls): Loads the same pages with the default and the lean profile and compares them
+"""
+
+import time
+
+import pandas as pd
+import undetected_chromedriver as uc
+
+from metrics import LIVE_BROWSERS
+from rate_limiter import limited_navigate
+
+# Chrome major version used by every driver
+chrome_version_main = 138
+
+# Resource types and URL patterns blocked through DevTools (Network.setBlockedURLs)
+BLOCKED_URL_PATTERNS = [
+    # Images, fonts and media
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.avif", "*.svg", "*.ico",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    "*.mp4", "*.webm", "*.m3u8", "*.mp3",
+    # Ads
+    "*doubleclick.net*", "*googlesyndication.com*", "*googletagservices.com*", "*adservice.google.*",
+    "*amazon-adsystem.com*", "*adnxs.com*", "*criteo.*", "*pubmatic.com*", "*rubiconproject.com*",
+    "*openx.net*", "*casalemedia.com*", "*taboola.com*", "*outbrain.com*", "*prebid*", "*adsafeprotected.com*",
+    "*moatads.com*",
+    # Analytics and tracking
+    "*googletagmanager.com*", "*google-analytics.com*", "*scorecardresearch.com*", "*quantserve.com*",
+    "*chartbeat.com*", "*hotjar.com*", "*facebook.net*", "*connect.facebook.*", "*nr-data.net*",
+    "*newrelic.com*", "*segment.io*", "*segment.com*", "*optimizely.com*", "*branch.io*", "*onetrust.com*",
+]
+
+# Chrome switches that turn off features the scrapers do not need
+LEAN_ARGUMENTS = [
+    "--disable-extensions",
+    "--disable-gpu",
+    "--disable-background-networking",
+    "--disable-component-update",
+    "--disable-default-apps",
+    "--disable-sync",
+    "--disable-notifications",
+    "--disable-features=Translate,MediaRouter,OptimizationHints",
+    "--mute-audio",
+    "--no-first-run",
+    "--blink-settings=imagesEnabled=false",
+]
+
+# Content settings of the lean profile (2 = block)
+LEAN_PREFS = {
+    "profile.managed_default_content_settings.images": 2,
+    "profile.default_content_setting_values.notifications": 2,
+    "profile.default_content_setting_values.geolocation": 2,
+    "profile.default_content_setting_values.media_stream": 2,
+}
+
+# Lets the page record every resource instead of the default first 250
+RESOURCE_BUFFER_SCRIPT = "performance.setResourceTimingBufferSize(10000);"
+
+PAGE_LOAD_STATS_SCRIPT = """
+    const nav = performance.getEntriesByType('navigation')[0];
+    const resources = performance.getEntriesByType('resource');
+    let bytes = nav ? nav.transferSize : 0;
+    for (const r of resources) { bytes += r.transferSize || 0; }
+    return {
+        load_ms: nav ? nav.loadEventEnd - nav.startTime : null,
+        dom_content_loaded_ms: nav ? nav.domContentLoadedEventEnd - nav.startTime : null,
+        bytes_transferred: bytes,
+        requests: resources.length + 1
+    };
+"""
+
+"""
+    The following section is the driver factory
+"""
+def create_driver(block_resources=True, headless=True, user_multi_procs=False):
+    """
+        Create an undetected Chrome driver
+        Parameters:
+            block_resources (bool): Use the lean profile - block images, fonts, media, ads and analytics
+            headless (bool): Run Chrome without a window
+            user_multi_procs (bool): Set when several processes create drivers at the same time (driver_pool)
+        Returns:
+            driver (uc.Chrome): A new Chrome driver
+    """
+    chrome_options = uc.ChromeOptions()
+    if headless:
+        chrome_options.add_argument("--headless=new")
+    chrome_options.add_argument("--no-sandbox")
+    chrome_options.add_argument("--disable-dev-shm-usage")
+
+    if block_resources:
+        for argument in LEAN_ARGUMENTS:
+            chrome_options.add_argument(argument)
+        chrome_options.add_experimental_option("prefs", LEAN_PREFS)
+
+        # The scrapers wait for the elements they need, there is no need to wait for every subresource
+        chrome_options.page_load_strategy = "eager"
+
+    driver = uc.Chrome(version_main=chrome_version_main, options=chrome_options, user_multi_procs=user_multi_procs)
+
+    driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": RESOURCE_BUFFER_SCRIPT})
+    if block_resources:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS})
+
+    # Count the driver as live until its first quit()
+    LIVE_BROWSERS.inc()
+    quit_driver = driver.quit
+    def quit():
+        if not getattr(driver, '_counted_quit', False):
+            driver._counted_quit = True
+            LIVE_BROWSERS.dec()
+        quit_driver()
+    driver.quit = quit
+
+    return driver
+
+"""
+    The following section is page load measurement
+"""
+def page_load_stats(driver):
+    """
+        Get the load time, bytes transferred and number of requests of the page currently open in driver
+        Parameters:
+            driver (webdriver.Chrome): Driver with a loaded page
+        Returns:
+            stats (dict): load_ms, dom_content_loaded_ms, bytes_transferred and requests
+    """
+    return driver.execute_script(PAGE_LOAD_STATS_SCRIPT)
+
+def compare_page_load(urls, settle_seconds=3):
+    """
+        Load the same pages with the default and the lean profile and compare load time and bytes transferred
+        Parameters:
+            urls (list): Pages to load, e.g. a few player and team pages
+            settle_seconds (float): Seconds to let late resources (ads, analytics) arrive before measuring
+        Returns:
+            df (pd.DataFrame): One row per url and profile, plus the relative change of the lean profile
+    """
+    rows = []
+    for profile, block_resources in [('default', False), ('lean', True)]:
+        driver = create_driver(block_resources=block_resources)
+        try:
+            for url in urls:
+                start = time.perf_counter()
+                limited_navigate(driver, url)
+                navigate_ms = (time.perf_counter() - start) * 1000
+                time.sleep(settle_seconds)
+                stats = page_load_stats(driver)
+                rows.append({'url': url, 'profile': profile, 'navigate_ms': navigate_ms, **stats})
+                print(f"[{profile}] {url}: {navigate_ms:.0f} ms, {stats['bytes_transferred'] / 1024:.0f} KiB, "
+                      f"{stats['requests']} requests")
+        finally:
+            driver.quit()
+
+    df = pd.DataFrame(rows)
+    summary = df.groupby('profile')[['navigate_ms', 'bytes_transferred', 'requests']].mean()
+    print(summary)
+    if {'default', 'lean'}.issubset(summary.index):
+        change = (summary.loc['lean'] / summary.loc['default'] - 1) * 100
+        print("Lean profile change (%):")
+        print(change.round(1))
+    return df
@@ -0,0 +1,202 @@
+"""
+    Consolidation of the per team-season and per season roster files into one metadata table
+    1. read_csv_files(paths, usecols, dtype, num_workers): Reads many CSV files in parallel into one typed DataFrame
+    2. consolidate_team_rosters(teams_dir, key, num_workers): Unique players of ./data/nhl/official/teams/{team}/*.csv
+    3. consolidate_season_players(players_dir, seasons, key, num_workers): Unique players of
+       ./data/nhl/players/nhl_players_{season}.csv, same columns as ep.get_players_metadata
+    4. benchmark_consolidation(data_dir, repeat): Times 2. and 3. against the concat-in-a-loop of the notebooks
+
+    The files are parsed together and deduplicated once, keeping the first row of every key in sorted file
+    order, so the result no longer depends on the order glob happens to return the files in. The default keys are
+    the player links, two players with the same name stay two players.
+"""
+
+import glob
+import io
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+# Columns and types of the official team roster files
+ROSTER_DTYPES = {
+    'player_name': 'string',
+    'player_pos': 'category',
+    'player_link': 'string',
+    'player_image': 'string',
+}
+
+# Columns and types get_players_metadata keeps from the Elite Prospects league tables
+SEASON_PLAYER_DTYPES = {
+    'player_name': 'string',
+    'fw_def': 'category',
+    'link': 'string',
+}
+
+# Seasons 2000-2001 to 2024-2025
+valid_seasons = [f'20{str(i).zfill(2)}-20{str(i + 1).zfill(2)}' for i in range(0, 25)]
+
+BOM = b'\xef\xbb\xbf'
+
+"""
+    The following section is helper functions
+"""
+def read_file(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+def split_header(content):
+    """
+        Split the raw bytes of a CSV file into its header line, without the BOM, and its rows
+    """
+    if content.startswith(BOM):
+        content = content[len(BOM):]
+    header, _, rows = content.partition(b'\n')
+    if rows and not rows.endswith(b'\n'):
+        rows += b'\n'
+    return header.rstrip(b'\r'), rows
+
+def read_csv_files(paths, usecols=None, dtype=None, num_workers=8):
+    """
+        Read many CSV files into one DataFrame. The files are read on a thread pool, then the rows of all files
+        with the same header are parsed in a single read_csv call instead of one call per file
+        Parameters:
+            paths (list): CSV files
+            usecols (list): Columns to read, all columns if None
+            dtype (dict): Types of the columns
+            num_workers (int): Number of threads reading the files
+        Returns:
+            df (pd.DataFrame): Rows of every file, in the order of paths within each distinct header
+    """
+    with ThreadPoolExecutor(max_workers=num_workers) as executor:
+        contents = list(executor.map(read_file, paths))
+
+    # Files keep their order within a header, and almost always share one header
+    groups = {}
+    for content in contents:
+        header, rows = split_header(content)
+        groups.setdefault(header, []).append(rows)
+
+    frames = [
+        pd.read_csv(io.BytesIO(header + b'\n' + b''.join(rows)), usecols=usecols, dtype=dtype, encoding='utf-8')
+        for header, rows in groups.items()
+    ]
+    if not frames:
+        return pd.DataFrame(columns=usecols)
+    return pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+
+def unique_players(df, key):
+    """
+        Keep the first row of every key
+        Parameters:
+            df (pd.DataFrame): Rows of every file
+            key (str or list): Column(s) identifying a player
+        Returns:
+            df (pd.DataFrame): Unique rows
+    """
+    return df.drop_duplicates(subset=key, keep='first').reset_index(drop=True)
+
+def team_roster_paths(teams_dir='./data/nhl/official/teams'):
+    return sorted(glob.glob(os.path.join(teams_dir, '*', '*.csv')))
+
+def season_player_paths(players_dir='./data/nhl/players', seasons=None):
+    paths = [os.path.join(players_dir, f'nhl_players_{season}.csv') for season in seasons or valid_seasons]
+    return [path for path in paths if os.path.exists(path)]
+
+"""
+    The following section is APIs to consolidate the roster files
+"""
+def consolidate_team_rosters(teams_dir='./data/nhl/official/teams', key='player_link', num_workers=8):
+    """
+        Get the unique players of every official team roster file
+        Parameters:
+            teams_dir (str): Folder with one sub folder of {team}_{season}.csv files per team
+            key (str or list): Column(s) identifying a player, 'player_name' reproduces the notebook
+            num_workers (int): Number of threads reading the files
+        Returns:
+            df (pd.DataFrame): player_name, player_pos, player_link and player_image of every player
+    """
+    paths = team_roster_paths(teams_dir)
+    df = unique_players(read_csv_files(paths, list(ROSTER_DTYPES), ROSTER_DTYPES, num_workers), key)
+    print(f"Consolidated {len(paths)} team rosters into {len(df)} players")
+    return df
+
+def consolidate_season_players(players_dir='./data/nhl/players', seasons=None, key='link', num_workers=8):
+    """
+        Get the unique players of the Elite Prospects league tables of several seasons
+        Parameters:
+            players_dir (str): Folder of the nhl_players_{season}.csv files
+            seasons (list): Seasons in YYYY-YYYY format, defaults to valid_seasons
+            key (str or list): Column(s) identifying a player, 'player_name' reproduces the notebook
+            num_workers (int): Number of threads reading the files
+        Returns:
+            df (pd.DataFrame): player_name, fw_def and link of every player, like ep.get_players_metadata
+    """
+    paths = season_player_paths(players_dir, seasons)
+    df = read_csv_files(paths, list(SEASON_PLAYER_DTYPES), SEASON_PLAYER_DTYPES, num_workers)
+    df = unique_players(df, key)[list(SEASON_PLAYER_DTYPES)]
+    print(f"Consolidated {len(paths)} seasons into {len(df)} players")
+    return df
+
+"""
+    The following section is the benchmark
+"""
+def consolidate_in_loop(paths, key, columns=None):
+    """
+        The approach of the notebooks: concat the growing DataFrame with every file and deduplicate every time
+    """
+    df = pd.DataFrame()
+    for path in paths:
+        current = pd.read_csv(path)
+        if columns is not None:
+            current = current[columns].drop_duplicates().reset_index(drop=True)
+        df = pd.concat([df, current]).reset_index(drop=True)
+        df = df.drop_duplicates(subset=[key]).reset_index(drop=True)
+    return df
+
+def benchmark_consolidation(data_dir='./data', repeat=3, num_workers=8):
+    """
+        Time the loop of the notebooks against the consolidation functions on the checked-in data
+        Parameters:
+            data_dir (str): Root of the CSV tree
+            repeat (int): Runs of each approach, the fastest is reported
+            num_workers (int): Number of threads reading the files
+        Returns:
+            df (pd.DataFrame): dataset, files, loop_s, consolidate_s, speedup and whether both found the same players
+    """
+    teams_dir = os.path.join(data_dir, 'nhl', 'official', 'teams')
+    players_dir = os.path.join(data_dir, 'nhl', 'players')
+    cases = [
+        ('team_rosters', team_roster_paths(teams_dir), None,
+         lambda: consolidate_team_rosters(teams_dir, 'player_name', num_workers)),
+        ('season_players', season_player_paths(players_dir), list(SEASON_PLAYER_DTYPES),
+         lambda: consolidate_season_players(players_dir, None, 'player_name', num_workers)),
+    ]
+
+    def best_time(fn):
+        best, result = None, None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = fn()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best, result
+
+    rows = []
+    for name, paths, columns, consolidate in cases:
+        # Both dedupe on player_name here so the results can be compared
+        loop_s, df_loop = best_time(lambda: consolidate_in_loop(paths, 'player_name', columns))
+        consolidate_s, df_new = best_time(consolidate)
+        rows.append({
+            'dataset': name,
+            'files': len(paths),
+            'loop_s': loop_s,
+            'consolidate_s': consolidate_s,
+            'speedup': loop_s / consolidate_s if consolidate_s else None,
+            'same_players': set(df_loop['player_name'].dropna()) == set(df_new['player_name'].dropna()),
+        })
+
+    df = pd.DataFrame(rows)
+    print(df.to_string(index=False))
+    return df
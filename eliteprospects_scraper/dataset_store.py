@@ -0,0 +1,189 @@
+"""
+    Partitioned Parquet store of the league rosters and the official team rosters
+    1. convert_csv_tree(data_dir, root): One-shot conversion of the CSV tree into the Parquet datasets
+    2. write_dataset(df, name, root): Writes a DataFrame into a dataset, replacing the partitions it covers
+    3. load_dataset(name, columns, filters, root): Reads only the columns and partitions that are needed
+
+    Both datasets are partitioned league=/season=/team=, e.g.
+        ./data/dataset/players/league=ncaa/season=2024-2025/team=Boston%20College/part-0.parquet
+        ./data/dataset/rosters/league=nhl/season=2020-2021/team=blues/part-0.parquet
+    "players" holds the Elite Prospects league tables (data/nhl/players and data/ncaa/ncaa_players_*),
+    "rosters" holds the official team rosters (data/nhl/official/teams). Filters on league, season and team only
+    open the matching folders, filters on other columns are pushed down to the Parquet row groups, e.g. all
+    NCAA forwards from 2023 to 2025:
+        load_dataset('players', columns=['player_name', 'team', 'gp', 'tp'],
+                     filters={'league': 'ncaa', 'season': ['2023-2024', '2024-2025'], 'fw_def': 'FW'})
+"""
+
+import glob
+import os
+import re
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as pds
+
+# Root folder of the datasets
+dataset_dir = './data/dataset'
+
+PLAYERS_DATASET = 'players'
+ROSTERS_DATASET = 'rosters'
+
+PARTITION_COLUMNS = ['league', 'season', 'team']
+
+# Partition values are kept as strings, otherwise a folder like season=2023 would be read back as a number
+PARTITIONING = pds.partitioning(
+    pa.schema([(column, pa.string()) for column in PARTITION_COLUMNS]), flavor='hive'
+)
+
+# Stat columns of the league tables, '-' on Elite Prospects means no value
+PLAYER_COUNT_COLUMNS = ['gp', 'g', 'a', 'tp', 'pim', '+/-']
+PLAYER_FLOAT_COLUMNS = ['ppg']
+
+TEAM_SEASON_PATTERN = re.compile(r'^(?P<team>.+)_(?P<season>\d{4}-\d{4})\.csv$')
+
+"""
+    The following section is helper functions
+"""
+def dataset_path(name, root=None):
+    return os.path.join(root or dataset_dir, name)
+
+def clean_player_table(df):
+    """
+        Give a league table read from CSV the column names and types of the players dataset
+        Parameters:
+            df (pd.DataFrame): Output of get_players / get_players_metadata
+        Returns:
+            df (pd.DataFrame): Same rows, 'playername' renamed to 'player_name' and numeric stat columns
+    """
+    # The NCAA files were written before the column was renamed
+    df = df.rename(columns={'playername': 'player_name'})
+    for column in PLAYER_COUNT_COLUMNS:
+        if column in df.columns:
+            df[column] = pd.to_numeric(df[column], errors='coerce').astype('Int64')
+    for column in PLAYER_FLOAT_COLUMNS:
+        if column in df.columns:
+            df[column] = pd.to_numeric(df[column], errors='coerce').astype(float)
+    return df
+
+def read_player_tables(data_dir='./data'):
+    """
+        Read every Elite Prospects league table of the CSV tree
+        Parameters:
+            data_dir (str): Root of the CSV tree
+        Returns:
+            df (pd.DataFrame): All league tables, league and season come from the files themselves
+    """
+    paths = sorted(glob.glob(os.path.join(data_dir, 'nhl', 'players', 'nhl_players_*.csv')))
+    paths += sorted(glob.glob(os.path.join(data_dir, 'ncaa', 'ncaa_players_*.csv')))
+    tables = [clean_player_table(pd.read_csv(path, encoding='utf-8-sig', dtype=str)) for path in paths]
+    print(f"Read {len(tables)} league tables")
+    return pd.concat(tables, ignore_index=True) if tables else pd.DataFrame()
+
+def read_roster_tables(data_dir='./data'):
+    """
+        Read every official team roster of the CSV tree, the team and season come from the file path
+        Parameters:
+            data_dir (str): Root of the CSV tree
+        Returns:
+            df (pd.DataFrame): All rosters with league, season and team columns added
+    """
+    tables = []
+    for path in sorted(glob.glob(os.path.join(data_dir, 'nhl', 'official', 'teams', '*', '*.csv'))):
+        match = TEAM_SEASON_PATTERN.match(os.path.basename(path))
+        if not match:
+            continue
+        df = pd.read_csv(path, encoding='utf-8-sig', dtype=str)
+        df['league'] = 'nhl'
+        df['season'] = match.group('season')
+        df['team'] = match.group('team')
+        tables.append(df)
+    print(f"Read {len(tables)} team rosters")
+    return pd.concat(tables, ignore_index=True) if tables else pd.DataFrame()
+
+def filters_to_expression(filters):
+    """
+        Turn a dict of filters into a pyarrow expression
+        Parameters:
+            filters (dict or pyarrow.compute.Expression): {column: value or list of values}, an expression is returned as is
+        Returns:
+            expression (pyarrow.compute.Expression or None): AND of the filters, None if there are none
+    """
+    if filters is None or isinstance(filters, pc.Expression):
+        return filters
+
+    expression = None
+    for column, value in filters.items():
+        if isinstance(value, (list, tuple, set)):
+            condition = pc.field(column).isin(list(value))
+        else:
+            condition = pc.field(column) == value
+        expression = condition if expression is None else expression & condition
+    return expression
+
+"""
+    The following section is APIs to write and read the datasets
+"""
+def write_dataset(df, name, root=None):
+    """
+        Write a DataFrame into a dataset. Every league/season/team partition in df is replaced as a whole,
+        so writing a freshly scraped team-season again never duplicates its rows
+        Parameters:
+            df (pd.DataFrame): Rows with league, season and team columns
+            name (str): PLAYERS_DATASET or ROSTERS_DATASET
+            root (str): Root folder of the datasets, defaults to dataset_dir
+    """
+    missing = [column for column in PARTITION_COLUMNS if column not in df.columns]
+    if missing:
+        raise ValueError(f"Missing partition columns: {', '.join(missing)}")
+
+    df = df.copy()
+    df[PARTITION_COLUMNS] = df[PARTITION_COLUMNS].astype(str)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+
+    pds.write_dataset(
+        table,
+        dataset_path(name, root),
+        format='parquet',
+        partitioning=PARTITIONING,
+        basename_template='part-{i}.parquet',
+        existing_data_behavior='delete_matching',
+    )
+    print(f"Wrote {len(df)} rows to {dataset_path(name, root)}")
+
+def convert_csv_tree(data_dir='./data', root=None):
+    """
+        Convert the league tables and the official team rosters of the CSV tree into the Parquet datasets
+        Parameters:
+            data_dir (str): Root of the CSV tree
+            root (str): Root folder of the datasets, defaults to dataset_dir
+        Returns:
+            counts (dict): Number of rows written to each dataset
+    """
+    counts = {}
+    for name, read_tables in ((PLAYERS_DATASET, read_player_tables), (ROSTERS_DATASET, read_roster_tables)):
+        df = read_tables(data_dir)
+        if len(df) > 0:
+            write_dataset(df, name, root)
+        counts[name] = len(df)
+    return counts
+
+def open_dataset(name, root=None):
+    return pds.dataset(dataset_path(name, root), format='parquet', partitioning=PARTITIONING)
+
+def load_dataset(name, columns=None, filters=None, root=None):
+    """
+        Read a dataset, only opening the partitions and reading the columns the query needs
+        Parameters:
+            name (str): PLAYERS_DATASET or ROSTERS_DATASET
+            columns (list): Columns to read, all columns if None
+            filters (dict or pyarrow.compute.Expression): {column: value or list of values}, e.g.
+                {'league': 'ncaa', 'season': ['2023-2024', '2024-2025'], 'fw_def': 'FW'}
+            root (str): Root folder of the datasets, defaults to dataset_dir
+        Returns:
+            df (pd.DataFrame): Matching rows
+    """
+    dataset = open_dataset(name, root)
+    table = dataset.to_table(columns=columns, filter=filters_to_expression(filters))
+    return table.to_pandas()
@@ -0,0 +1,165 @@
+"""
+    Pool of headless Chrome drivers, one driver per worker process
+    1. imap_with_drivers(func, items, num_workers): Runs func(item, driver, wait) across the pool, yields results in input order
+    2. scrape_players_in_pool(players_metadata, scrape_fn, num_workers): Spreads a DataFrame of player metadata across the pool
+    3. collect_players_in_pool(players_metadata, scrape_fn, num_workers): Same as 2. but returns the concatenated results
+    4. write_players_in_pool(players_metadata, scrape_fn, output_path, key, num_workers): Same as 2. but streams the
+       results into output_path through a BatchWriter
+
+    scrape_fn is any of the *_with_reusable_driver functions, e.g.
+        eliteprospects_scraper_api.get_player_facts_with_reusable_driver
+        nhl_scraper_api.get_player_stats_with_reusable_driver
+"""
+
+import multiprocessing
+from multiprocessing.util import Finalize
+
+import pandas as pd
+from selenium.webdriver.support.ui import WebDriverWait
+import undetected_chromedriver as uc
+
+from batch_writer import BatchWriter
+from browser import chrome_version_main, create_driver
+from facts_tables import migrate_draft_columns
+from metrics import PLAYERS_FAILED, PLAYERS_SUCCEEDED, init_metrics, reap_dead_processes
+from tracing import span
+
+# The driver owned by the current worker process
+_driver = None
+_wait = None
+
+"""
+    The following section is worker helpers
+"""
+def _init_worker(driver_timeout):
+    global _driver, _wait
+    # user_multi_procs stops the workers from patching the same chromedriver binary at once
+    _driver = create_driver(user_multi_procs=True)
+    _wait = WebDriverWait(_driver, driver_timeout)
+
+    # Quit the driver when the worker process shuts down
+    Finalize(_driver, _driver.quit, exitpriority=16)
+
+def _run_task(task):
+    func, item = task
+    # Player rows carry their name, other items (e.g. roster jobs) are traced under their own repr
+    player = item.get('player_name') if isinstance(item, pd.Series) else str(item)
+    try:
+        with span('player', player=player, scraper=func.__name__):
+            return func(item, _driver, _wait), None
+    except Exception as e:
+        return None, str(e)
+
+"""
+    The following section is APIs to run scrapers across the pool
+"""
+def imap_with_drivers(func, items, num_workers=4, driver_timeout=15):
+    """
+        Run func(item, driver, wait) for every item on a pool of worker processes, each owning one headless driver
+        Parameters:
+            func (callable): Module level function taking (item, driver, wait)
+            items (iterable): Items to process
+            num_workers (int): Number of worker processes (and drivers)
+            driver_timeout (int): Timeout of each worker's WebDriverWait
+        Returns:
+            generator: (item, result, error) tuples in the same order as items, error is None on success
+    """
+    items = list(items)
+    if not items:
+        return
+
+    # The workers inherit the samples folder of the parent
+    init_metrics()
+
+    # Patch the chromedriver binary once in the parent so the workers can share it
+    uc.Patcher(version_main=chrome_version_main).auto()
+
+    num_workers = min(num_workers, len(items))
+    ctx = multiprocessing.get_context('spawn')
+    pool = ctx.Pool(num_workers, initializer=_init_worker, initargs=(driver_timeout,))
+    try:
+        results = pool.imap(_run_task, [(func, item) for item in items], chunksize=1)
+        for item, (result, error) in zip(items, results):
+            yield item, result, error
+        pool.close()
+    except BaseException:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+        reap_dead_processes()
+
+def scrape_players_in_pool(players_metadata, scrape_fn, num_workers=4, driver_timeout=15):
+    """
+        Spread the rows of a player metadata DataFrame across a pool of headless drivers
+        Parameters:
+            players_metadata (pd.DataFrame): One row per player, as expected by scrape_fn
+            scrape_fn (callable): Function taking (player_metadata, driver, wait) and returning a DataFrame
+            num_workers (int): Number of worker processes (and drivers)
+            driver_timeout (int): Timeout of each worker's WebDriverWait
+        Returns:
+            generator: (player_metadata, result, error) tuples in the same order as players_metadata
+    """
+    rows = [row for _, row in players_metadata.iterrows()]
+    for i, (player_metadata, result, error) in enumerate(
+            imap_with_drivers(scrape_fn, rows, num_workers, driver_timeout)):
+        # Counted in the parent, which sees the errors of the workers
+        if error is None:
+            PLAYERS_SUCCEEDED.labels(scrape_fn.__name__).inc()
+            print(f"[{i + 1}/{len(rows)}] Finished {player_metadata['player_name']}")
+        else:
+            PLAYERS_FAILED.labels(scrape_fn.__name__).inc()
+            print(f"[{i + 1}/{len(rows)}] Failed {player_metadata['player_name']}: {error}")
+        yield player_metadata, result, error
+
+def collect_players_in_pool(players_metadata, scrape_fn, num_workers=4, driver_timeout=15):
+    """
+        Scrape every player of a metadata DataFrame on a pool of headless drivers and combine the results
+        Parameters:
+            players_metadata (pd.DataFrame): One row per player, as expected by scrape_fn
+            scrape_fn (callable): Function taking (player_metadata, driver, wait) and returning a DataFrame
+            num_workers (int): Number of worker processes (and drivers)
+            driver_timeout (int): Timeout of each worker's WebDriverWait
+        Returns:
+            results (pd.DataFrame): Concatenated results in input order
+            failed (pd.DataFrame): Metadata rows of the players that failed, with an 'error' column
+    """
+    results = []
+    failed = []
+    for player_metadata, result, error in scrape_players_in_pool(players_metadata, scrape_fn, num_workers, driver_timeout):
+        if error is not None:
+            failed.append({**player_metadata.to_dict(), 'error': error})
+        elif result is not None:
+            results.append(result)
+
+    df_results = pd.concat(results, ignore_index=True) if results else pd.DataFrame()
+    return df_results, pd.DataFrame(failed)
+
+def write_players_in_pool(players_metadata, scrape_fn, output_path, key='player_link_ep', num_workers=4, driver_timeout=15,
+                          flush_rows=200, flush_seconds=30, migrate=migrate_draft_columns):
+    """
+        Scrape every player of a metadata DataFrame on a pool of headless drivers and append the results to a CSV
+        Parameters:
+            players_metadata (pd.DataFrame): One row per player, as expected by scrape_fn
+            scrape_fn (callable): Function taking (player_metadata, driver, wait) and returning a DataFrame
+            output_path (str): CSV the results are appended to, players already in it are not written twice
+            key (str): Column identifying a player, 'player_link_ep' or 'player_link_official'
+            num_workers (int): Number of worker processes (and drivers)
+            driver_timeout (int): Timeout of each worker's WebDriverWait
+            flush_rows (int): Rows buffered before they are appended to output_path
+            flush_seconds (float): Seconds after which buffered rows are appended anyway
+            migrate (callable): Brings the rows already in output_path to the layout of new columns, see BatchWriter.
+                The default turns the draft column of facts files into the three draft columns
+        Returns:
+            failed (pd.DataFrame): Metadata rows of the players that failed, with an 'error' column
+    """
+    failed = []
+    with BatchWriter(output_path, key, flush_rows, flush_seconds, migrate=migrate) as writer:
+        for player_metadata, result, error in scrape_players_in_pool(players_metadata, scrape_fn, num_workers, driver_timeout):
+            if error is not None:
+                failed.append({**player_metadata.to_dict(), 'error': error})
+            elif result is not None:
+                writer.write(result, player_metadata[key])
+
+    print(f"Wrote {writer.rows_written} rows to {output_path}, {writer.duplicates} duplicate rows dropped")
+    return pd.DataFrame(failed)
@@ -1,18 +1,19 @@
 """
     API for Elite Prospects Scraper
-    1. get_season_roster(league, season): Allows you to get all players from a specific league and season
+    1. get_season_roster(league, season, max_workers): Allows you to get all players from a specific league and season
     2. get_player_stats(player_metadata, stats_type): Allows you to get all information from a player's webpage
     3. get_players_stats(players_metadata): Allows you to get all information from a list of players' webpage
     4. get_player_facts(player_metadata): Allows you to get all facts from a player's webpage
+    5. get_player_facts_fast(player_metadata): Allows you to get all facts from a player's webpage without a browser
+    6. get_player_facts_with_fallback(player_metadata, driver, wait): Tries 5. first and falls back to Selenium
 """
 
 import numpy as np
 import pandas as pd
-from bs4 import BeautifulSoup
-import requests
+from bs4 import BeautifulSoup, SoupStrainer
 import time
 import re   #　Regular expressions
-import random
+from concurrent.futures import ThreadPoolExecutor
 
 # Used to grab the part where JavaScript is used to load the data
 from selenium.common import ElementClickInterceptedException
@@ -20,21 +21,112 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as ec
-import undetected_chromedriver as uc
+
+from http_cache import HttpCache
+from browser import create_driver
+from rate_limiter import limited_get, limited_navigate
+from waits import timed_wait, wait_for_table_update, element_html, polite_pause, record_timing
+import table_parsers
+from metrics import FACTS_PATHS, PARSE_SECONDS, PLAYERS_FAILED, PLAYERS_SUCCEEDED
+from tracing import span
+from schemas import apply_schema, ROSTER_SCHEMA, FACTS_SCHEMA, EP_STATS_SCHEMA
+
+'''
+    The following functions are used to fetch pages concurrently, paced by the shared per-domain rate limiter
+'''
+
+# Maximum number of pages fetched at the same time
+max_page_workers = 4
+
+# Headers sent with every request, the default python-requests user agent is often refused
+request_headers = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) '
+                  'Chrome/138.0.0.0 Safari/537.36'
+}
+
+# On-disk response cache shared by the requests-based scraping paths, set to None to always go to the network
+response_cache = HttpCache('./data/http_cache')
+
+# Helper function to send a request to the host
+def request_page(url, headers=None):
+    """
+        Helper function to request a page from the network through the per-domain rate limiter
+        Parameters:
+            url (str): URL to fetch
+            headers (dict): Extra request headers, e.g. conditional revalidation headers
+        Returns:
+            page (requests.Response): Response of the page
+    """
+    return limited_get(url, headers={**request_headers, **(headers or {})})
+
+# Helper function to fetch a single page
+def fetch_page(url, use_cache=True):
+    """
+        Helper function to fetch a page, served from response_cache when it holds a fresh copy
+        Parameters:
+            url (str): URL to fetch
+            use_cache (bool): False to always fetch the page from the site, e.g. to check it for changes
+        Returns:
+            page (requests.Response or http_cache.CachedResponse): Response of the page
+    """
+    if response_cache is None or not use_cache:
+        return request_page(url)
+    return response_cache.get(url, request_page)
+
+# Helper function to fetch several pages concurrently
+def fetch_pages(urls, max_workers=None, use_cache=True):
+    """
+        Helper function to fetch several pages with bounded concurrency
+        Parameters:
+            urls (list): URLs to fetch
+            max_workers (int): Maximum number of concurrent requests, defaults to max_page_workers
+            use_cache (bool): False to always fetch the pages from the site
+        Returns:
+            pages (list): Responses in the same order as urls
+    """
+    if not urls:
+        return []
+    max_workers = min(max_workers or max_page_workers, len(urls))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(lambda url: fetch_page(url, use_cache), urls))
 
 '''
     The following functions are used to help with handle the table data and pagination
 '''
 
+# Class of the players table on the league roster pages
+ROSTER_TABLE_CLASS = 'table table-striped table-sortable player-stats highlight-stats season'
+
+# Helper function to parse a page with the fastest available backend
+def parse_page(content):
+    """
+        Helper function to parse a page, with lxml when table_parsers.backend is 'lxml', otherwise with BeautifulSoup
+        Parameters:
+            content (str or bytes): Raw HTML
+        Returns:
+            page (lxml.html.HtmlElement or bs4.BeautifulSoup): Parsed page
+    """
+    if table_parsers.backend == 'lxml':
+        return table_parsers.parse_html(content)
+    return BeautifulSoup(content, 'html.parser')
+
 # Helper function to extract data from a table - return a list with rows data frame
 def table_data_to_rows(table):
     """
         Helper function to extract data from a table
         Parameters:
-            table (bs4.element.Tag): Table to extract data from
+            table (bs4.element.Tag, lxml.html.HtmlElement or str): Table to extract data from, or its raw HTML
         Returns:
             rows (list): List with rows data frame
     """
+    # Raw HTML or an lxml table go through the lxml backend, which builds the same DataFrame
+    if isinstance(table, (str, bytes)):
+        table = parse_page(table)
+        if not table_parsers.is_element(table):
+            table = table.find('table')
+    if table_parsers.is_element(table):
+        return table_parsers.table_to_df(table_parsers.find_table(table))
+
     rows = []
     trs = table.find_all('tr')
 
@@ -48,25 +140,24 @@ def table_data_to_rows(table):
     df_rows = pd.DataFrame(rows[1:], columns=rows[0])
     return df_rows
 
-# Helper function to extract the number of pages
-def get_number_of_pages(url):
+# Helper function to extract the number of pages from a parsed page
+def count_pages(soup):
     """
-        Helper function to extract the number of pages in a table
+        Helper function to extract the number of pages in a table from an already parsed page
         Parameters:
-            url (str): URL to extract the number of pages from
+            soup (bs4.BeautifulSoup or lxml.html.HtmlElement): Parsed stats page
         Returns:
             num_pages (int): Number of pages
     """
-    # Get the page
-    page = requests.get(url)
-    soup = BeautifulSoup(page.text, 'html.parser')
-
-    # Find the div
-    pagination_div = soup.find('div', {'class': 'table-pagination'})
+    # Find the div and extract its text
+    if table_parsers.is_element(soup):
+        text = table_parsers.find_text(soup, 'div', 'table-pagination')
+    else:
+        pagination_div = soup.find('div', {'class': 'table-pagination'})
+        text = pagination_div.get_text(strip=True) if pagination_div else None
 
-    # Extract text and find the number using regex
-    if pagination_div:
-        text = pagination_div.get_text(strip=True)
+    # Find the number using regex
+    if text is not None:
         match =re.search(r'([\d\s]+)players found', text)
         if match:
             # Extract the number of players
@@ -82,6 +173,75 @@ def get_number_of_pages(url):
     else:
         return 0
 
+# Helper function to extract the number of pages
+def get_number_of_pages(url):
+    """
+        Helper function to extract the number of pages in a table
+        Parameters:
+            url (str): URL to extract the number of pages from
+        Returns:
+            num_pages (int): Number of pages
+    """
+    # Get the page
+    page = fetch_page(url)
+
+    return count_pages(parse_page(page.content))
+
+# Helper function to find the players table of a roster page
+def find_roster_table(soup):
+    """
+        Helper function to find the players table of a parsed roster page
+        Parameters:
+            soup (bs4.BeautifulSoup or lxml.html.HtmlElement): Parsed roster page
+        Returns:
+            table (bs4.element.Tag, lxml.html.HtmlElement or None): Players table, None if the page has none
+    """
+    if table_parsers.is_element(soup):
+        return table_parsers.find_table(soup, ROSTER_TABLE_CLASS)
+    return soup.find('table', {'class': ROSTER_TABLE_CLASS})
+
+# Helper function to extract the players table of a single roster page
+def parse_roster_page(soup):
+    """
+        Helper function to extract the players and their links from a single roster page
+        Parameters:
+            soup (bs4.BeautifulSoup or lxml.html.HtmlElement): Parsed roster page
+        Returns:
+            df_players (pd.DataFrame or None): Players on the page, None if the page has no players
+    """
+    # Get the table
+    player_table = find_roster_table(soup)
+
+    # Check if the table exists
+    if player_table is None:
+        return None
+
+    df_players = table_data_to_rows(player_table)
+
+    # Player exists in the table
+    if df_players['#'].count() == 0:
+        return None
+
+    # Remove empty rows (where # is empty)
+    df_players = df_players[df_players['#'] != ''].reset_index(drop=True)
+
+    # Extract href links in the table
+    if table_parsers.is_element(player_table):
+        href_row = table_parsers.table_links(player_table)
+    else:
+        href_row = []
+        for link in player_table.find_all('a'):
+            href_row.append(link.attrs['href'])
+
+    # Create a data frame, rename and only keep those players with the link
+    df_links = pd.DataFrame(href_row)
+    df_links.rename(columns={df_links.columns[0]: "link"}, inplace=True)
+    df_links = df_links[df_links['link'].str.contains("/player/")].reset_index(drop=True)
+
+    # Add links to players
+    df_players['link'] = df_links['link']
+    return df_players
+
 # Helper function to merge regular season and postseason stats
 def merge_stats(df_regular, df_postseason):
     """
@@ -123,26 +283,36 @@ def standardize_stat_columns(df):
     }
     return df.rename(columns={col: rename_map.get(col.lower(), col.lower()) for col in df.columns})
 
+# Locator of the player statistics table
+STATS_TABLE_LOCATOR = (By.CSS_SELECTOR, "table.SortTable_table__jnnJk.PlayerStatistics_mobileColumnWidth__4eS8P")
+
 # Helper Function to Get Player's Stats
 def get_stats(driver, wait, player_name, stat_name):
     try:
-        # Click dropdown
-        dropdown = wait.until(ec.element_to_be_clickable((By.CLASS_NAME, "css-x1uf2d-control")))
-        driver.execute_script("arguments[0].scrollIntoView(true);", dropdown)
-        dropdown.click()
-        time.sleep(0.3)
-
-        # Input stat type and hit Enter
-        input_box = driver.find_element(By.ID, "react-select-player-statistics-default-season-selector-league-input")
-        input_box.send_keys(stat_name)
-        input_box.send_keys(Keys.ENTER)
-        time.sleep(random.uniform(1.5, 2.0))
-
-        soup = BeautifulSoup(driver.page_source, "html.parser")
-        table = soup.find("table", class_="SortTable_table__jnnJk PlayerStatistics_mobileColumnWidth__4eS8P")
-
-        # Append player_name to the table
-        player_stats = table_data_to_rows(table)
+        with span('dropdown_select', stat=stat_name):
+            # Click dropdown
+            dropdown = timed_wait(wait, ec.element_to_be_clickable((By.CLASS_NAME, "css-x1uf2d-control")), 'stats_dropdown')
+            driver.execute_script("arguments[0].scrollIntoView(true);", dropdown)
+            dropdown.click()
+
+            # Input stat type and hit Enter
+            input_box = timed_wait(wait, ec.presence_of_element_located(
+                (By.ID, "react-select-player-statistics-default-season-selector-league-input")
+            ), 'stats_input')
+            old_table = element_html(driver, STATS_TABLE_LOCATOR)
+            input_box.send_keys(stat_name)
+            input_box.send_keys(Keys.ENTER)
+
+            # Wait until the table shows the selected stat type
+            wait_for_table_update(driver, STATS_TABLE_LOCATOR, old_table, 'stats_table')
+
+        with span('table_parse'):
+            # Parse only the table's HTML instead of the whole page source
+            table = element_html(driver, STATS_TABLE_LOCATOR)
+
+            # Append player_name to the table
+            with PARSE_SECONDS.labels('stats_table').time():
+                player_stats = table_data_to_rows(table)
         player_stats['player_name'] = player_name
 
         # Move the player_name column to the front
@@ -156,7 +326,8 @@ def get_stats(driver, wait, player_name, stat_name):
         # Standardize the column names
         player_stats = standardize_stat_columns(player_stats)
 
-        return player_stats
+        # Nullable integer stats, '-' cells become missing values
+        return apply_schema(player_stats, EP_STATS_SCHEMA)
     except Exception as e:
         print(f"Failed to get '{stat_name}' table: {e}")
         return None
@@ -187,20 +358,259 @@ def extract_draft_info(text):
         return (round_num, overall_num, year)
     return None
 
+# Helper Function to Get the Draft Columns
+def draft_columns(text):
+    """
+    Returns the draft as integer columns, all None if the player was not drafted:
+    {'draft_round': 1, 'draft_overall': 4, 'draft_year': 2017}
+    """
+    draft = extract_draft_info(text)
+    if draft is None:
+        return {"draft_round": None, "draft_overall": None, "draft_year": None}
+    round_num, overall_num, year = draft
+    return {"draft_round": int(round_num), "draft_overall": int(overall_num), "draft_year": int(year)}
+
 # Helper Function to Convert NaN to None
 def convert_NaN_to_None(df):
     return df.astype(object).where(pd.notnull(df), None)
 
+# Helper Function to Build the Row of a Player's Facts
+def build_player_facts_row(player_name, player_url, facts_dict, highlights, player_types, description):
+    """
+        Helper function to turn the raw pieces of the #player-facts section into a single-row DataFrame.
+        Shared by the Selenium and the HTTP-only extractors so both produce the same row schema.
+        Parameters:
+            player_name (str): Name of the player
+            player_url (str): Elite Prospects link of the player
+            facts_dict (dict): Fact label -> fact text, e.g. {'Height': '180 cm / 5\'11"'}
+            highlights (list): Highlight tooltips
+            player_types (list or None): Player type chips, None if the page has no player types
+            description (str or None): Description text without the [EP yyyy] suffix
+        Returns:
+            result (pd.DataFrame): Player's facts as a single-row DataFrame, the draft as draft_round, draft_overall
+                and draft_year. highlights and player_type stay lists, facts_tables.normalize_facts moves them to
+                their long tables
+    """
+    # Special handling for Draft
+    if "Drafted" in facts_dict:
+        match = re.search(r"(\d{4}).*?round\s+(\d+).*?#(\d+)", facts_dict["Drafted"])
+        if match:
+            year, rnd, overall = match.groups()
+            facts_dict["Draft"] = f"{rnd}rd round, {overall}th overall ({year})"
+
+    # Date of Birth
+    date_of_birth = None
+    if "Date of Birth" in facts_dict:
+        date_of_birth = facts_dict["Date of Birth"]
+        # Convert to datetime: example Oct 30, 1998
+        date_of_birth = pd.to_datetime(date_of_birth, format='%b %d, %Y')
+
+    # Height
+    height_cm = None
+    if "Height" in facts_dict:
+        match = re.search(r"(\d+)\s*cm", facts_dict["Height"])
+        if match:
+            height_cm = int(match.group(1))
+
+    # Weight
+    weight_kg = None
+    if "Weight" in facts_dict:
+        match = re.search(r"(\d+)\s*kg", facts_dict["Weight"])
+        if match:
+            weight_kg = int(match.group(1))
+
+    # Compile into a DataFrame
+    return apply_schema(pd.DataFrame([{
+        "player_name_ep": player_name,
+        "player_link_ep": player_url,
+        "date_of_birth": date_of_birth,
+        "nation": facts_dict.get("Nation"),
+        "position": facts_dict.get("Position"),
+        "height_cm": height_cm,
+        "weight_kg": weight_kg,
+        "shoots": facts_dict.get("Shoots"),
+        "player_type": player_types,
+        "nhl_rights": facts_dict.get("NHL Rights"),
+        **draft_columns(facts_dict.get("Draft")),
+        "highlights": highlights,
+        "description": truncate_description(description)
+    }]), FACTS_SCHEMA)
+
+# Reads the whole #player-facts section in one round trip: [label, text] of every fact item, highlight
+# tooltips, player type chips (null without the chips container) and the description
+PLAYER_FACTS_SCRIPT = """
+    const section = document.getElementById("player-facts");
+    if (!section) return null;
+    const readFacts = (list) => list ? Array.from(list.querySelectorAll("li")).map(item => {
+        const label = item.querySelector(".PlayerFacts_factLabel__EqzO5");
+        return [label ? label.innerText.trim() : null, item.innerText];
+    }) : null;
+    const typesContainer = section.querySelector(".PlayerFacts_playerTypes__lGoC4");
+    const desc = section.querySelector(".PlayerFacts_description__ujmxU");
+    return {
+        facts: readFacts(section.querySelector(".PlayerFacts_factsList__Xw_ID")),
+        extra_facts: readFacts(section.querySelector(".PlayerFacts_factsList__Xw_ID.PlayerFacts_fullWidth__W878B")),
+        highlights: Array.from(section.querySelectorAll(".highlights-tooltip"))
+            .map(elem => elem.getAttribute("data-tooltip-content")).filter(tooltip => tooltip),
+        player_types: typesContainer ? Array.from(typesContainer.querySelectorAll(".Chip_chip__qIK6Z"))
+            .map(chip => chip.innerText.trim()).filter(text => text) : null,
+        description: desc ? desc.innerText.trim() : null
+    };
+"""
+
+# Helper Function to Read the Player's Facts Section in One Call
+def extract_player_facts(driver, player_name, strict=True):
+    """
+        Helper function to read the #player-facts section of the loaded player page with a single script call
+        and parse it locally. The extraction time is recorded under 'facts_extract' (waits.timing_summary).
+        Parameters:
+            driver (webdriver.Chrome): Driver with the player's page loaded
+            player_name (str): Name of the player
+            strict (bool): Raise on missing fact lists or unlabelled facts instead of skipping them
+        Returns:
+            facts_dict (dict): Fact label -> fact text
+            highlights (list): Highlight tooltips
+            player_types (list or None): Player type chips, None if the page has no player types
+            description (str or None): Description text without the [EP yyyy] suffix
+            seconds (float): Time the extraction took
+    """
+    start = time.perf_counter()
+    section = driver.execute_script(PLAYER_FACTS_SCRIPT)
+    if section is None:
+        raise ValueError("No #player-facts section on the page")
+
+    facts_dict = {}
+    for key, name in [('facts', 'main'), ('extra_facts', 'extra')]:
+        if section[key] is None:
+            if strict:
+                raise Exception(f"Failed to extract {name} facts.")
+            print(f"No {name} facts found.")
+            continue
+        for label, text in section[key]:
+            if label is None:
+                if strict:
+                    raise Exception(f"Failed to extract {name} fact: {text}")
+                continue
+            facts_dict[label] = text.replace(label, "").strip()
+
+    highlights = [tooltip.strip() for tooltip in section['highlights']]
+
+    player_types = section['player_types']
+    if player_types is None:
+        print("Failed to extract player types - No player types found.")
+
+    description = None
+    if section['description'] is not None:
+        description = re.split(r"\[EP \d{4}\]", section['description'])[0].strip()
+    else:
+        print("Description not found.")
+
+    seconds = time.perf_counter() - start
+    record_timing('facts_extract', seconds)
+    PARSE_SECONDS.labels('facts_script').observe(seconds)
+    print(f"Extracted facts for {player_name} in {seconds * 1000:.0f} ms")
+    return facts_dict, highlights, player_types, description, seconds
+
+# Helper Function to Parse the Player's Facts from Server-Rendered HTML
+def parse_player_facts_html(html, player_name, player_url):
+    """
+        Helper function to extract a player's facts from the server-rendered HTML of their Elite Prospects page
+        Parameters:
+            html (str or bytes): HTML of the player's page
+            player_name (str): Name of the player
+            player_url (str): Elite Prospects link of the player
+        Returns:
+            result (pd.DataFrame): Player's facts as a single-row DataFrame
+    """
+    player_facts_section = find_player_facts_section(html)
+    if player_facts_section is None:
+        raise ValueError("No #player-facts section in the server-rendered page")
+    return player_facts_from_section(player_facts_section, player_name, player_url)
+
+# Helper Function to Find the Facts Section of a Player's Page
+def find_player_facts_section(html):
+    """
+        Helper function to parse only the #player-facts section of a player's server-rendered page
+        Parameters:
+            html (str or bytes): HTML of the player's page
+        Returns:
+            section (bs4.element.Tag or None): The #player-facts section, None if the page has none
+    """
+    # Only build the tree of the #player-facts section
+    soup = BeautifulSoup(html, 'lxml', parse_only=SoupStrainer(id="player-facts"))
+    return soup.find(id="player-facts")
+
+# Helper Function to Build the Player's Facts from Their Facts Section
+def player_facts_from_section(player_facts_section, player_name, player_url):
+    """
+        Helper function to extract a player's facts from the #player-facts section found by find_player_facts_section
+        Parameters:
+            player_facts_section (bs4.element.Tag): The #player-facts section
+            player_name (str): Name of the player
+            player_url (str): Elite Prospects link of the player
+        Returns:
+            result (pd.DataFrame): Player's facts as a single-row DataFrame
+    """
+    def item_facts(facts_list):
+        facts = {}
+        for item in facts_list.find_all('li'):
+            label_elem = item.find(class_="PlayerFacts_factLabel__EqzO5")
+            if label_elem is None:
+                raise ValueError(f"Failed to extract fact: {item.get_text(' ', strip=True)}")
+            label = label_elem.get_text(' ', strip=True)
+            value = ' '.join(item.get_text(' ', strip=True).replace(label, "", 1).split())
+            facts[label] = value
+        return facts
+
+    # Main facts
+    facts_list = player_facts_section.find(class_="PlayerFacts_factsList__Xw_ID")
+    if facts_list is None:
+        raise ValueError("Failed to extract main facts.")
+    facts_dict = item_facts(facts_list)
+
+    # Extra facts
+    extra_facts_list = player_facts_section.select_one(".PlayerFacts_factsList__Xw_ID.PlayerFacts_fullWidth__W878B")
+    if extra_facts_list is None:
+        raise ValueError("Failed to extract extra facts.")
+    facts_dict.update(item_facts(extra_facts_list))
+
+    # Highlights
+    highlights = []
+    for elem in player_facts_section.find_all(class_="highlights-tooltip"):
+        tooltip = elem.get("data-tooltip-content")
+        if tooltip:
+            highlights.append(tooltip.strip())
+
+    # Player Types
+    player_types = None
+    player_types_container = player_facts_section.find(class_="PlayerFacts_playerTypes__lGoC4")
+    if player_types_container is not None:
+        player_types = []
+        for chip in player_types_container.find_all(class_="Chip_chip__qIK6Z"):
+            text = chip.get_text(' ', strip=True)
+            if text:
+                player_types.append(text)
+
+    # Description
+    description = None
+    desc_elem = player_facts_section.find(class_="PlayerFacts_description__ujmxU")
+    if desc_elem is not None:
+        full_desc = desc_elem.get_text('\n', strip=True)
+        description = re.split(r"\[EP \d{4}\]", full_desc)[0].strip()
+
+    return build_player_facts_row(player_name, player_url, facts_dict, highlights, player_types, description)
+
 '''
     The following functions are used to handle the player's stats
 '''
 
-def get_season_roster(league, season):
+def get_season_roster(league, season, max_workers=None):
     """
         Get all players from a specific league and season
         Parameters:
             league (str): Name of the league
             season (str): Name of the season
+            max_workers (int): Maximum number of pages fetched at the same time, defaults to max_page_workers
         Returns:
             df (pd.DataFrame): DataFrame with all players
     """
@@ -219,49 +629,43 @@ def get_season_roster(league, season):
         raise ValueError("Invalid season format. Please use the format 'YYYY-YYYY'")
 
     # Get the URL
-    url = 'https://www.eliteprospects.com/league/' + league + '/stats/' + season
-    num_pages = get_number_of_pages(url)
+    url = 'https://www.eliteprospects.com/league/' + league + '/stats/' + season + '/?page='
+
+    # Get the first page once - it is used both to count the pages and as the first page of players
+    print(f"Collecting data from {url + '1'}")
+    first_page = fetch_page(url + '1')
+    first_soup = parse_page(first_page.content)
+    num_pages = count_pages(first_soup)
 
     # Initiate a list of players
     players = []
-
-    # Loop through all pages
-    url += '/?page='
-    for i in range(1, num_pages + 1):
-        # Get the page
-        page = requests.get(url + str(i))
-        print(f"Collecting data from {url + str(i)}")
-        soup = BeautifulSoup(page.content, 'html.parser')
-
-        # Get the table
-        player_table = soup.find('table', {'class': 'table table-striped table-sortable player-stats highlight-stats season'})
-
-        # Check if the table exists
-        if player_table is not None:
-            df_players = table_data_to_rows(player_table)
-
-            # Player exists in the table
-            if df_players['#'].count() > 0:
-                # Remove empty rows (where # is empty)
-                df_players = df_players[df_players['#'] != ''].reset_index(drop=True)
-
-                # Extract href links in the table
-                href_row = []
-                for link in player_table.find_all('a'):
-                    href_row.append(link.attrs['href'])
-
-                # Create a data frame, rename and only keep those players with the link
-                df_links = pd.DataFrame(href_row)
-                df_links.rename(columns={df_links.columns[0]: "link"}, inplace=True)
-                df_links = df_links[df_links['link'].str.contains("/player/")].reset_index(drop=True)
-
-                # Add links to players
-                df_players['link'] = df_links['link']
-                players.append(df_players)
-
-                # Wait 3 seconds before going to the next page
-                time.sleep(random.uniform(1, 3))
-
+    with PARSE_SECONDS.labels('roster_page').time():
+        df_players = parse_roster_page(first_soup)
+    if df_players is not None:
+        players.append(df_players)
+
+    # Fetch the remaining pages concurrently, results come back in page order
+    page_urls = [url + str(i) for i in range(2, num_pages + 1)]
+    for page_url, page in zip(page_urls, fetch_pages(page_urls, max_workers)):
+        print(f"Collecting data from {page_url}")
+        with PARSE_SECONDS.labels('roster_page').time():
+            df_players = parse_roster_page(parse_page(page.content))
+        if df_players is not None:
+            players.append(df_players)
+
+    return clean_season_roster(players, league, season)
+
+# Helper function to build the roster of a league season from its pages
+def clean_season_roster(players, league, season):
+    """
+        Helper function to turn the players of the roster pages into the league roster
+        Parameters:
+            players (list): Outputs of parse_roster_page, one per page
+            league (str): Name of the league
+            season (str): Name of the season
+        Returns:
+            df (pd.DataFrame): DataFrame with the players of the pages
+    """
     # Concatenate all the pages into one DataFrame
     df_players = pd.concat(players).reset_index()
 
@@ -291,7 +695,7 @@ def get_season_roster(league, season):
     # Drop the original player column
     df_players.drop(['player'], axis=1)
 
-    return df_players
+    return apply_schema(df_players, ROSTER_SCHEMA)
 
 def get_players_metadata(df_players):
     """
@@ -323,48 +727,48 @@ def get_player_stats(player_metadata, stats_type="Regular Season + Postseason"):
 
     print(f"Collecting {stats_type} stats for {player_name} at {player_url}")
 
-    # Use uc.ChromeOptions, NOT selenium's Options
-    chrome_options = uc.ChromeOptions()
-
-    chrome_options.add_argument("--headless=new")
-    chrome_options.add_argument("--no-sandbox")
-    chrome_options.add_argument("--disable-dev-shm-usage")
-
-    driver = uc.Chrome(version_main=138, options=chrome_options)
+    # Set up a lean headless Chrome driver
+    driver = create_driver()
     wait = WebDriverWait(driver, 15)
     result = None
 
-    try:
-        driver.get(player_url)
-        time.sleep(random.uniform(1.5, 2.5))
-
+    with span('player', player=player_name, scraper='get_player_stats'):
         try:
-            # Click dropdown if needed
-            dropdown = wait.until(ec.element_to_be_clickable((By.CSS_SELECTOR, "div.css-x1uf2d-control")))
-            driver.execute_script("arguments[0].scrollIntoView(true);", dropdown)
-            time.sleep(0.5)
-            dropdown.click()
-        except ElementClickInterceptedException:
-            print(f"Ad or overlay is blocking dropdown for {player_name}. Trying to remove it...")
+            polite_pause()
+            with span('navigate'):
+                limited_navigate(driver, player_url)
+
             try:
-                ad = driver.find_element(By.CSS_SELECTOR, "aside.AdSlot_centering__vHSRy")
-                driver.execute_script("arguments[0].remove();", ad)
-                time.sleep(0.5)
+                # Click dropdown if needed
+                dropdown = timed_wait(wait, ec.element_to_be_clickable((By.CSS_SELECTOR, "div.css-x1uf2d-control")), 'stats_dropdown')
+                driver.execute_script("arguments[0].scrollIntoView(true);", dropdown)
                 dropdown.click()
-            except Exception:
-                print("Failed to remove overlay/ad.")
+            except ElementClickInterceptedException:
+                print(f"Ad or overlay is blocking dropdown for {player_name}. Trying to remove it...")
+                try:
+                    ad = driver.find_element(By.CSS_SELECTOR, "aside.AdSlot_centering__vHSRy")
+                    driver.execute_script("arguments[0].remove();", ad)
+                    timed_wait(wait, ec.invisibility_of_element(ad), 'ad_removed')
+                    dropdown.click()
+                except Exception:
+                    print("Failed to remove overlay/ad.")
 
-        # Get stats
-        result = get_stats(driver, wait, player_name, stats_type)
+            # Get stats
+            result = get_stats(driver, wait, player_name, stats_type)
 
-        if result is None:
-            print(f"No stats found for {player_name}")
+            if result is None:
+                print(f"No stats found for {player_name}")
 
-    except Exception as e:
-        print(f"Error scraping {player_name}: {e}")
+        except Exception as e:
+            print(f"Error scraping {player_name}: {e}")
 
-    finally:
-        driver.quit()
+        finally:
+            driver.quit()
+
+    if result is None:
+        PLAYERS_FAILED.labels('get_player_stats').inc()
+    else:
+        PLAYERS_SUCCEEDED.labels('get_player_stats').inc()
 
     return result
 
@@ -383,64 +787,27 @@ def get_player_facts(player_metadata):
 
     print(f"Collecting facts for {player_name} at {player_url}")
 
-    chrome_options = uc.ChromeOptions()
-    chrome_options.add_argument("--headless=new")
-    chrome_options.add_argument("--no-sandbox")
-    chrome_options.add_argument("--disable-dev-shm-usage")
-
-    driver = uc.Chrome(version_main=138, options=chrome_options)
+    # Set up a lean headless Chrome driver
+    driver = create_driver()
     wait = WebDriverWait(driver, 15)
 
     result = None
 
     try:
-        driver.get(player_url)
-        time.sleep(random.uniform(1.5, 2.5))
+        polite_pause()
+        limited_navigate(driver, player_url)
 
-        player_facts_section = wait.until(
-            ec.presence_of_element_located((By.ID, "player-facts"))
-        )
+        timed_wait(wait, ec.presence_of_element_located((By.ID, "player-facts")), 'facts_section')
 
-        facts_dict = {}
+        # Read the whole facts section in one call
+        facts_dict, highlights, player_types, description, seconds = extract_player_facts(driver, player_name, strict=False)
 
-        # Main facts
-        try:
-            facts_list = player_facts_section.find_element(
-                By.CLASS_NAME, "PlayerFacts_factsList__Xw_ID"
-            )
-            fact_items = facts_list.find_elements(By.TAG_NAME, "li")
-            for item in fact_items:
-                try:
-                    label = item.find_element(By.CLASS_NAME, "PlayerFacts_factLabel__EqzO5").text.strip()
-                    value = item.text.replace(label, "").strip()
-                    facts_dict[label] = value
-                except:
-                    continue
-        except:
-            print("Failed to extract main facts.")
-
-        # Extra facts
-        try:
-            extra_facts_list = player_facts_section.find_element(
-                By.CSS_SELECTOR, ".PlayerFacts_factsList__Xw_ID.PlayerFacts_fullWidth__W878B"
-            )
-            extra_fact_items = extra_facts_list.find_elements(By.TAG_NAME, "li")
-            for item in extra_fact_items:
-                try:
-                    label = item.find_element(By.CLASS_NAME, "PlayerFacts_factLabel__EqzO5").text.strip()
-                    value = item.text.replace(label, "").strip()
-                    facts_dict[label] = value
-
-                    # Special handling for Draft
-                    if label == "Drafted":
-                        match = re.search(r"(\d{4}).*?round\s+(\d+).*?#(\d+)", value)
-                        if match:
-                            year, rnd, overall = match.groups()
-                            facts_dict["Draft"] = f"{rnd}rd round, {overall}th overall ({year})"
-                except:
-                    continue
-        except:
-            print("No extra facts found.")
+        # Special handling for Draft
+        if "Drafted" in facts_dict:
+            match = re.search(r"(\d{4}).*?round\s+(\d+).*?#(\d+)", facts_dict["Drafted"])
+            if match:
+                year, rnd, overall = match.groups()
+                facts_dict["Draft"] = f"{rnd}rd round, {overall}th overall ({year})"
 
         # Height
         height_cm = None
@@ -456,38 +823,6 @@ def get_player_facts(player_metadata):
             if match:
                 weight_kg = int(match.group(1))
 
-        # Highlights
-        highlights = []
-        try:
-            highlight_elements = player_facts_section.find_elements(By.CLASS_NAME, "highlights-tooltip")
-            for elem in highlight_elements:
-                tooltip = elem.get_attribute("data-tooltip-content")
-                if tooltip:
-                    highlights.append(tooltip.strip())
-        except:
-            print("Failed to extract highlights.")
-
-        # Extract Player Types
-        player_types = []
-        try:
-            player_types_container = player_facts_section.find_element(By.CLASS_NAME, "PlayerFacts_playerTypes__lGoC4")
-            chip_elements = player_types_container.find_elements(By.CLASS_NAME, "Chip_chip__qIK6Z")
-            for chip in chip_elements:
-                text = chip.text.strip()
-                if text:
-                    player_types.append(text)
-        except Exception as e:
-            print("Failed to extract player types - No player types found.")
-            player_types = None  # If failed, fallback to None
-
-        description = None
-        try:
-            desc_elem = player_facts_section.find_element(By.CLASS_NAME, "PlayerFacts_description__ujmxU")
-            full_desc = desc_elem.text.strip()
-            description = re.split(r"\[EP \d{4}\]", full_desc)[0].strip()
-        except:
-            print("Description not found.")
-
         # Compile into a DataFrame
         result = pd.DataFrame([{
             "player_name": player_name,
@@ -498,17 +833,21 @@ def get_player_facts(player_metadata):
             "shoots": facts_dict.get("Shoots"),
             "player_type": player_types,
             "nhl_rights": facts_dict.get("NHL Rights"),
-            "draft": extract_draft_info(facts_dict.get("Draft")),
+            **draft_columns(facts_dict.get("Draft")),
             "highlights": highlights,
             "description": truncate_description(description)
         }])
+        result = apply_schema(result, FACTS_SCHEMA)
+        result.attrs['extract_seconds'] = seconds
 
     except Exception as e:
         print(f"[ERROR] Failed to get facts for {player_name}: {e}")
+        PLAYERS_FAILED.labels('get_player_facts').inc()
         return pd.DataFrame()
     finally:
         driver.quit()
 
+    PLAYERS_SUCCEEDED.labels('get_player_facts').inc()
     return result
 
 def get_player_facts_with_reusable_driver(player_metadata, driver, wait):
@@ -518,139 +857,74 @@ def get_player_facts_with_reusable_driver(player_metadata, driver, wait):
     result = None
     try:
         print(f"Collecting facts for {player_name} at {player_url}")
-        driver.get(player_url)
+        polite_pause()
+        with span('navigate'):
+            limited_navigate(driver, player_url)
 
-        # Wait for the page to load
-        time.sleep(random.uniform(1.5, 5))
-        player_facts_section = wait.until(
-            ec.presence_of_element_located((By.ID, "player-facts"))
-        )
+        # Wait for the facts section to load
+        with span('wait', label='facts_section'):
+            timed_wait(wait, ec.presence_of_element_located((By.ID, "player-facts")), 'facts_section')
 
-        facts_dict = {}
+        # Read the whole facts section in one call
+        with span('facts_parse'):
+            facts_dict, highlights, player_types, description, seconds = extract_player_facts(driver, player_name)
 
-        # Main facts
-        try:
-            print("Locating the main facts_list")
-            facts_list = player_facts_section.find_element(
-                By.CLASS_NAME, "PlayerFacts_factsList__Xw_ID"
-            )
-            fact_items = facts_list.find_elements(By.TAG_NAME, "li")
-            print(f"Found {len(fact_items)} main facts")
-            for item in fact_items:
-                try:
-                    label = item.find_element(By.CLASS_NAME, "PlayerFacts_factLabel__EqzO5").text.strip()
-                    value = item.text.replace(label, "").strip()
-                    facts_dict[label] = value
-                except:
-                    raise Exception(f"Failed to extract main fact: {item.text}")
-        except:
-            raise Exception("Failed to extract main facts.")
-
-        # Extra facts
-        try:
-            print("Extracting extra facts...")
-            extra_facts_list = player_facts_section.find_element(
-                By.CSS_SELECTOR, ".PlayerFacts_factsList__Xw_ID.PlayerFacts_fullWidth__W878B"
-            )
-            extra_fact_items = extra_facts_list.find_elements(By.TAG_NAME, "li")
-            for item in extra_fact_items:
-                try:
-                    label = item.find_element(By.CLASS_NAME, "PlayerFacts_factLabel__EqzO5").text.strip()
-                    value = item.text.replace(label, "").strip()
-                    facts_dict[label] = value
-
-                    print(f"Extracted extra fact: {label}")
-
-                    # Special handling for Draft
-                    if label == "Drafted":
-                        match = re.search(r"(\d{4}).*?round\s+(\d+).*?#(\d+)", value)
-                        if match:
-                            year, rnd, overall = match.groups()
-                            facts_dict["Draft"] = f"{rnd}rd round, {overall}th overall ({year})"
-                except:
-                    raise Exception(f"Failed to extract extra fact: {item.text}")
-        except Exception as e:
-            raise Exception(f"Failed to extract extra facts: {e}")
+        result = build_player_facts_row(player_name, player_url, facts_dict, highlights, player_types, description)
+        result.attrs['extract_seconds'] = seconds
 
-        # Date of Birth
-        date_of_birth = None
-        if "Date of Birth" in facts_dict:
-            date_of_birth = facts_dict["Date of Birth"]
-            # Convert to datetime: example Oct 30, 1998
-            date_of_birth = pd.to_datetime(date_of_birth, format='%b %d, %Y')
+    except Exception as e:
+        raise Exception(f"[ERROR] Failed to get facts for {player_name}: {e}")
 
-        # Height
-        height_cm = None
-        if "Height" in facts_dict:
-            match = re.search(r"(\d+)\s*cm", facts_dict["Height"])
-            if match:
-                height_cm = int(match.group(1))
+    return result
 
-        # Weight
-        weight_kg = None
-        if "Weight" in facts_dict:
-            match = re.search(r"(\d+)\s*kg", facts_dict["Weight"])
-            if match:
-                weight_kg = int(match.group(1))
+def get_player_facts_fast(player_metadata):
+    """
+    Get a player's facts from the server-rendered HTML of their Elite Prospects page, without a browser.
 
-        # Highlights
-        highlights = []
-        try:
-            print("Extracting highlights...")
-            highlight_elements = player_facts_section.find_elements(By.CLASS_NAME, "highlights-tooltip")
-            for elem in highlight_elements:
-                tooltip = elem.get_attribute("data-tooltip-content")
-                if tooltip:
-                    highlights.append(tooltip.strip())
-            print("Successfully extracted highlights.")
-        except:
-            print("Failed to extract highlights.")
-
-        # Extract Player Types
-        player_types = []
-        try:
-            print("Extracting player types...")
-            player_types_container = player_facts_section.find_element(By.CLASS_NAME, "PlayerFacts_playerTypes__lGoC4")
-            chip_elements = player_types_container.find_elements(By.CLASS_NAME, "Chip_chip__qIK6Z")
-            for chip in chip_elements:
-                text = chip.text.strip()
-                if text:
-                    player_types.append(text)
-            print("Successfully extracted player types.")
-        except:
-            player_types = None
-            print("Failed to extract player types - No player types found.")
-
-        description = None
-        try:
-            print("Extracting description...")
-            desc_elem = player_facts_section.find_element(By.CLASS_NAME, "PlayerFacts_description__ujmxU")
-            full_desc = desc_elem.text.strip()
-            description = re.split(r"\[EP \d{4}\]", full_desc)[0].strip()
-            print("Successfully extracted description.")
-        except:
-            print("Description not found.")
+    Parameters:
+        player_metadata (pd.Series): Series with 'player_name' and 'player_link_ep'
 
-        # Compile into a DataFrame
-        result = pd.DataFrame([{
-            "player_name_ep": player_name,
-            "player_link_ep": player_url,
-            "date_of_birth": date_of_birth,
-            "nation": facts_dict.get("Nation"),
-            "position": facts_dict.get("Position"),
-            "height_cm": height_cm,
-            "weight_kg": weight_kg,
-            "shoots": facts_dict.get("Shoots"),
-            "player_type": player_types,
-            "nhl_rights": facts_dict.get("NHL Rights"),
-            "draft": extract_draft_info(facts_dict.get("Draft")),
-            "highlights": highlights,
-            "description": truncate_description(description)
-        }])
+    Returns:
+        pd.DataFrame: Player's facts as a single-row DataFrame, same schema as get_player_facts_with_reusable_driver
+    """
+    player_name = str(player_metadata['player_name'])
+    player_url = str(player_metadata['player_link_ep'])
 
-    except Exception as e:
-        raise Exception(f"[ERROR] Failed to get facts for {player_name}: {e}")
+    print(f"Collecting facts for {player_name} at {player_url} without a browser")
+    page = fetch_page(player_url)
+    if page.status_code != 200:
+        raise Exception(f"Request for {player_url} returned status {page.status_code}")
+
+    with PARSE_SECONDS.labels('facts_html').time():
+        return parse_player_facts_html(page.content, player_name, player_url)
 
+def get_player_facts_with_fallback(player_metadata, driver=None, wait=None):
+    """
+    Get a player's facts with the browser-free fast path, falling back to Selenium when it fails.
+    The path that produced the row ('http' or 'selenium') is counted in metrics.FACTS_PATHS, which
+    merges the counts of every pool worker.
+
+    Parameters:
+        player_metadata (pd.Series): Series with 'player_name' and 'player_link_ep'
+        driver (webdriver.Chrome): Reusable driver for the fallback, no fallback if None
+        wait (WebDriverWait): WebDriverWait instance for the driver
+
+    Returns:
+        pd.DataFrame: Player's facts as a single-row DataFrame
+    """
+    player_name = str(player_metadata['player_name'])
+    try:
+        result = get_player_facts_fast(player_metadata)
+        path = 'http'
+    except Exception as e:
+        if driver is None:
+            raise Exception(f"[ERROR] Failed to get facts for {player_name} without a browser: {e}")
+        print(f"Fast path failed for {player_name} ({e}), falling back to Selenium")
+        result = get_player_facts_with_reusable_driver(player_metadata, driver, wait)
+        path = 'selenium'
+
+    FACTS_PATHS.labels(path).inc()
+    print(f"Collected facts for {player_name} via {path}")
     return result
 
 '''
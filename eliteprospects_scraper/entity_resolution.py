@@ -0,0 +1,256 @@
+"""
+    Fuzzy matching of the official NHL players to their Elite Prospects players
+    1. fold_name(name): Accent folded, lowercase name without punctuation, e.g. 'T.J. Brodie' -> 'tj brodie'
+    2. load_official_players(data_dir) / load_ep_players(data_dir): One row per player and season played
+    3. resolve_players(official, ep): Match table with a confidence per official player
+    4. evaluate_matches(matches, truth): Precision and recall against a hand-checked merge
+
+    Candidates are blocked by position group (FW / DEF) and season, so a name is only compared with the players
+    of the same position who played in the same season, and by birth year when both sides have one. Within a
+    block identical folded names are joined directly and the other names are scored in one rapidfuzz cdist call.
+    Players left unmatched are compared again with the position dropped from the block, positions are not always
+    the same on both sites.
+    The confidence combines the name score with the share of the official player's seasons the Elite Prospects
+    player played too, and rows below review_threshold or with a close runner-up are flagged for review.
+"""
+
+import os
+import re
+import time
+
+import numpy as np
+import pandas as pd
+from rapidfuzz import fuzz, process
+from unidecode import unidecode
+
+import dataset_store
+from schemas import to_datetime
+
+# Pairs whose folded names score below this are not candidates
+score_cutoff = 80
+
+# Weights of the name score and of the season overlap in the confidence
+NAME_WEIGHT = 0.7
+SEASON_WEIGHT = 0.3
+
+# Matches below this confidence, or with a runner-up within ambiguity_margin, need a manual check
+review_threshold = 0.9
+ambiguity_margin = 0.03
+
+# Birth years further apart than this are not the same player
+max_birth_year_gap = 1
+
+# Official positions -> Elite Prospects fw_def
+POSITION_GROUPS = {'C': 'FW', 'LW': 'FW', 'RW': 'FW', 'L': 'FW', 'R': 'FW', 'F': 'FW', 'D': 'DEF'}
+
+PUNCTUATION_PATTERN = re.compile(r"[.'`]")
+SEPARATOR_PATTERN = re.compile(r'[\s\-_]+')
+EP_ID_PATTERN = r'/player/(\d+)'
+
+"""
+    The following section is helper functions
+"""
+def fold_name(name):
+    """
+        Fold a name for comparison: accents removed, lowercase, dots and apostrophes dropped, hyphens as spaces
+    """
+    if not isinstance(name, str):
+        return ''
+    name = PUNCTUATION_PATTERN.sub('', unidecode(name).lower())
+    return SEPARATOR_PATTERN.sub(' ', name).strip()
+
+def load_official_players(data_dir='./data'):
+    """
+        Get every official player with the seasons they are on a team roster
+        Parameters:
+            data_dir (str): Root of the CSV tree
+        Returns:
+            df (pd.DataFrame): player_key (official link), player_name, position_group and season, one row per season
+    """
+    df = dataset_store.read_roster_tables(data_dir)
+    df = df.rename(columns={'player_link': 'player_key'})
+    df['position_group'] = df['player_pos'].map(POSITION_GROUPS)
+    return df[['player_key', 'player_name', 'position_group', 'season']].drop_duplicates().reset_index(drop=True)
+
+def load_ep_players(data_dir='./data', league='nhl', facts_path=None):
+    """
+        Get every Elite Prospects player of a league with the seasons they played, and their birth year when the
+        facts file has it
+        Parameters:
+            data_dir (str): Root of the CSV tree
+            league (str): League of the league tables to use
+            facts_path (str): Facts CSV with player_link_ep and date_of_birth, defaults to the NHL facts file
+        Returns:
+            df (pd.DataFrame): player_key (EP link), player_name, position_group, season and birth_year
+    """
+    df = dataset_store.read_player_tables(data_dir)
+    df = df[df['league'] == league].rename(columns={'link': 'player_key', 'fw_def': 'position_group'})
+    df = df[['player_key', 'player_name', 'position_group', 'season']].drop_duplicates().reset_index(drop=True)
+
+    facts_path = facts_path or os.path.join(data_dir, 'nhl', 'facts', 'nhl_players_facts_with_date_of_birth.csv')
+    if os.path.exists(facts_path):
+        facts = pd.read_csv(facts_path, usecols=['player_link_ep', 'date_of_birth'], encoding='utf-8-sig')
+        birth_years = to_datetime(facts['date_of_birth']).dt.year
+        df['birth_year'] = df['player_key'].map(pd.Series(birth_years.values, index=facts['player_link_ep']).groupby(level=0).first())
+    return df
+
+def score_blocks(official, ep, block_columns):
+    """
+        Score every official name against every Elite Prospects name of the same block
+        Parameters:
+            official (pd.DataFrame): player_key, name_key and the block columns, one row per player and block
+            ep (pd.DataFrame): Same columns for the Elite Prospects players
+            block_columns (list): Columns both sides must share, e.g. ['position_group', 'season']
+        Returns:
+            pairs (pd.DataFrame): official_key, ep_key, name_score and seasons (number of shared blocks)
+    """
+    # Same folded name in the same block is a hash join, only the other names go through cdist
+    exact = official.merge(ep, on=block_columns + ['name_key'], suffixes=('_official', '_ep'))
+    pairs = [pd.DataFrame({
+        'official_key': exact['player_key_official'],
+        'ep_key': exact['player_key_ep'],
+        'name_score': np.uint8(100),
+    })]
+    official = official[~official['player_key'].isin(exact['player_key_official'])]
+
+    ep_blocks = {block: rows for block, rows in ep.groupby(block_columns, observed=True)}
+    for block, official_rows in official.groupby(block_columns, observed=True):
+        ep_rows = ep_blocks.get(block)
+        if ep_rows is None:
+            continue
+        official_rows = official_rows.drop_duplicates('player_key')
+        ep_rows = ep_rows.drop_duplicates('player_key')
+
+        scores = process.cdist(
+            official_rows['name_key'].tolist(), ep_rows['name_key'].tolist(),
+            scorer=fuzz.WRatio, score_cutoff=score_cutoff, dtype=np.uint8, workers=-1
+        )
+        rows, columns = np.nonzero(scores)
+        pairs.append(pd.DataFrame({
+            'official_key': official_rows['player_key'].to_numpy()[rows],
+            'ep_key': ep_rows['player_key'].to_numpy()[columns],
+            'name_score': scores[rows, columns],
+        }))
+
+    pairs = pd.concat(pairs, ignore_index=True)
+    return pairs.groupby(['official_key', 'ep_key'], as_index=False).agg(
+        name_score=('name_score', 'max'), seasons=('name_score', 'size')
+    )
+
+def assign_one_to_one(candidates):
+    """
+        Keep the best candidate of every official player, an Elite Prospects player is used at most once
+        Parameters:
+            candidates (pd.DataFrame): official_key, ep_key and confidence
+        Returns:
+            matches (pd.DataFrame): One row per matched official player, with the runner_up confidence
+    """
+    candidates = candidates.sort_values(['confidence', 'name_score'], ascending=False)
+    runner_up = candidates.groupby('official_key')['confidence'].nth(1)
+    runner_up = pd.Series(runner_up.to_numpy(), index=candidates.loc[runner_up.index, 'official_key'])
+
+    # Greedy on the sorted pairs, the most confident pairs claim their players first
+    used_official, used_ep, keep = set(), set(), []
+    for index, official_key, ep_key in zip(candidates.index, candidates['official_key'], candidates['ep_key']):
+        if official_key in used_official or ep_key in used_ep:
+            continue
+        used_official.add(official_key)
+        used_ep.add(ep_key)
+        keep.append(index)
+
+    matches = candidates.loc[keep].copy()
+    matches['runner_up'] = matches['official_key'].map(runner_up)
+    return matches
+
+"""
+    The following section is APIs to match the players
+"""
+def resolve_players(official, ep):
+    """
+        Match every official player to an Elite Prospects player
+        Parameters:
+            official (pd.DataFrame): Output of load_official_players, birth_year is used if present
+            ep (pd.DataFrame): Output of load_ep_players, birth_year is used if present
+        Returns:
+            matches (pd.DataFrame): One row per official player: player_link_official, player_name_official,
+                player_link_ep, player_name_ep, name_score, seasons_shared, confidence, method ('exact', 'blocked',
+                'season_only' or None when unmatched) and needs_review
+    """
+    start = time.perf_counter()
+    official = official.assign(name_key=official['player_name'].map(fold_name))
+    ep = ep.assign(name_key=ep['player_name'].map(fold_name))
+
+    official_seasons = official.groupby('player_key')['season'].nunique()
+    birth_years = None
+    if 'birth_year' in official.columns and 'birth_year' in ep.columns:
+        birth_years = (official.groupby('player_key')['birth_year'].first(), ep.groupby('player_key')['birth_year'].first())
+
+    def score(official_rows, block_columns, method):
+        pairs = score_blocks(official_rows, ep, block_columns)
+        if birth_years is not None and len(pairs) > 0:
+            gap = (pairs['official_key'].map(birth_years[0]) - pairs['ep_key'].map(birth_years[1])).abs()
+            # Unknown birth years do not rule a pair out
+            pairs = pairs[~(gap > max_birth_year_gap)]
+        overlap = pairs['seasons'] / pairs['official_key'].map(official_seasons)
+        pairs = pairs.assign(
+            confidence=(NAME_WEIGHT * pairs['name_score'] / 100 + SEASON_WEIGHT * overlap.clip(upper=1)).round(4),
+            method=method,
+        )
+        return assign_one_to_one(pairs)
+
+    # Position and season first, then the players left over with the season only
+    matches = score(official, ['position_group', 'season'], 'blocked')
+    leftover = official[~official['player_key'].isin(matches['official_key'])]
+    leftover_matches = score(leftover, ['season'], 'season_only')
+    leftover_matches = leftover_matches[~leftover_matches['ep_key'].isin(matches['ep_key'])]
+    matches = pd.concat([matches, leftover_matches], ignore_index=True)
+
+    names_official = official.groupby('player_key')['player_name'].first()
+    names_ep = ep.groupby('player_key')['player_name'].first()
+    folded_official = official.groupby('player_key')['name_key'].first()
+    folded_ep = ep.groupby('player_key')['name_key'].first()
+
+    result = pd.DataFrame({'player_link_official': names_official.index, 'player_name_official': names_official.values})
+    result = result.merge(
+        matches.rename(columns={'official_key': 'player_link_official', 'ep_key': 'player_link_ep', 'seasons': 'seasons_shared'}),
+        on='player_link_official', how='left'
+    )
+    result.insert(3, 'player_name_ep', result['player_link_ep'].map(names_ep))
+    is_exact = result['player_link_official'].map(folded_official) == result['player_link_ep'].map(folded_ep)
+    result.loc[is_exact & result['player_link_ep'].notna(), 'method'] = 'exact'
+    result['method'] = result['method'].astype(object).where(result['player_link_ep'].notna(), None)
+    result['needs_review'] = (
+        result['player_link_ep'].isna()
+        | (result['confidence'] < review_threshold)
+        | (result['confidence'] - result['runner_up'] < ambiguity_margin)
+    )
+
+    print(f"Matched {result['player_link_ep'].notna().sum()} of {len(result)} players "
+          f"({result['needs_review'].sum()} to review) in {time.perf_counter() - start:.2f}s")
+    return result.drop(columns=['runner_up'])
+
+def evaluate_matches(matches, truth):
+    """
+        Compare a match table with a hand-checked merge
+        Parameters:
+            matches (pd.DataFrame): Output of resolve_players
+            truth (pd.DataFrame): player_link_official and player_link_ep, e.g.
+                nhl_skaters_metadata_official_ep_merge_complete_final.csv
+        Returns:
+            scores (dict): Number of players checked, correct, wrong and unmatched, precision and recall
+    """
+    truth = truth.dropna(subset=['player_link_ep']).drop_duplicates('player_link_official')
+    # Links are compared by player ID, the slug of the same player is sometimes percent-encoded
+    expected = truth.set_index('player_link_official')['player_link_ep'].str.extract(EP_ID_PATTERN, expand=False)
+    checked = matches[matches['player_link_official'].isin(expected.index)]
+    found = checked['player_link_ep'].str.extract(EP_ID_PATTERN, expand=False)
+    correct = (found == checked['player_link_official'].map(expected)).sum()
+    matched = found.notna().sum()
+    return {
+        'checked': len(checked),
+        'correct': int(correct),
+        'wrong': int(matched - correct),
+        'unmatched': int(len(checked) - matched),
+        'precision': correct / matched if matched else None,
+        'recall': correct / len(checked) if len(checked) else None,
+    }
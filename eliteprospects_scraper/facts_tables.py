@@ -0,0 +1,227 @@
+"""
+    Normalized player facts: typed draft columns and long tables for highlights and player types
+    1. split_draft(draft): draft_round, draft_overall and draft_year of a draft column, e.g. "('1', '15', '1987')"
+    2. highlights_table(df) / player_types_table(df): One row per player and highlight / player type
+    3. normalize_facts(df): Facts without the list columns, the highlights table and the player types table
+    4. merge_metadata_facts(players_metadata, df_facts): The merge of the official metadata with the facts
+    5. migrate_facts_file(path, output_path): One-time rewrite of an existing facts CSV into the three tables
+    6. migrate_draft_columns(df): Facts with the draft column replaced by the three draft columns, for the writers
+       appending scraped facts to files of the old layout
+
+    The facts files store draft as a stringified tuple and highlights / player_type as stringified lists, every
+    consumer had to ast.literal_eval them row by row. Here both are parsed with vectorized string methods, the
+    items of a list are pulled out with one str.extractall over the whole column, so live rows (tuples and lists)
+    and CSV rows (their text) go through the same code. The long tables are keyed by the Elite Prospects ID:
+        player_highlights    ep_id | highlight | times | award    ('2-time NHL Stanley Cup Champion' -> 2, ...)
+        player_types         ep_id | player_type
+"""
+
+import os
+import time
+
+import pandas as pd
+
+from schemas import apply_schema, FACTS_SCHEMA, MERGED_FACTS_SCHEMA, HIGHLIGHTS_SCHEMA, PLAYER_TYPES_SCHEMA
+
+DRAFT_COLUMNS = ['draft_round', 'draft_overall', 'draft_year']
+
+# Columns of the merged final file, draft split in three and the list columns moved to the long tables
+MERGED_COLUMNS = ['player_id', 'player_name_official', 'player_name_ep', 'player_pos_official', 'player_pos_ep',
+                  'player_link_official', 'player_link_ep', 'player_image_official', 'date_of_birth', 'nation',
+                  'height_cm', 'weight_kg', 'shoots', 'nhl_rights', *DRAFT_COLUMNS, 'description']
+
+# Round, overall and year of ('1', '15', '1987'), also matches the "1rd round, 15th overall (1987)" text
+DRAFT_PATTERN = r"(\d+)\D+(\d+)\D+(\d{4})"
+
+# A quoted item of a Python list repr, single quoted unless the item itself has a single quote
+LIST_ITEM_PATTERN = r"""'((?:[^'\\]|\\.)*)'|"((?:[^"\\]|\\.)*)\""""
+
+# '3-time NHL First All-Star Team' -> 3, 'NHL First All-Star Team'
+HIGHLIGHT_PATTERN = r'^(\d+)-time\s+(.+)$'
+
+"""
+    The following section is helper functions
+"""
+def ep_ids(links):
+    """
+        Get the Elite Prospects IDs of a Series of player links, e.g. .../player/8862/joe-sakic -> 8862
+    """
+    return pd.to_numeric(links.astype(str).str.extract(r'/player/(\d+)', expand=False), errors='coerce').astype('Int64')
+
+def split_draft(draft):
+    """
+        Split a draft column into its round, overall pick and year
+        Parameters:
+            draft (pd.Series): Tuples of the live scraper or their text in the CSV files, None if undrafted
+        Returns:
+            df (pd.DataFrame): draft_round, draft_overall and draft_year as Int64, same index as draft
+    """
+    parts = draft.dropna().astype(str).str.extract(DRAFT_PATTERN).reindex(draft.index)
+    parts.columns = DRAFT_COLUMNS
+    return parts.apply(pd.to_numeric, errors='coerce').astype('Int64')
+
+def migrate_draft_columns(df):
+    """
+        Replace the draft column of facts written before the draft split with draft_round, draft_overall and draft_year
+        Parameters:
+            df (pd.DataFrame): Facts of the old layout, or of both when new rows were added to an old file
+        Returns:
+            df (pd.DataFrame): Facts without draft, rows that already have the three columns keep their values.
+                Facts without a draft column are returned as they are
+    """
+    if 'draft' not in df.columns:
+        return df
+
+    df = df.copy()
+    draft = split_draft(df['draft'])
+    position = df.columns.get_loc('draft')
+    for offset, column in enumerate(DRAFT_COLUMNS):
+        if column in df.columns:
+            df[column] = pd.to_numeric(df[column], errors='coerce').astype('Int64').fillna(draft[column])
+        else:
+            df.insert(position + offset, column, draft[column])
+    return df.drop(columns=['draft'])
+
+def explode_list_column(df, column, keys):
+    """
+        Turn a list column into one row per item
+        Parameters:
+            df (pd.DataFrame): Facts with the list column and the key columns
+            column (str): 'highlights' or 'player_type', lists or their text
+            keys (list): Columns identifying the player, copied to every item
+        Returns:
+            df (pd.DataFrame): The key columns and column, one row per item, in the order of the lists
+    """
+    df = df.reset_index(drop=True)
+    values = df[column].dropna().astype(str)
+    items = values.str.extractall(LIST_ITEM_PATTERN)
+    if len(items) == 0:
+        return pd.DataFrame(columns=[*keys, column])
+
+    # Escaped quotes and backslashes of the repr back to the characters
+    text = items[0].fillna(items[1]).str.replace(r'\\(.)', r'\1', regex=True)
+    rows = items.index.get_level_values(0)
+    result = df.loc[rows, keys].reset_index(drop=True)
+    result[column] = text.to_numpy()
+    return result
+
+def add_ep_id(df):
+    if 'ep_id' not in df.columns:
+        if 'player_link_ep' not in df.columns:
+            raise ValueError("Facts need an ep_id or player_link_ep column")
+        df = df.assign(ep_id=ep_ids(df['player_link_ep']))
+    return df
+
+"""
+    The following section is APIs to build the tables
+"""
+def highlights_table(df, keys=('ep_id',)):
+    """
+        Get the highlights of every player as a long table
+        Parameters:
+            df (pd.DataFrame): Facts with a highlights column and player_link_ep (or ep_id)
+            keys (tuple): Columns identifying the player
+        Returns:
+            df (pd.DataFrame): ep_id, highlight, times (Int64, 1 if the text has no count) and award
+    """
+    df = explode_list_column(add_ep_id(df), 'highlights', list(keys)).rename(columns={'highlights': 'highlight'})
+    parts = df['highlight'].astype(str).str.extract(HIGHLIGHT_PATTERN)
+    df['times'] = pd.to_numeric(parts[0], errors='coerce').fillna(1)
+    df['award'] = parts[1].fillna(df['highlight'])
+    return apply_schema(df, HIGHLIGHTS_SCHEMA)
+
+def player_types_table(df, keys=('ep_id',)):
+    """
+        Get the player types of every player as a long table
+        Parameters:
+            df (pd.DataFrame): Facts with a player_type column and player_link_ep (or ep_id)
+            keys (tuple): Columns identifying the player
+        Returns:
+            df (pd.DataFrame): ep_id and player_type, one row per player type
+    """
+    df = explode_list_column(add_ep_id(df), 'player_type', list(keys))
+    return apply_schema(df, PLAYER_TYPES_SCHEMA)
+
+def normalize_facts(df, keys=('ep_id',)):
+    """
+        Split facts into the facts table and the two long tables
+        Parameters:
+            df (pd.DataFrame): Output of get_player_facts_with_reusable_driver or a facts CSV, old or new layout
+            keys (tuple): Columns identifying the player in the long tables
+        Returns:
+            facts (pd.DataFrame): Facts with ep_id and draft_round / draft_overall / draft_year, without draft,
+                highlights and player_type
+            highlights (pd.DataFrame): Output of highlights_table
+            player_types (pd.DataFrame): Output of player_types_table
+    """
+    df = add_ep_id(df)
+    highlights = highlights_table(df, keys) if 'highlights' in df.columns else None
+    player_types = player_types_table(df, keys) if 'player_type' in df.columns else None
+
+    # Old layout, or both when scraped rows were appended to an old file
+    facts = migrate_draft_columns(df.drop(columns=['highlights', 'player_type'], errors='ignore'))
+    return apply_schema(facts, FACTS_SCHEMA), highlights, player_types
+
+def merge_metadata_facts(players_metadata, df_facts):
+    """
+        Merge the official metadata with the facts, the step that writes nhl_players_metadata_facts_merged_final.csv
+        Parameters:
+            players_metadata (pd.DataFrame): nhl_skaters_metadata_official_ep_merge_complete_final.csv
+            df_facts (pd.DataFrame): nhl_players_facts_with_date_of_birth.csv or the rows of the facts scraper
+        Returns:
+            merged (pd.DataFrame): MERGED_COLUMNS, one row per official player with a player_id
+            highlights (pd.DataFrame): player_id, ep_id, highlight, times and award
+            player_types (pd.DataFrame): player_id, ep_id and player_type
+    """
+    df_facts = df_facts.drop_duplicates(['player_name_ep', 'player_link_ep'], keep='first')
+    merged = pd.merge(players_metadata, df_facts, on='player_link_ep', how='left')
+    merged = merged.rename(columns={
+        'player_name': 'player_name_official',
+        'player_pos_x': 'player_pos_official',
+        'player_pos_y': 'player_pos_ep',
+        'player_image': 'player_image_official'
+    })
+
+    # Add an unique ID column for each player
+    merged['player_id'] = range(1, len(merged) + 1)
+    merged, highlights, player_types = normalize_facts(merged, keys=('player_id', 'ep_id'))
+    merged = apply_schema(merged.reindex(columns=MERGED_COLUMNS), MERGED_FACTS_SCHEMA)
+    return merged, highlights, player_types
+
+def long_table_paths(path):
+    stem, extension = os.path.splitext(path)
+    return f'{stem}_highlights{extension}', f'{stem}_player_types{extension}'
+
+def migrate_facts_file(path, output_path=None):
+    """
+        Rewrite a facts CSV with the draft columns and write its highlights and player types next to it as
+        {name}_highlights.csv and {name}_player_types.csv. Files already migrated are left as they are
+        Parameters:
+            path (str): Facts CSV with player_link_ep, e.g. ./data/nhl/final/nhl_players_metadata_facts_merged_final.csv
+            output_path (str): Where to write the facts, defaults to path
+        Returns:
+            facts (pd.DataFrame): Migrated facts, None if the file was already migrated
+    """
+    start = time.perf_counter()
+    df = pd.read_csv(path, encoding='utf-8-sig', low_memory=False)
+    if 'draft' not in df.columns and 'highlights' not in df.columns and 'player_type' not in df.columns:
+        print(f"{path} is already migrated")
+        return None
+
+    output_path = output_path or path
+    keys = ('player_id', 'ep_id') if 'player_id' in df.columns else ('ep_id',)
+    facts, highlights, player_types = normalize_facts(df, keys)
+    # The CSV files identify players by their link, ep_id is only a key of the long tables
+    facts = facts.drop(columns=['ep_id'])
+
+    highlights_path, player_types_path = long_table_paths(output_path)
+    if highlights is not None:
+        highlights.to_csv(highlights_path, index=False, encoding='utf-8-sig')
+    if player_types is not None:
+        player_types.to_csv(player_types_path, index=False, encoding='utf-8-sig')
+    facts.to_csv(output_path, index=False, encoding='utf-8-sig')
+
+    print(f"Migrated {len(facts)} players of {path} in {time.perf_counter() - start:.2f}s "
+          f"({0 if highlights is None else len(highlights)} highlights, "
+          f"{0 if player_types is None else len(player_types)} player types)")
+    return facts
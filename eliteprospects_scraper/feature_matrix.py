@@ -0,0 +1,309 @@
+"""
+    Player x season x stat feature matrix of the tier classifier
+    1. build_feature_matrix(data_dir, output_dir): Builds the matrix from the Elite Prospects league tables and the
+       official career stats and saves it as .npy files with a manifest
+    2. load_feature_matrix(output_dir, mmap_mode): Opens a saved matrix, memory-mapped read-only by default
+    3. FeatureMatrix.player(ep_id) / FeatureMatrix.stat(name): One player's seasons / one stat of every player
+
+    The matrix is a dense float32 array of shape (players, seasons, stats), NaN where a player has no value:
+        features.npy     float32 (players, seasons, stats)
+        player_ids.npy   int64   (players,)            Elite Prospects ID, sorted
+        seasons.npy      int16   (seasons,)            Start year, 2015 -> 2015-2016, every year in between
+        leagues.npy      int8    (players, seasons)    Index into manifest['leagues'] of the ep_* stats, -1 if none
+        manifest.json    Shape, stat names, league and season labels, source files and build time
+    Opening it maps the files instead of reading them, so every training or analysis process shares the same pages
+    of the OS cache and a load takes milliseconds. The files are written under temporary names and renamed in place,
+    the manifest last, so a process that still has the previous build open keeps reading a complete matrix.
+
+    ep_* stats come from the league tables; when a player played in several leagues in one season, the league with
+    the most games is kept and its teams are summed. nhl_* stats are the official NHL stats of the season, for the
+    regular season and the playoffs.
+"""
+
+import json
+import os
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from dataset_store import read_player_tables
+from facts_tables import ep_ids
+
+# Default folder of the .npy files
+features_dir = './data/features'
+
+MANIFEST_NAME = 'manifest.json'
+ARRAY_NAMES = ['features', 'player_ids', 'seasons', 'leagues']
+
+# Summed over the teams of a season, ppg is recomputed from the sums
+EP_COUNT_STATS = ['gp', 'g', 'a', 'tp', 'pim', '+/-']
+EP_STATS = ['ep_gp', 'ep_g', 'ep_a', 'ep_tp', 'ep_ppg', 'ep_pim', 'ep_plus_minus']
+
+# Official stats of merge_stats, counts are summed and the averages weighted by games played
+GAME_TYPES = ['regular', 'playoffs']
+OFFICIAL_COUNT_STATS = ['gp', 'g', 'a', 'p', 'plus_minus', 'pim', 'ppg', 'ppp', 'shg', 'shp', 'gwg', 'otg', 'sog']
+OFFICIAL_AVERAGE_STATS = ['toi_per_game', 'fo_pct']
+OFFICIAL_STATS = [f'nhl_{stat}_{game_type}' for game_type in GAME_TYPES
+                  for stat in [*OFFICIAL_COUNT_STATS, 'shooting_pct', *OFFICIAL_AVERAGE_STATS]]
+
+STATS = EP_STATS + OFFICIAL_STATS
+
+"""
+    The following section is helper functions
+"""
+def season_start(seasons):
+    """
+        Get the start year of seasons written as 2015-2016 (Elite Prospects) or 2015-16 (official)
+    """
+    return pd.to_numeric(seasons.astype(str).str[:4], errors='coerce').astype('Int64')
+
+def toi_minutes(toi):
+    """
+        Convert average times on ice like '18:42' to minutes
+    """
+    parts = toi.astype(str).str.extract(r'^(\d+):(\d{2})$').apply(pd.to_numeric, errors='coerce')
+    return parts[0] + parts[1] / 60
+
+def season_label(start):
+    return f'{start}-{start + 1}'
+
+def ep_season_stats(df_players):
+    """
+        Get the Elite Prospects stats of every player and season
+        Parameters:
+            df_players (pd.DataFrame): League tables, output of dataset_store.read_player_tables
+        Returns:
+            df (pd.DataFrame): ep_id, season_start, league and EP_STATS, one row per player and season
+    """
+    df = df_players.assign(ep_id=ep_ids(df_players['link']), season_start=season_start(df_players['season']))
+    df = df.dropna(subset=['ep_id', 'season_start'])
+    df = df.groupby(['ep_id', 'season_start', 'league'], as_index=False)[EP_COUNT_STATS].sum(min_count=1)
+
+    # The league with the most games of a season stands for the player's level that season
+    df = df.sort_values(['ep_id', 'season_start', 'gp'], ascending=[True, True, False], na_position='last')
+    multi_league = df.duplicated(['ep_id', 'season_start']).sum()
+    if multi_league:
+        print(f"Kept the main league of {multi_league} player-seasons played in several leagues")
+    df = df.drop_duplicates(['ep_id', 'season_start'], keep='first')
+
+    gp = df['gp'].astype(float)
+    df['ppg'] = (df['tp'].astype(float) / gp.where(gp > 0)).round(2)
+    df = df.rename(columns={'+/-': 'plus_minus'})
+    df = df.rename(columns={stat.removeprefix('ep_'): stat for stat in EP_STATS})
+    return df[['ep_id', 'season_start', 'league', *EP_STATS]].reset_index(drop=True)
+
+def official_season_stats(df_stats, players_metadata):
+    """
+        Get the official NHL stats of every player and season
+        Parameters:
+            df_stats (pd.DataFrame): Output of merge_stats with player_link_official, e.g. nhl_players_official_stats.csv
+            players_metadata (pd.DataFrame): player_name, player_link_official and player_link_ep of the official
+                players, e.g. nhl_skaters_metadata_official_ep_merge_complete_final.csv
+        Returns:
+            df (pd.DataFrame): ep_id, season_start and OFFICIAL_STATS, one row per player and NHL season
+    """
+    ids = pd.Series(ep_ids(players_metadata['player_link_ep']).to_numpy(), index=players_metadata['player_link_official'])
+    # Rows written before the stats carried their link fall back to the name, when only one player has it
+    unique = players_metadata.drop_duplicates('player_name', keep=False)
+    ids_by_name = pd.Series(ep_ids(unique['player_link_ep']).to_numpy(), index=unique['player_name'])
+
+    df = df_stats[df_stats['league'].astype(str).str.upper() == 'NHL'].copy()
+    links = df['player_link_official'] if 'player_link_official' in df.columns else pd.Series(None, index=df.index)
+    df['ep_id'] = links.map(ids[~ids.index.duplicated()]).fillna(df['player_name_official'].map(ids_by_name))
+    df['ep_id'] = df['ep_id'].astype('Int64')
+    df['season_start'] = season_start(df['season'])
+    df = df.dropna(subset=['ep_id', 'season_start'])
+
+    columns = {}
+    for game_type in GAME_TYPES:
+        gp = pd.to_numeric(df[f'gp_{game_type}'], errors='coerce')
+        for stat in OFFICIAL_COUNT_STATS:
+            columns[f'{stat}_{game_type}'] = pd.to_numeric(df[f'{stat}_{game_type}'], errors='coerce')
+        # Weighted by games played so a traded player's season averages over both teams
+        toi = toi_minutes(df[f'toi_per_game_{game_type}'])
+        fo_pct = pd.to_numeric(df[f'fo_pct_{game_type}'], errors='coerce')
+        columns[f'toi_weight_{game_type}'] = gp.where(toi.notna())
+        columns[f'toi_per_game_{game_type}'] = toi * gp
+        columns[f'fo_weight_{game_type}'] = gp.where(fo_pct.notna())
+        columns[f'fo_pct_{game_type}'] = fo_pct * gp
+    df = pd.concat([df[['ep_id', 'season_start']], pd.DataFrame(columns, index=df.index)], axis=1)
+    df = df.groupby(['ep_id', 'season_start'], as_index=False).sum(min_count=1)
+
+    result = df[['ep_id', 'season_start']].copy()
+    for game_type in GAME_TYPES:
+        for stat in OFFICIAL_COUNT_STATS:
+            result[f'nhl_{stat}_{game_type}'] = df[f'{stat}_{game_type}']
+        sog = df[f'sog_{game_type}']
+        result[f'nhl_shooting_pct_{game_type}'] = (df[f'g_{game_type}'] / sog.where(sog > 0) * 100).round(1)
+        result[f'nhl_toi_per_game_{game_type}'] = df[f'toi_per_game_{game_type}'] / df[f'toi_weight_{game_type}']
+        result[f'nhl_fo_pct_{game_type}'] = df[f'fo_pct_{game_type}'] / df[f'fo_weight_{game_type}']
+    return result[['ep_id', 'season_start', *OFFICIAL_STATS]]
+
+def save_array(output_dir, name, array):
+    """
+        Write an array to {name}.npy.tmp, the caller renames it once every file is written
+    """
+    path = os.path.join(output_dir, f'{name}.npy.tmp')
+    out = np.lib.format.open_memmap(path, mode='w+', dtype=array.dtype, shape=array.shape)
+    out[...] = array
+    out.flush()
+    del out
+    return path
+
+"""
+    The following section is APIs to build and load the matrix
+"""
+def build_feature_matrix(data_dir='./data', output_dir=None, official_stats_path=None, metadata_path=None):
+    """
+        Build the feature matrix and save it to output_dir
+        Parameters:
+            data_dir (str): Root of the CSV tree
+            output_dir (str): Folder of the .npy files, defaults to {data_dir}/features
+            official_stats_path (str): Official career stats, defaults to
+                {data_dir}/nhl/official/stats/nhl_players_official_stats.csv (output of nhl_official_data_prep.ipynb),
+                the nhl_* stats stay NaN if the file is missing
+            metadata_path (str): Official players with their Elite Prospects links, defaults to
+                {data_dir}/nhl/nhl_skaters_metadata_official_ep_merge_complete_final.csv
+        Returns:
+            manifest (dict): Content of manifest.json
+    """
+    start = time.perf_counter()
+    output_dir = output_dir or os.path.join(data_dir, 'features')
+    official_stats_path = official_stats_path or os.path.join(data_dir, 'nhl', 'official', 'stats',
+                                                              'nhl_players_official_stats.csv')
+    metadata_path = metadata_path or os.path.join(data_dir, 'nhl', 'nhl_skaters_metadata_official_ep_merge_complete_final.csv')
+    os.makedirs(output_dir, exist_ok=True)
+
+    df_ep = ep_season_stats(read_player_tables(data_dir))
+    sources = {'league_tables': os.path.join(data_dir, 'nhl', 'players'), 'official_stats': None}
+    df_official = pd.DataFrame(columns=['ep_id', 'season_start', *OFFICIAL_STATS])
+    if os.path.exists(official_stats_path) and os.path.exists(metadata_path):
+        df_official = official_season_stats(
+            pd.read_csv(official_stats_path, encoding='utf-8-sig', low_memory=False),
+            pd.read_csv(metadata_path, encoding='utf-8-sig')
+        )
+        sources['official_stats'] = official_stats_path
+    else:
+        print(f"No official stats at {official_stats_path}, the nhl_* stats are left empty")
+
+    # Sorted IDs and a contiguous range of seasons, so a lookup is a searchsorted / a subtraction
+    player_ids = np.unique(np.concatenate([
+        df_ep['ep_id'].to_numpy(dtype=np.int64), df_official['ep_id'].to_numpy(dtype=np.int64)
+    ]))
+    starts = np.concatenate([
+        df_ep['season_start'].to_numpy(dtype=np.int64), df_official['season_start'].to_numpy(dtype=np.int64)
+    ])
+    seasons = np.arange(starts.min(), starts.max() + 1, dtype=np.int16)
+    league_names = sorted(df_ep['league'].unique())
+
+    # The big array is filled in place on disk instead of being built in memory first
+    features_path = os.path.join(output_dir, 'features.npy.tmp')
+    features = np.lib.format.open_memmap(
+        features_path, mode='w+', dtype=np.float32, shape=(len(player_ids), len(seasons), len(STATS))
+    )
+    features[...] = np.nan
+    leagues = np.full((len(player_ids), len(seasons)), -1, dtype=np.int8)
+
+    rows = np.searchsorted(player_ids, df_ep['ep_id'].to_numpy(dtype=np.int64))
+    columns = df_ep['season_start'].to_numpy(dtype=np.int64) - seasons[0]
+    features[rows, columns, :len(EP_STATS)] = df_ep[EP_STATS].to_numpy(dtype=np.float32, na_value=np.nan)
+    leagues[rows, columns] = pd.Categorical(df_ep['league'], categories=league_names).codes
+
+    if len(df_official) > 0:
+        rows = np.searchsorted(player_ids, df_official['ep_id'].to_numpy(dtype=np.int64))
+        columns = df_official['season_start'].to_numpy(dtype=np.int64) - seasons[0]
+        features[rows, columns, len(EP_STATS):] = df_official[OFFICIAL_STATS].to_numpy(dtype=np.float32, na_value=np.nan)
+    features.flush()
+    del features
+
+    paths = {
+        'features': features_path,
+        'player_ids': save_array(output_dir, 'player_ids', player_ids),
+        'seasons': save_array(output_dir, 'seasons', seasons),
+        'leagues': save_array(output_dir, 'leagues', leagues),
+    }
+    for name, path in paths.items():
+        os.replace(path, os.path.join(output_dir, f'{name}.npy'))
+
+    manifest = {
+        'shape': [len(player_ids), len(seasons), len(STATS)],
+        'dtype': 'float32',
+        'stats': STATS,
+        'leagues': league_names,
+        'seasons': [season_label(int(season)) for season in seasons],
+        'player_seasons': {'ep': len(df_ep), 'official': len(df_official)},
+        'sources': sources,
+        'built_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'build_seconds': round(time.perf_counter() - start, 3),
+    }
+    manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+    with open(f'{manifest_path}.tmp', 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(f'{manifest_path}.tmp', manifest_path)
+
+    print(f"Built a {' x '.join(map(str, manifest['shape']))} feature matrix in {manifest['build_seconds']:.2f}s "
+          f"({os.path.getsize(os.path.join(output_dir, 'features.npy')) / 1e6:.1f} MB) at {output_dir}")
+    return manifest
+
+class FeatureMatrix:
+    def __init__(self, output_dir, mmap_mode='r'):
+        """
+            Parameters:
+                output_dir (str): Folder written by build_feature_matrix
+                mmap_mode (str): np.load mmap_mode, 'r' shares the pages read-only, None reads the arrays into memory
+        """
+        with open(os.path.join(output_dir, MANIFEST_NAME), encoding='utf-8') as f:
+            self.manifest = json.load(f)
+        arrays = {name: np.load(os.path.join(output_dir, f'{name}.npy'), mmap_mode=mmap_mode) for name in ARRAY_NAMES}
+        self.features = arrays['features']
+        self.player_ids = arrays['player_ids']
+        self.seasons = arrays['seasons']
+        self.leagues = arrays['leagues']
+        if list(self.features.shape) != self.manifest['shape']:
+            raise ValueError(f"{output_dir} holds a {self.features.shape} matrix, the manifest expects {self.manifest['shape']}")
+
+        self.stats = self.manifest['stats']
+        self.league_names = self.manifest['leagues']
+        self.season_labels = self.manifest['seasons']
+        self._stat_index = {stat: i for i, stat in enumerate(self.stats)}
+
+    def player_index(self, ep_id):
+        """
+            Get the row of a player, KeyError if the player is not in the matrix
+        """
+        index = int(np.searchsorted(self.player_ids, ep_id))
+        if index == len(self.player_ids) or self.player_ids[index] != ep_id:
+            raise KeyError(f"Player {ep_id} is not in the feature matrix")
+        return index
+
+    def stat(self, name):
+        """
+            Get one stat of every player and season as a (players, seasons) view, no data is copied
+        """
+        return self.features[:, :, self._stat_index[name]]
+
+    def player(self, ep_id):
+        """
+            Get the seasons a player has stats in as a DataFrame, one row per season
+        """
+        index = self.player_index(ep_id)
+        values = np.asarray(self.features[index])
+        played = ~np.isnan(values).all(axis=1)
+        leagues = self.leagues[index][played]
+        df = pd.DataFrame(values[played], columns=self.stats)
+        df.insert(0, 'season', np.array(self.season_labels)[played])
+        df.insert(1, 'league', [self.league_names[code] if code >= 0 else None for code in leagues])
+        return df
+
+def load_feature_matrix(output_dir=None, mmap_mode='r'):
+    """
+        Open a feature matrix saved by build_feature_matrix
+        Parameters:
+            output_dir (str): Folder of the .npy files, defaults to features_dir
+            mmap_mode (str): 'r' to memory-map the arrays read-only, None to read them into memory
+        Returns:
+            matrix (FeatureMatrix): features, player_ids, seasons, leagues and the manifest
+    """
+    return FeatureMatrix(output_dir or features_dir, mmap_mode)
@@ -0,0 +1,512 @@
+"""
+    Record / replay fixtures of both sites and an offline throughput benchmark of the scraper entry points
+    1. recording(fixtures_dir): While active, every HTTP response the scrapers receive is saved to fixtures_dir
+    2. RecordingDriver(driver, fixtures_dir): Wraps a live driver and saves the rendered page and script results of
+       every page it visits
+    3. record_fixtures(fixtures_dir, rosters, players_metadata, teams): Runs the entry points live and records them
+    4. replaying(fixtures_dir): While active, HTTP requests are answered by a local server serving the fixtures
+    5. FakeDriver(fixtures_dir): Offline stand-in for a Chrome driver, serving the recorded pages and script results
+    6. benchmark_offline(fixtures_dir, rosters, players_metadata, teams): Pages/sec and per-stage latency of every
+       entry point, fully offline
+    7. record_stats_fixtures(fixtures_dir, players_metadata): Records the landing JSON of every player together with
+       the career stats the browser path scrapes from the player page
+    8. compare_stats_backends(fixtures_dir): Serves the recorded landing JSON from a local stub through base_url and
+       checks that get_player_stats_json returns the same DataFrame as the browser path
+
+    Layout of fixtures_dir:
+        manifest.json       Recorded URLs with status, headers and file names, recorded script results per page,
+                            recorded career stats per NHL player ID
+        http/<sha256>       Raw response bodies
+        pages/<sha256>      Rendered page sources (driver.page_source)
+        stats/<id>.csv      Career stats of the browser path, written like the stats files
+"""
+
+import hashlib
+import io
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import quote, unquote
+
+import pandas as pd
+import requests
+from bs4 import BeautifulSoup
+from lxml import html as lxml_html
+from selenium.common import NoSuchElementException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+
+import eliteprospects_scraper_api as ep
+import nhl_scraper_api as nhl_scraper
+import rate_limiter
+import waits
+from http_cache import HttpCache, url_key
+from schemas import apply_schema, CAREER_TABLE_SCHEMA, OFFICIAL_STATS_SCHEMA
+
+"""
+    The following section is manifest helpers
+"""
+def script_key(script):
+    return hashlib.sha256(script.encode('utf-8')).hexdigest()
+
+def load_manifest(fixtures_dir):
+    path = os.path.join(fixtures_dir, 'manifest.json')
+    if not os.path.exists(path):
+        return {'http': {}, 'pages': {}, 'stats': {}}
+    with open(path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    manifest.setdefault('stats', {})
+    return manifest
+
+def save_manifest(fixtures_dir, manifest):
+    os.makedirs(fixtures_dir, exist_ok=True)
+    path = os.path.join(fixtures_dir, 'manifest.json')
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(path + '.tmp', path)
+
+def write_fixture(fixtures_dir, folder, url, content):
+    os.makedirs(os.path.join(fixtures_dir, folder), exist_ok=True)
+    name = url_key(url)
+    with open(os.path.join(fixtures_dir, folder, name), 'wb') as f:
+        f.write(content if isinstance(content, bytes) else content.encode('utf-8'))
+    return name
+
+def read_fixture(fixtures_dir, folder, name):
+    with open(os.path.join(fixtures_dir, folder, name), 'rb') as f:
+        return f.read()
+
+"""
+    The following section is the record mode
+"""
+@contextmanager
+def recording(fixtures_dir):
+    """
+        Save every HTTP response of the requests-based paths (Elite Prospects pages, NHL JSON) while active. The HTTP
+        cache is turned off so every page is fetched in full, a cached page would not be recorded and a revalidated
+        one would be recorded as an empty 304
+        Parameters:
+            fixtures_dir (str): Folder the fixtures are written to
+    """
+    manifest = load_manifest(fixtures_dir)
+    lock = threading.Lock()
+    originals = (ep.limited_get, nhl_scraper.limited_get, ep.response_cache)
+
+    def recorder(original_get):
+        def recording_get(url, headers=None, **kwargs):
+            response = original_get(url, headers=headers, **kwargs)
+            with lock:
+                manifest['http'][url] = {
+                    'file': write_fixture(fixtures_dir, 'http', url, response.content),
+                    'status_code': response.status_code,
+                    'content_type': response.headers.get('Content-Type'),
+                }
+            return response
+        return recording_get
+
+    ep.limited_get = recorder(originals[0])
+    nhl_scraper.limited_get = recorder(originals[1])
+    ep.response_cache = None
+    try:
+        yield manifest
+    finally:
+        ep.limited_get, nhl_scraper.limited_get, ep.response_cache = originals
+        save_manifest(fixtures_dir, manifest)
+
+class RecordingDriver:
+    """
+        Wraps a live driver and records the rendered source and the script results of every page it visits.
+        A page is saved when the driver leaves it, on save() and on quit().
+    """
+    def __init__(self, driver, fixtures_dir):
+        self._driver = driver
+        self._fixtures_dir = fixtures_dir
+        self._manifest = load_manifest(fixtures_dir)
+        self._url = None
+
+    def __getattr__(self, name):
+        return getattr(self._driver, name)
+
+    def _page(self):
+        return self._manifest['pages'].setdefault(self._url, {'file': None, 'title': None, 'scripts': {}})
+
+    def save(self):
+        if self._url is None:
+            return
+        page = self._page()
+        page['file'] = write_fixture(self._fixtures_dir, 'pages', self._url, self._driver.page_source)
+        page['title'] = self._driver.title
+        save_manifest(self._fixtures_dir, self._manifest)
+
+    def get(self, url):
+        self.save()
+        self._driver.get(url)
+        self._url = url
+
+    def execute_script(self, script, *args):
+        result = self._driver.execute_script(script, *args)
+        # Only scripts without element arguments return data worth replaying
+        if self._url is not None and not args:
+            self._page()['scripts'][script_key(script)] = result
+        return result
+
+    def quit(self):
+        self.save()
+        self._driver.quit()
+
+def record_fixtures(fixtures_dir, rosters=(), players_metadata=None, teams=()):
+    """
+        Run the scraper entry points live and record everything they fetch and render
+        Parameters:
+            fixtures_dir (str): Folder the fixtures are written to
+            rosters (list): (league, season) pairs for get_season_roster
+            players_metadata (pd.DataFrame): Players for get_player_facts_with_reusable_driver
+            teams (list): (team, season) pairs for get_player_by_team_with_reusable_driver
+    """
+    with recording(fixtures_dir):
+        for league, season in rosters:
+            ep.get_season_roster(league, season)
+
+    if players_metadata is None and not teams:
+        return
+
+    driver = RecordingDriver(ep.create_driver(), fixtures_dir)
+    wait = WebDriverWait(driver, 15)
+    try:
+        if players_metadata is not None:
+            for _, player_metadata in players_metadata.iterrows():
+                ep.get_player_facts_with_reusable_driver(player_metadata, driver, wait)
+        for team, season in teams:
+            nhl_scraper.get_player_by_team_with_reusable_driver(team, season, driver, wait)
+    finally:
+        driver.quit()
+
+"""
+    The following section is the replay mode
+"""
+class _FixtureHandler(BaseHTTPRequestHandler):
+    # Serves /<quoted url> from the manifest of the server
+    def do_GET(self):
+        url = unquote(self.path[1:])
+        # Requests made through base_url=server URL, e.g. fetch_player_landing, carry the API path as they are
+        http = self.server.manifest['http']
+        entry = http.get(url) or http.get(nhl_scraper.api_base_url + self.path)
+        if entry is None:
+            self.send_error(404, f"No fixture for {url}")
+            return
+        body = read_fixture(self.server.fixtures_dir, 'http', entry['file'])
+        self.send_response(entry['status_code'])
+        if entry.get('content_type'):
+            self.send_header('Content-Type', entry['content_type'])
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def serve_fixtures(fixtures_dir):
+    """
+        Start a local server answering the recorded HTTP responses
+        Returns:
+            server (ThreadingHTTPServer): Running server, call shutdown() when done
+            base_url (str): URL of the server, a recorded url is served at base_url + '/' + quote(url)
+    """
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _FixtureHandler)
+    server.manifest = load_manifest(fixtures_dir)
+    server.fixtures_dir = fixtures_dir
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+@contextmanager
+def replaying(fixtures_dir):
+    """
+        Answer the scrapers' HTTP requests from the fixtures through a local server while active. The rate limiter
+        is bypassed and the HTTP cache is replaced with an empty one so every request reaches the server.
+    """
+    server, base_url = serve_fixtures(fixtures_dir)
+    session = requests.Session()
+
+    def replay_get(url, headers=None, **kwargs):
+        start = time.perf_counter()
+        try:
+            return session.get(f"{base_url}/{quote(url, safe='')}", headers=headers, timeout=30)
+        finally:
+            waits.record_timing('http_get', time.perf_counter() - start)
+
+    originals = (ep.limited_get, nhl_scraper.limited_get, rate_limiter.acquire, ep.response_cache)
+    replay_cache = HttpCache(os.path.join(fixtures_dir, '.replay_cache'), ttl=0)
+    ep.limited_get = nhl_scraper.limited_get = replay_get
+    rate_limiter.acquire = lambda url: None
+    ep.response_cache = replay_cache
+    try:
+        yield base_url
+    finally:
+        ep.limited_get, nhl_scraper.limited_get, rate_limiter.acquire, ep.response_cache = originals
+        replay_cache.clear()
+        server.shutdown()
+        session.close()
+
+class FakeElement:
+    """
+        Element of a FakeDriver page, backed by BeautifulSoup
+    """
+    def __init__(self, tag):
+        self._tag = tag
+
+    @property
+    def text(self):
+        return self._tag.get_text(' ', strip=True)
+
+    def get_attribute(self, name):
+        if name == 'outerHTML':
+            return str(self._tag)
+        value = self._tag.get(name)
+        return ' '.join(value) if isinstance(value, list) else value
+
+    def is_displayed(self):
+        return True
+
+    def is_enabled(self):
+        return True
+
+    def click(self):
+        pass
+
+    def send_keys(self, *keys):
+        pass
+
+    def find_element(self, by, value):
+        return _find_elements(self._tag, by, value, first=True)
+
+    def find_elements(self, by, value):
+        return _find_elements(self._tag, by, value)
+
+def _find_elements(soup, by, value, first=False):
+    if by == By.ID:
+        tags = soup.find_all(id=value)
+    elif by == By.CLASS_NAME:
+        tags = soup.select('.' + value)
+    elif by == By.TAG_NAME:
+        tags = soup.find_all(value)
+    elif by == By.CSS_SELECTOR:
+        tags = soup.select(value)
+    elif by == By.XPATH:
+        # XPath runs on an lxml tree of the same markup, matches are mapped back by their outer HTML
+        root = lxml_html.fromstring(str(soup))
+        matches = {lxml_html.tostring(elem, encoding='unicode', with_tail=False) for elem in root.xpath(value)}
+        tags = [tag for tag in soup.find_all(True) if str(tag) in matches]
+    else:
+        raise ValueError(f"FakeDriver does not support {by}")
+
+    elements = [FakeElement(tag) for tag in tags]
+    if first:
+        if not elements:
+            raise NoSuchElementException(f"No element for {by}={value}")
+        return elements[0]
+    return elements
+
+class FakeDriver:
+    """
+        Offline stand-in for a Chrome driver: get() loads the recorded page source, execute_script() returns the
+        result recorded for the same page and script, find_element() searches the recorded page
+    """
+    def __init__(self, fixtures_dir):
+        self._fixtures_dir = fixtures_dir
+        self._manifest = load_manifest(fixtures_dir)
+        self._page = None
+        self._soup = BeautifulSoup('', 'html.parser')
+        self.current_url = None
+        self.page_source = ''
+        self.title = ''
+
+    def get(self, url):
+        page = self._manifest['pages'].get(url)
+        if page is None or page['file'] is None:
+            raise Exception(f"No recorded page for {url}")
+        self._page = page
+        self.current_url = url
+        self.page_source = read_fixture(self._fixtures_dir, 'pages', page['file']).decode('utf-8')
+        self._soup = BeautifulSoup(self.page_source, 'lxml')
+        self.title = page.get('title') or ''
+
+    def execute_script(self, script, *args):
+        if self._page is None:
+            return None
+        return self._page['scripts'].get(script_key(script))
+
+    def find_element(self, by, value):
+        return _find_elements(self._soup, by, value, first=True)
+
+    def find_elements(self, by, value):
+        return _find_elements(self._soup, by, value)
+
+    def quit(self):
+        pass
+
+"""
+    The following section is the offline benchmark
+"""
+def _run_entry_point(name, cases, func, num_pages):
+    waits.reset_timings()
+    failures = 0
+    start = time.perf_counter()
+    for case in cases:
+        try:
+            func(case)
+        except Exception as e:
+            failures += 1
+            print(f"[{name}] {case} failed: {e}")
+    seconds = time.perf_counter() - start
+
+    stages = waits.timing_summary()
+    print(f"{name}: {num_pages} pages in {seconds:.3f}s ({num_pages / seconds if seconds else 0:.1f} pages/sec)")
+    return {
+        'entry_point': name,
+        'pages': num_pages,
+        'failures': failures,
+        'seconds': seconds,
+        'pages_per_sec': num_pages / seconds if seconds else None,
+        'stages': stages.set_index('label')['mean_s'].to_dict(),
+    }
+
+def benchmark_offline(fixtures_dir, rosters=(), players_metadata=None, teams=(), repeat=3):
+    """
+        Measure pages/sec and per-stage latency of every scraper entry point against recorded fixtures
+        Parameters:
+            fixtures_dir (str): Folder written by record_fixtures
+            rosters (list): (league, season) pairs for get_season_roster
+            players_metadata (pd.DataFrame): Players for get_player_facts_with_reusable_driver
+            teams (list): (team, season) pairs for get_player_by_team_with_reusable_driver
+            repeat (int): Number of runs of every entry point, the fastest run is reported
+        Returns:
+            results (list): One dict per entry point with pages, seconds, pages_per_sec and the mean seconds of every
+                recorded stage (waits labels plus 'http_get')
+    """
+    driver = FakeDriver(fixtures_dir)
+    wait = WebDriverWait(driver, 1)
+    players = [] if players_metadata is None else [row for _, row in players_metadata.iterrows()]
+    manifest = load_manifest(fixtures_dir)
+
+    entry_points = []
+    if rosters:
+        # Count the roster pages that were actually recorded for these league-seasons
+        num_pages = sum(1 for url in manifest['http'] if '/stats/' in url and any(
+            f'/league/{league}/stats/{season}/' in url for league, season in rosters))
+        entry_points.append(('get_season_roster', rosters, lambda case: ep.get_season_roster(*case), num_pages))
+    if players:
+        entry_points.append(('get_player_facts_with_reusable_driver', players,
+                             lambda case: ep.get_player_facts_with_reusable_driver(case, driver, wait), len(players)))
+    if teams:
+        entry_points.append(('get_player_by_team_with_reusable_driver', teams,
+                             lambda case: nhl_scraper.get_player_by_team_with_reusable_driver(*case, driver, wait),
+                             len(teams)))
+
+    results = []
+    with replaying(fixtures_dir):
+        for name, cases, func, num_pages in entry_points:
+            runs = [_run_entry_point(name, cases, func, num_pages) for _ in range(repeat)]
+            results.append(min(runs, key=lambda run: run['seconds']))
+
+    print(json.dumps(results, indent=1, default=str))
+    return results
+
+"""
+    The following section is the comparison of the stats backends
+"""
+def typed_stats(df):
+    """
+        Career stats as read back from a stats file, so both backends are compared the way they are stored
+    """
+    df = pd.read_csv(io.StringIO(df.to_csv(index=False)))
+    df = apply_schema(df, CAREER_TABLE_SCHEMA)
+    return apply_schema(df, OFFICIAL_STATS_SCHEMA, ('', '_regular', '_playoffs'))
+
+def record_stats_fixtures(fixtures_dir, players_metadata):
+    """
+        Record the landing JSON of every player and the career stats the browser path scrapes from the same player's
+        page, run live one right after the other
+        Parameters:
+            fixtures_dir (str): Folder the fixtures are written to
+            players_metadata (pd.DataFrame): Rows with 'player_name' and 'player_link_official'
+    """
+    with recording(fixtures_dir):
+        for _, player_metadata in players_metadata.iterrows():
+            nhl_scraper.fetch_player_landing(nhl_scraper.get_player_id(player_metadata['player_link_official']))
+
+    manifest = load_manifest(fixtures_dir)
+    os.makedirs(os.path.join(fixtures_dir, 'stats'), exist_ok=True)
+    driver = ep.create_driver()
+    wait = WebDriverWait(driver, 15)
+    stats_backend = nhl_scraper.stats_backend
+    nhl_scraper.stats_backend = 'browser'
+    try:
+        for _, player_metadata in players_metadata.iterrows():
+            player_id = nhl_scraper.get_player_id(player_metadata['player_link_official'])
+            df = nhl_scraper.get_player_stats_with_reusable_driver(player_metadata, driver, wait)
+            if df is None:
+                print(f"No career stats for {player_metadata['player_name']}")
+                continue
+            name = f'{player_id}.csv'
+            df.to_csv(os.path.join(fixtures_dir, 'stats', name), index=False, encoding='utf-8-sig')
+            manifest['stats'][player_id] = {
+                'file': name,
+                'player_name': player_metadata['player_name'],
+                'player_link_official': player_metadata['player_link_official'],
+            }
+    finally:
+        nhl_scraper.stats_backend = stats_backend
+        driver.quit()
+        save_manifest(fixtures_dir, manifest)
+
+def compare_stats_backends(fixtures_dir):
+    """
+        Run get_player_stats_json against a local stub serving the recorded landing JSON and compare its output with
+        the career stats the browser path recorded for the same player
+        Parameters:
+            fixtures_dir (str): Folder written by record_stats_fixtures
+        Returns:
+            df (pd.DataFrame): player_name, rows of both backends, whether they are equal and the first difference
+    """
+    manifest = load_manifest(fixtures_dir)
+    if not manifest['stats']:
+        raise ValueError(f"No recorded career stats in {fixtures_dir}, run record_stats_fixtures first")
+
+    server, base_url = serve_fixtures(fixtures_dir)
+    acquire = rate_limiter.acquire
+    rate_limiter.acquire = lambda url: None
+    results = []
+    try:
+        for player_id, entry in manifest['stats'].items():
+            player_metadata = pd.Series(
+                {'player_name': entry['player_name'], 'player_link_official': entry['player_link_official']})
+            df_browser = typed_stats(pd.read_csv(os.path.join(fixtures_dir, 'stats', entry['file']), encoding='utf-8-sig'))
+            df_json = nhl_scraper.get_player_stats_json(player_metadata, base_url=base_url)
+            df_json = None if df_json is None else typed_stats(df_json)
+
+            difference = None
+            try:
+                if df_json is None:
+                    raise AssertionError("The JSON backend returned no stats")
+                pd.testing.assert_frame_equal(df_json, df_browser)
+            except AssertionError as e:
+                difference = str(e).strip()
+            results.append({
+                'player_name': entry['player_name'],
+                'rows_json': 0 if df_json is None else len(df_json),
+                'rows_browser': len(df_browser),
+                'equal': difference is None,
+                'difference': difference,
+            })
+    finally:
+        rate_limiter.acquire = acquire
+        server.shutdown()
+
+    df = pd.DataFrame(results)
+    print(f"{int(df['equal'].sum())} of {len(df)} players have the same stats from the JSON and the browser")
+    for row in df[~df['equal']].itertuples():
+        print(f"{row.player_name}: {row.difference}")
+    return df
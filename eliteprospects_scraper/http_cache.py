@@ -0,0 +1,233 @@
+"""
+    Persistent on-disk HTTP response cache for the requests-based scraping paths
+    1. HttpCache(cache_dir, ttl, max_bytes): Content-addressed response cache keyed by URL
+    2. HttpCache.get(url, fetch): Returns a cached response, revalidating or fetching it when needed
+    3. HttpCache.stats(): Returns the hit / miss / revalidation / eviction counters
+
+    Layout of cache_dir:
+        index.sqlite3       One row per URL (validators, fetch time, last access, body hash)
+        bodies/<sha256>     Response bodies, stored once per distinct content
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+
+# Helper class returned for every cached request - mirrors the parts of requests.Response we use
+class CachedResponse:
+    def __init__(self, url, status_code, headers, content, from_cache):
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.from_cache = from_cache
+
+    @property
+    def text(self):
+        content_type = self.headers.get('Content-Type', '')
+        encoding = 'utf-8'
+        if 'charset=' in content_type:
+            encoding = content_type.split('charset=')[-1].split(';')[0].strip()
+        return self.content.decode(encoding, errors='replace')
+
+
+class HttpCache:
+    """
+        Content-addressed on-disk cache for GET responses
+        Parameters:
+            cache_dir (str): Directory holding the index and the response bodies
+            ttl (float): Seconds a stored response is served without contacting the server
+            max_bytes (int): Upper bound of the stored bodies, least recently used entries are evicted first
+    """
+    def __init__(self, cache_dir, ttl=6 * 60 * 60, max_bytes=512 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.counters = {'hits': 0, 'misses': 0, 'revalidated': 0, 'stored': 0, 'evicted': 0}
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self):
+        # The cache directory is only created on first use
+        if self._conn is None:
+            os.makedirs(os.path.join(self.cache_dir, 'bodies'), exist_ok=True)
+            self._conn = sqlite3.connect(os.path.join(self.cache_dir, 'index.sqlite3'), check_same_thread=False)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS entries (
+                    url_key TEXT PRIMARY KEY,
+                    url TEXT NOT NULL,
+                    body_hash TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    status_code INTEGER NOT NULL,
+                    content_type TEXT,
+                    etag TEXT,
+                    last_modified TEXT,
+                    fetched_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_last_access ON entries (last_access)")
+            self._conn.commit()
+        return self._conn
+
+    def _body_path(self, body_hash):
+        return os.path.join(self.cache_dir, 'bodies', body_hash)
+
+    def _count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    def _lookup(self, url):
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT body_hash, status_code, content_type, etag, last_modified, fetched_at "
+                "FROM entries WHERE url_key = ?", (url_key(url),)
+            ).fetchone()
+        if row is None:
+            return None
+        keys = ['body_hash', 'status_code', 'content_type', 'etag', 'last_modified', 'fetched_at']
+        entry = dict(zip(keys, row))
+
+        # The index may outlive a body that was removed by hand
+        if not os.path.exists(self._body_path(entry['body_hash'])):
+            return None
+        return entry
+
+    def _response_from_entry(self, url, entry):
+        with open(self._body_path(entry['body_hash']), 'rb') as f:
+            content = f.read()
+        headers = {'Content-Type': entry['content_type'] or ''}
+        if entry['etag']:
+            headers['ETag'] = entry['etag']
+        if entry['last_modified']:
+            headers['Last-Modified'] = entry['last_modified']
+        return CachedResponse(url, entry['status_code'], headers, content, from_cache=True)
+
+    def _touch(self, url, refreshed):
+        now = time.time()
+        with self._lock:
+            if refreshed:
+                self._connect().execute(
+                    "UPDATE entries SET fetched_at = ?, last_access = ? WHERE url_key = ?", (now, now, url_key(url))
+                )
+            else:
+                self._connect().execute("UPDATE entries SET last_access = ? WHERE url_key = ?", (now, url_key(url)))
+            self._conn.commit()
+
+    def _store(self, url, response):
+        content = response.content
+        body_hash = hashlib.sha256(content).hexdigest()
+        body_path = self._body_path(body_hash)
+
+        # Identical bodies are stored once, write to a temporary file first so readers never see a partial body
+        if not os.path.exists(body_path):
+            tmp_path = f'{body_path}.{os.getpid()}.{threading.get_ident()}.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(content)
+            os.replace(tmp_path, body_path)
+
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            old = conn.execute("SELECT body_hash FROM entries WHERE url_key = ?", (url_key(url),)).fetchone()
+            conn.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (url_key(url), url, body_hash, len(content), response.status_code,
+                 response.headers.get('Content-Type'), response.headers.get('ETag'),
+                 response.headers.get('Last-Modified'), now, now)
+            )
+            conn.commit()
+            self.counters['stored'] += 1
+            if old is not None and old[0] != body_hash:
+                self._remove_body_if_unused(old[0])
+            self._evict()
+
+    def _remove_body_if_unused(self, body_hash):
+        # Must be called with the lock held
+        in_use = self._conn.execute("SELECT 1 FROM entries WHERE body_hash = ? LIMIT 1", (body_hash,)).fetchone()
+        if in_use is None and os.path.exists(self._body_path(body_hash)):
+            os.remove(self._body_path(body_hash))
+
+    def _evict(self):
+        # Must be called with the lock held - drop the least recently used entries until under max_bytes
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, body_hash, size in self._conn.execute(
+                "SELECT url_key, body_hash, size FROM entries ORDER BY last_access ASC").fetchall():
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM entries WHERE url_key = ?", (key,))
+            self._remove_body_if_unused(body_hash)
+            total -= size
+            self.counters['evicted'] += 1
+        self._conn.commit()
+
+    def get(self, url, fetch):
+        """
+            Get a response for url from the cache, revalidating or fetching it when needed
+            Parameters:
+                url (str): URL to get
+                fetch (callable): fetch(url, headers) performing the network request, returns a requests.Response
+            Returns:
+                response (CachedResponse or requests.Response): Response of the page
+        """
+        entry = self._lookup(url)
+
+        # Fresh entry - served without contacting the server
+        if entry is not None and time.time() - entry['fetched_at'] < self.ttl:
+            self._touch(url, refreshed=False)
+            self._count('hits')
+            return self._response_from_entry(url, entry)
+
+        # Stale entry - ask the server whether it changed
+        headers = {}
+        if entry is not None:
+            if entry['etag']:
+                headers['If-None-Match'] = entry['etag']
+            if entry['last_modified']:
+                headers['If-Modified-Since'] = entry['last_modified']
+
+        response = fetch(url, headers)
+
+        if entry is not None and response.status_code == 304:
+            self._touch(url, refreshed=True)
+            self._count('revalidated')
+            return self._response_from_entry(url, entry)
+
+        self._count('misses')
+        if response.status_code == 200:
+            self._store(url, response)
+        return response
+
+    def stats(self):
+        """
+            Get the cache counters together with the current size of the cache
+            Returns:
+                stats (dict): hits, misses, revalidated, stored, evicted, entries and bytes
+        """
+        with self._lock:
+            entries, size = self._connect().execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+            ).fetchone()
+        return {**self.counters, 'entries': entries, 'bytes': size}
+
+    def clear(self):
+        """
+            Remove every cached response
+        """
+        with self._lock:
+            conn = self._connect()
+            for (body_hash,) in conn.execute("SELECT DISTINCT body_hash FROM entries").fetchall():
+                if os.path.exists(self._body_path(body_hash)):
+                    os.remove(self._body_path(body_hash))
+            conn.execute("DELETE FROM entries")
+            conn.commit()
+
+
+# Helper function to build the index key of a url
+def url_key(url):
+    return hashlib.sha256(url.encode('utf-8')).hexdigest()
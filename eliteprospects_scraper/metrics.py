@@ -0,0 +1,147 @@
+"""
+    Prometheus metrics of the scrapers
+    1. init_metrics(): Switches the metrics to multiprocess mode, called by the pool and batch entry points
+    2. start_metrics_server(port): Exposes the metrics on http://localhost:{port}/metrics
+    3. reap_dead_processes(): Drops the live gauges of the worker processes that exited
+    4. Counters: PAGES_FETCHED, PLAYERS_SUCCEEDED, PLAYERS_FAILED, FACTS_PATHS
+    5. Histograms: NAVIGATION_SECONDS, WAIT_SECONDS, PARSE_SECONDS, WRITE_SECONDS
+    6. Gauges: LIVE_BROWSERS, MEMORY_BYTES
+
+    Importing this module has no side effect, the metrics are plain in-process metrics until init_metrics() is
+    called. init_metrics() sets PROMETHEUS_MULTIPROC_DIR to a fresh temporary folder unless it is already set, then
+    every process writes its samples to that folder and the endpoint merges them, so the browsers, waits and parses
+    of the driver_pool and roster_scheduler workers are exported by the parent. prometheus_client reads the variable
+    when it is imported, so the parent switches its already imported metrics over, and the spawned workers inherit
+    the variable and start in multiprocess mode. Call it before the first worker starts and start the server in the
+    parent.
+"""
+
+import atexit
+import glob
+import os
+import re
+import shutil
+import tempfile
+
+import psutil
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, multiprocess, start_http_server, values
+from prometheus_client.core import GaugeMetricFamily
+
+# Folder of the multiprocess samples, set by init_metrics() in the parent, inherited by the workers
+MULTIPROC_DIR = os.environ.get('PROMETHEUS_MULTIPROC_DIR') or None
+
+# Buckets from 10 ms to 2 minutes, page loads and waits spread over that whole range
+SECONDS_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 15, 30, 60, 120)
+
+"""
+    The following section is the metrics
+"""
+PAGES_FETCHED = Counter(
+    'scraper_pages_fetched_total', 'Pages fetched, by site and method (http or browser)', ['site', 'method']
+)
+PLAYERS_SUCCEEDED = Counter(
+    'scraper_players_succeeded_total', 'Players scraped successfully, by scraper', ['scraper']
+)
+PLAYERS_FAILED = Counter(
+    'scraper_players_failed_total', 'Players that failed to scrape, by scraper', ['scraper']
+)
+FACTS_PATHS = Counter(
+    'scraper_facts_paths_total', 'Players whose facts came from each path of the fallback (http or selenium)', ['path']
+)
+
+NAVIGATION_SECONDS = Histogram(
+    'scraper_navigation_seconds', 'Time to fetch or navigate to a page, by site and method', ['site', 'method'],
+    buckets=SECONDS_BUCKETS
+)
+WAIT_SECONDS = Histogram(
+    'scraper_wait_seconds', 'Time spent in waits, by waits label', ['label'], buckets=SECONDS_BUCKETS
+)
+PARSE_SECONDS = Histogram(
+    'scraper_parse_seconds', 'Time to parse a page, table or JSON, by parser', ['parser'], buckets=SECONDS_BUCKETS
+)
+WRITE_SECONDS = Histogram(
+    'scraper_write_seconds', 'Time to write results to disk, by writer', ['writer'], buckets=SECONDS_BUCKETS
+)
+
+# Summed over the processes still alive, a worker killed with its driver open stops counting once reaped
+LIVE_BROWSERS = Gauge(
+    'scraper_live_browsers', 'Chrome drivers created and not quit yet', multiprocess_mode='livesum'
+)
+
+"""
+    The following section is helper functions
+"""
+def process_tree_memory():
+    """
+        Resident memory in bytes of this process and all its child processes (chromedriver, Chrome)
+    """
+    process = psutil.Process()
+    total = process.memory_info().rss
+    for child in process.children(recursive=True):
+        try:
+            total += child.memory_info().rss
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            continue
+    return total
+
+class MemoryCollector:
+    """
+        Resident memory of the serving process tree, the workers and their browsers are its children. Sampled every
+        time the endpoint is scraped, multiprocess mode has no callback gauges
+    """
+    def collect(self):
+        yield GaugeMetricFamily(
+            'scraper_memory_bytes', 'Resident memory of the scraper process and its browsers', value=process_tree_memory()
+        )
+
+MEMORY_BYTES = MemoryCollector()
+
+def init_metrics():
+    """
+        Switch the metrics to prometheus_client multiprocess mode, creating the samples folder on the first call.
+        Safe to call several times, the later calls keep the same folder
+        Returns:
+            multiproc_dir (str): Folder of the samples
+    """
+    global MULTIPROC_DIR
+    if not os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        os.environ['PROMETHEUS_MULTIPROC_DIR'] = tempfile.mkdtemp(prefix='scraper_metrics_')
+        atexit.register(shutil.rmtree, os.environ['PROMETHEUS_MULTIPROC_DIR'], ignore_errors=True)
+    MULTIPROC_DIR = os.environ['PROMETHEUS_MULTIPROC_DIR']
+
+    if values.ValueClass is values.MutexValue:
+        # prometheus_client was imported before the variable was set: the label values used from now on write to the
+        # folder, and the unlabelled gauge, whose value was created with the metric, is moved over with its value
+        values.ValueClass = values.get_value_class()
+        live_browsers = LIVE_BROWSERS._value.get()
+        LIVE_BROWSERS._metric_init()
+        LIVE_BROWSERS.set(live_browsers)
+    return MULTIPROC_DIR
+
+def reap_dead_processes():
+    """
+        Drop the live gauge files of the processes that exited, e.g. pool workers terminated before quitting their
+        driver. Their counters and histograms are kept
+    """
+    if MULTIPROC_DIR is None:
+        return
+    for path in glob.glob(os.path.join(MULTIPROC_DIR, 'gauge_live*_*.db')):
+        pid = int(re.search(r'_(\d+)\.db$', path).group(1))
+        if not psutil.pid_exists(pid):
+            multiprocess.mark_process_dead(pid, MULTIPROC_DIR)
+
+"""
+    The following section is the endpoint
+"""
+def start_metrics_server(port=8000):
+    """
+        Expose the metrics of this process and its workers on http://localhost:{port}/metrics for Prometheus
+        (or a browser)
+        Parameters:
+            port (int): Local port of the endpoint
+    """
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry, path=init_metrics())
+    registry.register(MEMORY_BYTES)
+    start_http_server(port, addr='127.0.0.1', registry=registry)
+    print(f"Serving metrics on http://127.0.0.1:{port}/metrics")
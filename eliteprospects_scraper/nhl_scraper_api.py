@@ -2,16 +2,12 @@
     API for Official NHL Scraper
     1. get_player_by_team(team, season): Allows you to get all players from a specific team and season
     2. get_player_stats(player_metadata): Allows you to get all information from a player's webpage
+    3. get_player_stats_json(player_metadata): Same career stats from the JSON the player page loads, without a browser
 """
-from io import StringIO
-
 import numpy as np
 import pandas as pd
-from bs4 import BeautifulSoup
 import requests
-import time
 import re   #　Regular expressions
-import random
 
 # Used to grab the part where JavaScript is used to load the data
 from selenium.common import ElementClickInterceptedException
@@ -19,7 +15,14 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as ec
-import undetected_chromedriver as uc
+
+from browser import create_driver
+from rate_limiter import limited_get, limited_navigate
+from waits import timed_wait, wait_for_table_update, element_html, polite_pause
+from table_parsers import read_html_table
+from metrics import PARSE_SECONDS
+from tracing import span
+from schemas import apply_schema, OFFICIAL_ROSTER_SCHEMA, CAREER_TABLE_SCHEMA, OFFICIAL_STATS_SCHEMA
 
 """
     The following section is global variables
@@ -34,6 +37,55 @@ valid_teams = [
         "goldenknights", "utah"
     ]
 
+# Locator of the career stats table on a player's page
+CAREER_TABLE_LOCATOR = (By.ID, "career-stats-table")
+
+# Backend of get_player_stats_with_reusable_driver: 'json' tries get_player_stats_json first, 'browser' only clicks
+stats_backend = 'json'
+
+# Base URL of the JSON API the official player pages load their data from
+api_base_url = "https://api-web.nhle.com/v1"
+
+# gameTypeId of the seasonTotals entries
+REGULAR_SEASON_GAME_TYPE = 2
+PLAYOFFS_GAME_TYPE = 3
+
+# Integer columns of the career stats table
+COUNT_COLUMNS = ['GP', 'G', 'A', 'P', '+/-', 'PIM', 'PPG', 'PPP', 'SHG', 'SHP', 'GWG', 'OTG', 'S']
+
+# Locator of a roster row that already holds a player link
+ROSTER_ROW_LOCATOR = (By.CSS_SELECTOR, "tbody.rt-tbody > tr.rt-tr a[href*='/player/']")
+
+# Reads every roster row in the page in one round trip. Rows without a player link are skipped,
+# player_image is null without a headshot and player_pos is null for goalies (no position span)
+ROSTER_ROWS_SCRIPT = """
+    const players = [];
+    for (const row of document.querySelectorAll("tbody.rt-tbody > tr.rt-tr")) {
+        const nameElem = row.querySelector("a[href*='/player/']");
+        if (!nameElem) continue;
+
+        let imageUrl = null;
+        const imgElem = row.querySelector(".headshot-container img");
+        if (imgElem) {
+            imageUrl = imgElem.src;
+        } else {
+            const svgElem = row.querySelector(".headshot-container image");
+            if (svgElem) {
+                imageUrl = svgElem.getAttribute("xlink:href") || svgElem.getAttribute("href");
+            }
+        }
+
+        const posElem = row.querySelector("td span[aria-label]");
+        players.push({
+            player_name: nameElem.innerText.trim(),
+            player_pos: posElem ? posElem.innerText.trim() : null,
+            player_link: nameElem.href,
+            player_image: imageUrl
+        });
+    }
+    return players;
+"""
+
 """
     The following section is helper functions
 """
@@ -72,6 +124,24 @@ def validate_season(season):
         return False
     return True
 
+def extract_roster_rows(driver):
+    """
+        Extract the name, position, link and headshot of every player on a loaded roster page with one script
+        Parameters:
+            driver (webdriver.Chrome): Driver with a roster page loaded
+        Returns:
+            players (list): One dict per player with player_name, player_pos, player_link and player_image
+    """
+    with PARSE_SECONDS.labels('roster_script').time():
+        players = driver.execute_script(ROSTER_ROWS_SCRIPT) or []
+    for player in players:
+        if player['player_image'] is None:
+            print(f"No image found for {player['player_name']}")
+        if player['player_pos'] is None:
+            player['player_pos'] = "G"
+            print(f"{player['player_name']} is a goalie.")
+    return players
+
 def merge_stats(df_regular, df_playoffs):
     """
         Helper function to merge regular season and postseason stats
@@ -132,8 +202,8 @@ def merge_stats(df_regular, df_playoffs):
     # Merge the dataframes on identifiers
     df_merged = df_regular.merge(df_playoffs, on=['player_name_official', 'season', 'team', 'league'], how='left')
 
-    # Replace NaN with None, and convert all columns to object dtype
-    df_merged = convert_NaN_to_None(df_merged)
+    # Nullable integer and float stats, missing stats are pd.NA instead of making every column an object
+    df_merged = apply_schema(df_merged, OFFICIAL_STATS_SCHEMA, ('', '_regular', '_playoffs'))
 
     return df_merged
 
@@ -153,41 +223,42 @@ def scrape_all_leagues_regular_season_stats(player_name, driver, wait):
     try:
         print(f"Scraping 'All Leagues' regular season stats for {player_name}")
 
-        league_dropdown = wait.until(ec.element_to_be_clickable(
-            (By.XPATH, "//input[@id='league-select']/following-sibling::div//button")
-        ))
+        with span('dropdown_select', tab='all_leagues_regular'):
+            league_dropdown = timed_wait(wait, ec.element_to_be_clickable(
+                (By.XPATH, "//input[@id='league-select']/following-sibling::div//button")
+            ), 'league_dropdown')
 
-        print("Successfully located dropdown button")
+            print("Successfully located dropdown button")
 
-        driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", league_dropdown)
-        driver.execute_script("arguments[0].click();", league_dropdown)
+            driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", league_dropdown)
+            driver.execute_script("arguments[0].click();", league_dropdown)
 
-        print("Successfully clicked dropdown button")
+            print("Successfully clicked dropdown button")
 
-        time.sleep(1)
+            all_leagues_option = timed_wait(wait, ec.element_to_be_clickable(
+                (By.XPATH, "//li[normalize-space()='All Leagues']")
+            ), 'league_option')
 
-        all_leagues_option = wait.until(ec.element_to_be_clickable(
-            (By.XPATH, "//li[normalize-space()='All Leagues']")
-        ))
+            print("Successfully located all leagues option")
 
-        print("Successfully located all leagues option")
+            old_table = element_html(driver, CAREER_TABLE_LOCATOR)
+            all_leagues_option.click()
 
-        all_leagues_option.click()
+            print("Successfully clicked all leagues option")
 
-        print("Successfully clicked all leagues option")
+            # Wait until the table shows all leagues
+            wait_for_table_update(driver, CAREER_TABLE_LOCATOR, old_table, 'career_table')
 
-        time.sleep(2)
+        with span('table_parse'):
+            # Scrape only the table's HTML instead of the whole page source
+            table = element_html(driver, CAREER_TABLE_LOCATOR)
 
-        # Scrape the table
-        soup = BeautifulSoup(driver.page_source, "html.parser")
-        table = soup.find("table", id="career-stats-table")
+            if not table:
+                raise ValueError("No regular season stats tables found on page")
 
-        if not table:
-            raise ValueError("No regular season stats tables found on page")
-
-        # Convert table to dataframe
-        html_str = str(table)
-        df_regular = pd.read_html(StringIO(html_str))[0]
+            # Convert table to dataframe
+            with PARSE_SECONDS.labels('career_table').time():
+                df_regular = read_html_table(table)
 
         # Add the player name to the dataframe
         df_regular.insert(0, "Player", player_name)
@@ -215,36 +286,39 @@ def scrape_all_leagues_playoff_stats(player_name, driver, wait):
     try:
         print(f"Scraping 'playoff stats' for {player_name}")
 
-        stats_type_dropdown = wait.until(ec.element_to_be_clickable((
-            By.XPATH, "//input[@id='game-type-select']/following::button[1]"
-        )))
+        with span('dropdown_select', tab='all_leagues_playoffs'):
+            stats_type_dropdown = timed_wait(wait, ec.element_to_be_clickable((
+                By.XPATH, "//input[@id='game-type-select']/following::button[1]"
+            )), 'game_type_dropdown')
 
-        print("Successfully located game-type dropdown button")
+            print("Successfully located game-type dropdown button")
 
-        driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", stats_type_dropdown)
-        driver.execute_script("arguments[0].click();", stats_type_dropdown)
+            driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", stats_type_dropdown)
+            driver.execute_script("arguments[0].click();", stats_type_dropdown)
 
-        print("Successfully clicked game-type dropdown button")
+            print("Successfully clicked game-type dropdown button")
 
-        time.sleep(2)
+            # Select "Playoffs" from the dropdown
+            playoffs_option = timed_wait(wait, ec.element_to_be_clickable((
+                By.XPATH, "//li[normalize-space()='Playoffs']"
+            )), 'game_type_option')
+            old_table = element_html(driver, CAREER_TABLE_LOCATOR)
+            playoffs_option.click()
+            print("Successfully selected 'Playoffs' option")
 
-        # Select "Playoffs" from the dropdown
-        playoffs_option = wait.until(ec.element_to_be_clickable((
-            By.XPATH, "//li[normalize-space()='Playoffs']"
-        )))
-        playoffs_option.click()
-        print("Successfully selected 'Playoffs' option")
+            # Wait until the table shows the playoffs
+            wait_for_table_update(driver, CAREER_TABLE_LOCATOR, old_table, 'career_table')
 
-        # Scrape the table
-        soup = BeautifulSoup(driver.page_source, "html.parser")
-        table = soup.find("table", id="career-stats-table")
+        with span('table_parse'):
+            # Scrape only the table's HTML instead of the whole page source
+            table = element_html(driver, CAREER_TABLE_LOCATOR)
 
-        if not table:
-            raise ValueError("No playoff stats tables found on page")
+            if not table:
+                raise ValueError("No playoff stats tables found on page")
 
-        # Convert table to dataframe
-        html_str = str(table)
-        df_playoffs = pd.read_html(StringIO(html_str))[0]
+            # Convert table to dataframe
+            with PARSE_SECONDS.labels('career_table').time():
+                df_playoffs = read_html_table(table)
 
         # Add the player name to the dataframe
         df_playoffs.insert(0, "Player", player_name)
@@ -272,63 +346,66 @@ def scrape_nhl_playoffs_stats(player_name, driver, wait):
     try:
         print(f"Scraping 'playoff stats' for {player_name} in 'NHL' Tab")
 
-        # Locate the league dropdown
-        league_dropdown = wait.until(ec.element_to_be_clickable(
-            (By.XPATH, "//input[@id='league-select']/following-sibling::div//button")
-        ))
+        with span('dropdown_select', tab='nhl_playoffs'):
+            # Locate the league dropdown
+            league_dropdown = timed_wait(wait, ec.element_to_be_clickable(
+                (By.XPATH, "//input[@id='league-select']/following-sibling::div//button")
+            ), 'league_dropdown')
 
-        print("Successfully located dropdown button")
+            print("Successfully located dropdown button")
 
-        # Click the dropdown
-        driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", league_dropdown)
-        driver.execute_script("arguments[0].click();", league_dropdown)
+            # Click the dropdown
+            driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", league_dropdown)
+            driver.execute_script("arguments[0].click();", league_dropdown)
 
-        print("Successfully clicked dropdown button")
+            print("Successfully clicked dropdown button")
 
-        time.sleep(1)
+            nhl_option = timed_wait(wait, ec.element_to_be_clickable(
+                (By.XPATH, "//li[normalize-space()='NHL']")
+            ), 'league_option')
 
-        nhl_option = wait.until(ec.element_to_be_clickable(
-            (By.XPATH, "//li[normalize-space()='NHL']")
-        ))
+            print("Successfully located NHL option")
 
-        print("Successfully located NHL option")
+            old_table = element_html(driver, CAREER_TABLE_LOCATOR)
+            nhl_option.click()
 
-        nhl_option.click()
+            print("Successfully clicked NHL option")
 
-        print("Successfully clicked NHL option")
+            # Wait until the table shows the NHL only
+            wait_for_table_update(driver, CAREER_TABLE_LOCATOR, old_table, 'career_table')
 
-        time.sleep(2)
+            # Locate the stats type dropdown
+            stats_type_dropdown = timed_wait(wait, ec.element_to_be_clickable((
+                By.XPATH, "//input[@id='game-type-select']/following::button[1]"
+            )), 'game_type_dropdown')
+            print("Successfully located game-type dropdown button")
 
-        # Locate the stats type dropdown
-        stats_type_dropdown = wait.until(ec.element_to_be_clickable((
-            By.XPATH, "//input[@id='game-type-select']/following::button[1]"
-        )))
-        print("Successfully located game-type dropdown button")
+            # Click the dropdown
+            driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", stats_type_dropdown)
+            driver.execute_script("arguments[0].click();", stats_type_dropdown)
+            print("Successfully clicked game-type dropdown button")
 
-        # Click the dropdown
-        driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", stats_type_dropdown)
-        driver.execute_script("arguments[0].click();", stats_type_dropdown)
-        print("Successfully clicked game-type dropdown button")
-        time.sleep(1)
+            # Select "Playoffs" from the dropdown
+            playoffs_option = timed_wait(wait, ec.element_to_be_clickable((
+                By.XPATH, "//li[normalize-space()='Playoffs']"
+            )), 'game_type_option')
+            old_table = element_html(driver, CAREER_TABLE_LOCATOR)
+            playoffs_option.click()
+            print("Successfully selected 'Playoffs' option")
 
-        # Select "Playoffs" from the dropdown
-        playoffs_option = wait.until(ec.element_to_be_clickable((
-            By.XPATH, "//li[normalize-space()='Playoffs']"
-        )))
-        playoffs_option.click()
-        print("Successfully selected 'Playoffs' option")
-        time.sleep(2)
+            # Wait until the table shows the playoffs
+            wait_for_table_update(driver, CAREER_TABLE_LOCATOR, old_table, 'career_table')
 
-        # Scrape the table
-        soup = BeautifulSoup(driver.page_source, "html.parser")
-        table = soup.find("table", id="career-stats-table")
+        with span('table_parse'):
+            # Scrape only the table's HTML instead of the whole page source
+            table = element_html(driver, CAREER_TABLE_LOCATOR)
 
-        if not table:
-            raise ValueError("No playoff stats tables found on page")
+            if not table:
+                raise ValueError("No playoff stats tables found on page")
 
-        # Convert table to dataframe
-        html_str = str(table)
-        df_playoffs = pd.read_html(StringIO(html_str))[0]
+            # Convert table to dataframe
+            with PARSE_SECONDS.labels('career_table').time():
+                df_playoffs = read_html_table(table)
 
         # Add the player name to the dataframe
         df_playoffs.insert(0, "Player", player_name)
@@ -347,7 +424,127 @@ def scrape_nhl_playoffs_stats(player_name, driver, wait):
     except:
         raise Exception(f"Failed to scrape playoff stats for {player_name} in 'NHL' Tab")
 
+"""
+    The following section is the JSON data backend
+"""
+def get_player_id(player_link):
+    """
+        Get the numeric NHL player ID from an official player link, e.g. https://www.nhl.com/player/connor-mcdavid-8478402
+    """
+    match = re.search(r'(\d+)/?$', str(player_link))
+    if not match:
+        raise ValueError(f"No player ID in {player_link}")
+    return match.group(1)
+
+def format_season(season):
+    # 20152016 -> 2015-16, as shown in the career stats table
+    season = str(season)
+    return f"{season[:4]}-{season[6:]}"
+
+def format_pct(value):
+    # The API stores percentages as fractions, the table shows them with one decimal
+    return None if value is None else round(value * 100, 1)
+
+def season_totals_to_df(season_totals, player_name, game_type):
+    """
+        Convert the seasonTotals entries of one game type into the career stats table
+        Parameters:
+            season_totals (list): seasonTotals of the player landing JSON
+            player_name (str): Name of the player
+            game_type (int): REGULAR_SEASON_GAME_TYPE or PLAYOFFS_GAME_TYPE
+        Returns:
+            df (pd.DataFrame or None): Same columns as the career stats table, None if there are no rows
+    """
+    rows = []
+    for entry in sorted(season_totals, key=lambda entry: (entry.get('season', 0), entry.get('sequence', 0))):
+        if entry.get('gameTypeId') != game_type:
+            continue
+        rows.append({
+            'Player': player_name,
+            'Season': format_season(entry.get('season')),
+            'Team': (entry.get('teamName') or {}).get('default'),
+            'League': entry.get('leagueAbbrev'),
+            'GP': entry.get('gamesPlayed'),
+            'G': entry.get('goals'),
+            'A': entry.get('assists'),
+            'P': entry.get('points'),
+            '+/-': entry.get('plusMinus'),
+            'PIM': entry.get('pim'),
+            'PPG': entry.get('powerPlayGoals'),
+            'PPP': entry.get('powerPlayPoints'),
+            'SHG': entry.get('shorthandedGoals'),
+            'SHP': entry.get('shorthandedPoints'),
+            'TOI/G': entry.get('avgToi'),
+            'GWG': entry.get('gameWinningGoals'),
+            'OTG': entry.get('otGoals'),
+            'S': entry.get('shots'),
+            'S%': format_pct(entry.get('shootingPctg')),
+            'FO%': format_pct(entry.get('faceoffWinningPctg')),
+        })
+
+    if not rows:
+        return None
 
+    # Stats a league does not track are missing, like the "--" cells of the table. Counts stay integers
+    df = pd.DataFrame(rows)
+    df[COUNT_COLUMNS] = df[COUNT_COLUMNS].astype('Int64')
+    df[['S%', 'FO%']] = df[['S%', 'FO%']].astype(float)
+    return df
+
+def fetch_player_landing(player_id, base_url=None):
+    """
+        Fetch the landing JSON the official player page loads its data from
+        Parameters:
+            player_id (str): Numeric NHL player ID
+            base_url (str): Base URL of the API, defaults to api_base_url (point it at a local stub server to test)
+        Returns:
+            landing (dict): Parsed JSON
+    """
+    url = f"{base_url or api_base_url}/player/{player_id}/landing"
+    response = limited_get(url, headers={'Accept': 'application/json'})
+    response.raise_for_status()
+    return response.json()
+
+def landing_to_stats(landing, player_name):
+    """
+        Build the merged career stats of a player from their landing JSON
+        Parameters:
+            landing (dict): Landing JSON of the player
+            player_name (str): Name of the player
+        Returns:
+            df (pd.DataFrame or None): Same output as get_player_stats_with_reusable_driver
+    """
+    season_totals = landing.get('seasonTotals') or []
+    df_regular = season_totals_to_df(season_totals, player_name, REGULAR_SEASON_GAME_TYPE)
+    df_playoffs = season_totals_to_df(season_totals, player_name, PLAYOFFS_GAME_TYPE)
+
+    if df_regular is not None and df_playoffs is not None:
+        return merge_stats(df_regular, df_playoffs)
+    elif df_regular is not None:
+        print(f"No playoff stats found for {player_name}. Returning regular season stats only.")
+        return apply_schema(df_regular, CAREER_TABLE_SCHEMA)
+    elif df_playoffs is not None:
+        print(f"No regular season stats found for {player_name}. Returning playoff stats only.")
+        return apply_schema(df_playoffs, CAREER_TABLE_SCHEMA)
+    return None
+
+def get_player_stats_json(player_metadata, base_url=None):
+    """
+        Get a player's regular season and playoff career stats from the JSON the official player page loads,
+        one HTTP call per player instead of a browser session
+        Parameters:
+            player_metadata (pd.Series): Series with 'player_name' and 'player_link_official'
+            base_url (str): Base URL of the API, defaults to api_base_url (point it at a local stub server to test)
+        Returns:
+            df (pd.DataFrame or None): Same output as get_player_stats_with_reusable_driver
+    """
+    player_name = player_metadata['player_name']
+    player_id = get_player_id(player_metadata['player_link_official'])
+
+    print(f"Collecting {player_name}'s stats for player {player_id}")
+    landing = fetch_player_landing(player_id, base_url)
+    with PARSE_SECONDS.labels('landing_json').time():
+        return landing_to_stats(landing, player_name)
 
 """
     The following section is APIs to get data from official NHL website
@@ -383,17 +580,12 @@ def get_player_by_team(team, season):
     # Get the URL
     url = f"https://www.nhl.com/{team}/stats/{season_year_cat}"
 
-    # Set up Selenium Chrome Driver
-    chrome_options = uc.ChromeOptions()
-    chrome_options.add_argument("--headless=new")
-    chrome_options.add_argument("--no-sandbox")
-    chrome_options.add_argument("--disable-dev-shm-usage")
-
-    driver = uc.Chrome(version_main=138, options=chrome_options)
+    # Set up a lean headless Chrome driver
+    driver = create_driver()
     wait = WebDriverWait(driver, 15)
 
     # Get the page
-    driver.get(url)
+    limited_navigate(driver, url)
 
     # Initiate a list of players
     players = []
@@ -402,55 +594,11 @@ def get_player_by_team(team, season):
         # Collecting Data from {team} in {season}
         print(f"Collecting data from {url}")
 
-        # Wait for the table to load
-        wait.until(ec.presence_of_element_located((By.CSS_SELECTOR, "table.rt-table")))
+        # Wait for the table rows to be filled with players
+        timed_wait(wait, ec.presence_of_element_located(ROSTER_ROW_LOCATOR), 'roster_rows')
 
-        # Slight pause to ensure all data is loaded
-        time.sleep(2)
-
-        # Locate the players' link elements
-        player_link_elements = driver.find_elements(By.CSS_SELECTOR, "a[href*='/player/']")
-
-        # Locate each row with player info
-        rows = driver.find_elements(By.CSS_SELECTOR, "tbody.rt-tbody > tr.rt-tr")
-        for row in rows:
-            try:
-                name_elem = row.find_element(By.CSS_SELECTOR, "a[href*='/player/']")
-                player_name = name_elem.text.strip()
-                player_link = name_elem.get_attribute("href")
-
-                image_url = None
-                try:
-                    # Try <img>
-                    img_elem = row.find_element(By.CSS_SELECTOR, ".headshot-container img")
-                    image_url = img_elem.get_attribute("src")
-                except:
-                    try:
-                        # Try <image> (SVG)
-                        svg_elem = row.find_element(By.CSS_SELECTOR, ".headshot-container image")
-                        image_url = svg_elem.get_attribute("xlink:href") or svg_elem.get_attribute("href")
-                    except:
-                        # No image found
-                        print(f"No image found for {player_name}")
-
-                    # Extract position
-                    try:
-                        pos_elem = row.find_element(By.CSS_SELECTOR, "td span[aria-label]")
-                        player_pos = pos_elem.text.strip()
-                    except:
-                        player_pos = "G"
-                        print(f"{player_name} is a goalie.")
-
-                    players.append({
-                        "player_name": player_name,
-                        "player_pos": player_pos,
-                        "player_link": player_link,
-                        "player_image": image_url
-                    })
-
-            except Exception as inner_e:
-                print("Skipping row due to error:", inner_e)
-                continue
+        # Read every row in one round trip
+        players = extract_roster_rows(driver)
 
     except Exception as e:
         print(f"Failed to scrape {team} for {season} at {url}")
@@ -462,7 +610,7 @@ def get_player_by_team(team, season):
         driver.quit()
 
     # Convert to dataframe
-    players_metadata = pd.DataFrame(players)
+    players_metadata = apply_schema(pd.DataFrame(players), OFFICIAL_ROSTER_SCHEMA)
     return players_metadata
 
 def get_player_by_team_with_reusable_driver(team, season, driver, wait):
@@ -497,57 +645,21 @@ def get_player_by_team_with_reusable_driver(team, season, driver, wait):
     players = []
     try:
         print(f"Collecting data from {url}")
-        driver.get(url)
-        wait.until(ec.presence_of_element_located((By.CSS_SELECTOR, "table.rt-table")))
-        time.sleep(2)
+        polite_pause()
+        limited_navigate(driver, url)
 
-        # Locate each row with player info
-        rows = driver.find_elements(By.CSS_SELECTOR, "tbody.rt-tbody > tr.rt-tr")
-        for row in rows:
-            try:
-                name_elem = row.find_element(By.CSS_SELECTOR, "a[href*='/player/']")
-                player_name = name_elem.text.strip()
-                player_link = name_elem.get_attribute("href")
-
-                image_url = None
-                try:
-                    # Try <img>
-                    img_elem = row.find_element(By.CSS_SELECTOR, ".headshot-container img")
-                    image_url = img_elem.get_attribute("src")
-                except:
-                    try:
-                        # Try <image> (SVG)
-                        svg_elem = row.find_element(By.CSS_SELECTOR, ".headshot-container image")
-                        image_url = svg_elem.get_attribute("xlink:href") or svg_elem.get_attribute("href")
-                    except:
-                        # No image found
-                        print(f"No image found for {player_name}")
-
-                # Extract position
-                try:
-                    pos_elem = row.find_element(By.CSS_SELECTOR, "td span[aria-label]")
-                    player_pos = pos_elem.text.strip()
-                except:
-                    player_pos = "G"
-                    print(f"{player_name} is a goalie.")
-
-                players.append({
-                    "player_name": player_name,
-                    "player_pos": player_pos,
-                    "player_link": player_link,
-                    "player_image": image_url
-                })
-
-            except Exception as inner_e:
-                print("Skipping row due to error:", inner_e)
-                continue
+        # Wait for the table rows to be filled with players
+        timed_wait(wait, ec.presence_of_element_located(ROSTER_ROW_LOCATOR), 'roster_rows')
+
+        # Read every row in one round trip
+        players = extract_roster_rows(driver)
 
     except Exception as e:
         print(f"Failed to scrape {team} for {season} at {url}")
         print("Error:", e)
         return None
 
-    return pd.DataFrame(players)
+    return apply_schema(pd.DataFrame(players), OFFICIAL_ROSTER_SCHEMA)
 
 
 def get_player_stats_with_reusable_driver(player_metadata, driver, wait):
@@ -567,10 +679,19 @@ def get_player_stats_with_reusable_driver(player_metadata, driver, wait):
     player_name = player_metadata['player_name']
     df_regular, df_playoffs = None, None
 
+    # One HTTP call instead of a browser session, the dropdowns are only clicked when the JSON fails
+    if stats_backend == 'json':
+        try:
+            with span('stats_json'):
+                return get_player_stats_json(player_metadata)
+        except Exception as e:
+            print(f"JSON stats failed for {player_name}, falling back to the browser: {e}")
+
     try:
         print(f"Collecting {player_name}'s stats from {player_url}")
-        driver.get(player_url)
-        time.sleep(random.uniform(1.5, 2.5))
+        polite_pause()
+        with span('navigate'):
+            limited_navigate(driver, player_url)
 
         # ---------- Step 1: Scrape Regular Season Stats ----------
         df_regular = scrape_all_leagues_regular_season_stats(player_name, driver, wait)
@@ -590,14 +711,15 @@ def get_player_stats_with_reusable_driver(player_metadata, driver, wait):
         # ---------- Step 3: Merged Regular Season Stats and Playoff Stats ----------
         try:
             if df_regular is not None and df_playoffs is not None:
-                df_merged = merge_stats(df_regular, df_playoffs)
+                with span('merge'):
+                    df_merged = merge_stats(df_regular, df_playoffs)
                 return df_merged
             elif df_regular is not None:
                 print(f"No playoff stats found for {player_name}. Returning regular season stats only.")
-                return convert_NaN_to_None(df_regular)
+                return apply_schema(df_regular, CAREER_TABLE_SCHEMA)
             elif df_playoffs is not None:
                 print(f"No regular season stats found for {player_name}. Returning playoff stats only.")
-                return convert_NaN_to_None(df_playoffs)
+                return apply_schema(df_playoffs, CAREER_TABLE_SCHEMA)
             else:
                 return None
         except Exception as e:
@@ -0,0 +1,213 @@
+"""
+    Shared per-domain token-bucket rate limiter for every requests call and Selenium navigation
+    1. acquire(url): Blocks until the url's domain has a token
+    2. report(url, status_code, text): Feeds a response back - slows the domain down on 429/503 or block pages
+       and speeds it back up on success
+    3. limited_get(url, headers): requests.get through the limiter, retrying after push-back
+    4. limited_navigate(driver, url): driver.get through the limiter, retrying after a block page
+
+    The bucket of each domain lives in a small JSON file guarded by a file lock, so every thread and
+    every worker process (driver_pool, concurrent page fetching) shares the same budget.
+"""
+
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+from filelock import FileLock
+
+from metrics import NAVIGATION_SECONDS, PAGES_FETCHED
+
+# Requests per second allowed for each domain when it is healthy
+domain_rates = {
+    'eliteprospects.com': 1.0,
+    'nhl.com': 1.0,
+    'nhle.com': 2.0,
+}
+default_rate = 1.0
+
+# Number of requests that may be sent back to back after an idle period
+burst = 2
+
+# The rate of a domain never drops below this fraction of its healthy rate
+min_rate_factor = 1 / 16
+
+# Seconds a domain is paused after push-back without a Retry-After header (scaled up while the domain stays slow)
+cooldown = 30
+
+# Directory holding the shared bucket state
+state_dir = os.path.join(tempfile.gettempdir(), 'nhl_prospect_rate_limits')
+
+# Statuses that mean the site is pushing back
+PUSH_BACK_STATUSES = {429, 503}
+
+# Titles or snippets of anti-bot and block pages
+BLOCK_PAGE_PATTERN = re.compile(
+    r'just a moment|attention required|access denied|too many requests|verify you are human|captcha',
+    re.IGNORECASE
+)
+
+TITLE_PATTERN = re.compile(r'<title[^>]*>(.*?)</title>', re.IGNORECASE | re.DOTALL)
+
+_thread_lock = threading.Lock()
+
+"""
+    The following section is helper functions
+"""
+def domain_of(url):
+    """
+        Get the registrable domain of a url, e.g. 'https://api-web.nhle.com/v1/...' -> 'nhle.com'
+    """
+    netloc = urlparse(url).netloc.split(':')[0].lower()
+    return '.'.join(netloc.split('.')[-2:])
+
+def is_block_page(text):
+    """
+        Check whether a page title, or the title of an HTML page, looks like an anti-bot or block page
+    """
+    if not text:
+        return False
+    match = TITLE_PATTERN.search(text[:20000])
+    if match:
+        text = match.group(1)
+    elif len(text) > 2000:
+        # Real pages are large and have a title, block pages without one are short
+        return False
+    return BLOCK_PAGE_PATTERN.search(text) is not None
+
+def _state_path(domain):
+    return os.path.join(state_dir, f'{domain}.json')
+
+def _read_state(domain):
+    try:
+        with open(_state_path(domain), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {'tokens': burst, 'updated': time.time(), 'rate_factor': 1.0, 'blocked_until': 0.0}
+
+def _write_state(domain, state):
+    tmp_path = f'{_state_path(domain)}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f)
+    os.replace(tmp_path, _state_path(domain))
+
+def _update_state(domain, update):
+    # Run update(state, now) under the thread and file locks, return whatever it returns
+    os.makedirs(state_dir, exist_ok=True)
+    with _thread_lock, FileLock(_state_path(domain) + '.lock'):
+        state = _read_state(domain)
+        result = update(state, time.time())
+        _write_state(domain, state)
+    return result
+
+"""
+    The following section is the limiter API
+"""
+def acquire(url):
+    """
+        Block until the domain of url has a token, then take it
+        Parameters:
+            url (str): URL that is about to be requested
+        Returns:
+            waited (float): Seconds spent waiting
+    """
+    domain = domain_of(url)
+    base_rate = domain_rates.get(domain, default_rate)
+
+    def take(state, now):
+        rate = base_rate * state['rate_factor']
+        state['tokens'] = min(burst, state['tokens'] + (now - state['updated']) * rate)
+        state['updated'] = now
+        if now < state['blocked_until']:
+            return state['blocked_until'] - now
+        if state['tokens'] >= 1:
+            state['tokens'] -= 1
+            return 0
+        return (1 - state['tokens']) / rate
+
+    waited = 0.0
+    while True:
+        delay = _update_state(domain, take)
+        if delay <= 0:
+            return waited
+        time.sleep(delay)
+        waited += delay
+
+def report(url, status_code=200, text=None, retry_after=None):
+    """
+        Feed a response back to the limiter of its domain
+        Parameters:
+            url (str): URL that was requested
+            status_code (int): HTTP status of the response
+            text (str): Beginning of the page, used to detect block pages
+            retry_after (str or float): Value of the Retry-After header, if any
+        Returns:
+            pushed_back (bool): True if the response asked us to slow down
+    """
+    domain = domain_of(url)
+    pushed_back = status_code in PUSH_BACK_STATUSES or is_block_page(text)
+
+    def adjust(state, now):
+        if pushed_back:
+            # Multiplicative decrease and a pause of the whole domain
+            state['rate_factor'] = max(min_rate_factor, state['rate_factor'] / 2)
+            try:
+                pause = float(retry_after)
+            except (TypeError, ValueError):
+                pause = cooldown / state['rate_factor'] ** 0.5
+            state['blocked_until'] = max(state['blocked_until'], now + pause)
+            state['tokens'] = 0
+        elif status_code >= 500:
+            state['rate_factor'] = max(min_rate_factor, state['rate_factor'] * 0.75)
+        else:
+            # Additive increase back towards the healthy rate
+            state['rate_factor'] = min(1.0, state['rate_factor'] + 0.05)
+
+    _update_state(domain, adjust)
+    if pushed_back:
+        print(f"{domain} pushed back (status {status_code}), slowing down")
+    return pushed_back
+
+def limited_get(url, headers=None, max_retries=3, timeout=30):
+    """
+        requests.get through the limiter of the url's domain, retrying after push-back
+        Parameters:
+            url (str): URL to fetch
+            headers (dict): Request headers
+            max_retries (int): Retries after a 429/503 or block page
+            timeout (float): Request timeout in seconds
+        Returns:
+            response (requests.Response): Last response received
+    """
+    for attempt in range(max_retries + 1):
+        acquire(url)
+        start = time.perf_counter()
+        response = requests.get(url, headers=headers, timeout=timeout)
+        NAVIGATION_SECONDS.labels(domain_of(url), 'http').observe(time.perf_counter() - start)
+        PAGES_FETCHED.labels(domain_of(url), 'http').inc()
+        if not report(url, response.status_code, response.text, response.headers.get('Retry-After')):
+            break
+    return response
+
+def limited_navigate(driver, url, max_retries=3):
+    """
+        driver.get through the limiter of the url's domain, retrying after a block page
+        Parameters:
+            driver (webdriver.Chrome): Selenium driver
+            url (str): URL to open
+            max_retries (int): Retries after a block page
+    """
+    for attempt in range(max_retries + 1):
+        acquire(url)
+        start = time.perf_counter()
+        driver.get(url)
+        NAVIGATION_SECONDS.labels(domain_of(url), 'browser').observe(time.perf_counter() - start)
+        PAGES_FETCHED.labels(domain_of(url), 'browser').inc()
+        if not report(url, 200, driver.title):
+            return
+    print(f"Still blocked at {url} after {max_retries} retries")
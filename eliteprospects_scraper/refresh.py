@@ -0,0 +1,374 @@
+"""
+    Incremental refresh of the current season: only re-parse and rewrite what changed since the last run
+    1. refresh_season_roster(league, season): Re-parses only the Elite Prospects roster pages whose table changed and
+       replaces their rows in the league roster
+    2. refresh_team_rosters(season): Re-scrapes the official team rosters and rewrites the files whose rows changed
+    3. refresh_player_stats(players_metadata, output_path): Re-fetches the career stats of players on current season
+       rosters and replaces the rows of the players whose stats changed
+    4. refresh_player_facts(players_metadata, output_path): Same as 3. for the Elite Prospects facts
+
+    Every fetched table or section is fingerprinted (SHA-256 of its content) in a FingerprintStore. When the
+    fingerprint matches the previous run the page counts as skipped and nothing is parsed or written. Pages are
+    fetched past the HTTP cache, a cached copy could be hours old and would always look unchanged.
+"""
+
+import glob
+import hashlib
+import json
+import os
+import tempfile
+from datetime import date
+
+import pandas as pd
+
+import eliteprospects_scraper_api as ep
+import nhl_scraper_api as nhl_scraper
+import table_parsers
+from driver_pool import imap_with_drivers
+from facts_tables import migrate_draft_columns
+from roster_scheduler import team_season_path, teams_output_dir, write_csv_atomic
+
+# Fingerprints of the previous refresh
+fingerprints_path = './data/fingerprints.json'
+
+"""
+    The following section is fingerprint helpers
+"""
+def fingerprint(content):
+    """
+        SHA-256 of a page, table or parsed rows
+        Parameters:
+            content (str, bytes, pd.DataFrame, dict or list): Content to fingerprint
+        Returns:
+            digest (str): Hex digest
+    """
+    if isinstance(content, pd.DataFrame):
+        content = pd.util.hash_pandas_object(content, index=False).values.tobytes() + \
+            ','.join(map(str, content.columns)).encode('utf-8')
+    elif isinstance(content, (dict, list)):
+        content = json.dumps(content, sort_keys=True, default=str)
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+    return hashlib.sha256(content).hexdigest()
+
+class FingerprintStore:
+    """
+        Fingerprints of every refreshed page, kept in a JSON file between runs
+    """
+    def __init__(self, path=None):
+        self.path = path or fingerprints_path
+        self.fingerprints = {}
+        if os.path.exists(self.path):
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.fingerprints = json.load(f)
+        self.counts = {'changed': 0, 'skipped': 0}
+
+    def changed(self, key, digest):
+        """
+            Whether the content of key changed since the last run. Counts the page as changed or skipped.
+        """
+        if self.fingerprints.get(key) == digest:
+            self.counts['skipped'] += 1
+            return False
+        self.counts['changed'] += 1
+        return True
+
+    def update(self, key, digest):
+        self.fingerprints[key] = digest
+
+    def save(self):
+        output_dir = os.path.dirname(self.path) or '.'
+        os.makedirs(output_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=output_dir, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(self.fingerprints, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def report(self, label):
+        print(f"{label}: {self.counts['changed']} pages changed, {self.counts['skipped']} pages skipped")
+        return dict(self.counts)
+
+"""
+    The following section is helper functions
+"""
+def current_season(today=None):
+    """
+        Season in YYYY-YYYY format that is being played (or was last played) on today, seasons start in September
+    """
+    today = today or date.today()
+    start_year = today.year if today.month >= 9 else today.year - 1
+    return f"{start_year}-{start_year + 1}"
+
+def current_roster_links(season=None, output_dir=None):
+    """
+        Official links of every player on a current season team roster
+        Parameters:
+            season (str): Season in YYYY-YYYY format, defaults to current_season()
+            output_dir (str): Folder of the roster files, defaults to roster_scheduler.teams_output_dir
+        Returns:
+            links (set): player_link values of the season's roster files
+    """
+    season = season or current_season()
+    links = set()
+    for path in glob.glob(os.path.join(output_dir or teams_output_dir, '*', f'*_{season}.csv')):
+        links.update(pd.read_csv(path, usecols=['player_link'])['player_link'].dropna())
+    return links
+
+def replace_rows(output_path, df_new, key_column, keys, fill_keys=None, migrate=None):
+    """
+        Replace the rows of the given keys in a CSV file with new rows and write it atomically
+        Parameters:
+            output_path (str): CSV file to update
+            df_new (pd.DataFrame): New rows of the keys
+            key_column (str or list): Column(s) identifying the rows, e.g. 'player_link_ep' or ['link', 'team']
+            keys (iterable): Keys whose old rows are dropped, tuples when key_column is a list
+            fill_keys (callable): Called with the old rows, returns them with the key column(s) of rows written
+                before the key existed filled in
+            migrate (callable): Called with the old rows, returns them in the layout of df_new, e.g.
+                facts_tables.migrate_draft_columns
+    """
+    if os.path.exists(output_path):
+        df_old = pd.read_csv(output_path, encoding='utf-8-sig', low_memory=False)
+        if fill_keys is not None:
+            df_old = fill_keys(df_old)
+        if migrate is not None:
+            df_old = migrate(df_old)
+        key_columns = [key_column] if isinstance(key_column, str) else list(key_column)
+        keys = [tuple(map(str, key if isinstance(key, tuple) else (key,))) for key in keys]
+        if keys and all(column in df_old.columns for column in key_columns):
+            old_keys = pd.MultiIndex.from_frame(df_old[key_columns].astype(str))
+            df_old = df_old[~old_keys.isin(keys)]
+        df_new = pd.concat([df_old, df_new], ignore_index=True)
+    write_csv_atomic(df_new, output_path)
+
+def fill_stats_links(df_stats, players_metadata):
+    """
+        Fill player_link_official of stats rows written without it, from their name when only one player has it
+        Parameters:
+            df_stats (pd.DataFrame): Rows of the stats file
+            players_metadata (pd.DataFrame): Rows with 'player_name' and 'player_link_official'
+        Returns:
+            df_stats (pd.DataFrame): Same rows, rows of a name shared by several players keep an empty link
+    """
+    # Players without playoff stats keep the unmerged 'Player' column, like get_player_stats_with_reusable_driver
+    names = pd.Series(None, index=df_stats.index, dtype=object)
+    for column in ('player_name_official', 'Player'):
+        if column in df_stats.columns:
+            names = names.fillna(df_stats[column])
+    unique = players_metadata.drop_duplicates('player_name', keep=False)
+    links = names.map(unique.set_index('player_name')['player_link_official'])
+    if 'player_link_official' in df_stats.columns:
+        links = df_stats['player_link_official'].fillna(links)
+    return df_stats.assign(player_link_official=links)
+
+def _scrape_roster(job, driver, wait):
+    team, season = job
+    return nhl_scraper.get_player_by_team_with_reusable_driver(team, season, driver, wait)
+
+"""
+    The following section is APIs to refresh the current season
+"""
+def refresh_season_roster(league, season=None, output_path=None, store=None):
+    """
+        Re-parse the Elite Prospects roster pages whose stats table changed and replace their rows, by link and team,
+        in the league roster
+        Parameters:
+            league (str): Name of the league
+            season (str): Season in YYYY-YYYY format, defaults to current_season()
+            output_path (str): Roster file, defaults to ./data/{league}/players/{league}_players_{season}.csv
+            store (FingerprintStore): Fingerprints, defaults to the store at fingerprints_path
+        Returns:
+            counts (dict): Number of pages changed and skipped
+    """
+    season = season or current_season()
+    output_path = output_path or f'./data/{league}/players/{league}_players_{season}.csv'
+    store = store or FingerprintStore()
+
+    url = 'https://www.eliteprospects.com/league/' + league + '/stats/' + season + '/?page='
+    first_page = ep.fetch_page(url + '1', use_cache=False)
+    first_root = ep.parse_page(first_page.content)
+    num_pages = ep.count_pages(first_root)
+    page_urls = [url + str(i) for i in range(2, num_pages + 1)]
+    roots = [first_root] + [ep.parse_page(page.content) for page in ep.fetch_pages(page_urls, use_cache=False)]
+
+    # Fingerprint only the players tables, the rest of the page changes with every request
+    rewrite = not os.path.exists(output_path)
+    changed, players = [], []
+    for i, root in enumerate(roots):
+        table = ep.find_roster_table(root)
+        key = f'roster:{league}:{season}:{i + 1}'
+        digest = fingerprint(table_parsers.to_html(table))
+        if store.changed(key, digest) or rewrite:
+            changed.append((key, digest))
+            df_players = ep.parse_roster_page(root)
+            if df_players is not None:
+                players.append(df_players)
+
+    if players:
+        # Only the rows of the changed pages are replaced, a player who moved to another page changed both pages
+        df_new = ep.clean_season_roster(players, league, season)
+        if rewrite:
+            write_csv_atomic(df_new, output_path)
+        else:
+            replace_rows(output_path, df_new, ['link', 'team'], zip(df_new['link'], df_new['team']))
+        print(f"Replaced {len(df_new)} rows of {output_path} ({len(changed)} of {len(roots)} pages changed)")
+    else:
+        print(f"{output_path} is up to date")
+
+    for key, digest in changed:
+        store.update(key, digest)
+    store.save()
+
+    return store.report(f"{league} roster {season}")
+
+def refresh_team_rosters(season=None, teams=None, output_dir=None, num_workers=4, store=None):
+    """
+        Re-scrape the official team rosters of a season and rewrite only the files whose rows changed
+        Parameters:
+            season (str): Season in YYYY-YYYY format, defaults to current_season()
+            teams (list): Teams to refresh, defaults to nhl_scraper_api.valid_teams
+            output_dir (str): Folder of the roster files, defaults to roster_scheduler.teams_output_dir
+            num_workers (int): Number of worker processes (and drivers)
+            store (FingerprintStore): Fingerprints, defaults to the store at fingerprints_path
+        Returns:
+            counts (dict): Number of pages changed and skipped
+    """
+    season = season or current_season()
+    teams = teams or nhl_scraper.valid_teams
+    store = store or FingerprintStore()
+
+    try:
+        for (team, _), df_players, error in imap_with_drivers(_scrape_roster, [(team, season) for team in teams], num_workers):
+            if error is not None or df_players is None:
+                print(f"Failed to refresh {team} for {season}: {error}")
+                continue
+
+            key = f'team_roster:{team}:{season}'
+            digest = fingerprint(df_players)
+            path = team_season_path(team, season, output_dir)
+            if store.changed(key, digest) or not os.path.exists(path):
+                write_csv_atomic(df_players, path)
+                store.update(key, digest)
+                print(f"Rewrote {path}")
+    finally:
+        store.save()
+
+    return store.report(f"Team rosters {season}")
+
+def refresh_player_stats(players_metadata, output_path='./data/nhl/final/nhl_players_official_stats.csv',
+                         season=None, store=None, base_url=None):
+    """
+        Re-fetch the official career stats of the players on current season rosters and replace the rows of the
+        players whose stats changed
+        Parameters:
+            players_metadata (pd.DataFrame): Rows with 'player_name' and 'player_link_official'
+            output_path (str): Stats file written by get_player_stats_with_reusable_driver
+            season (str): Season whose rosters decide who is active, defaults to current_season()
+            store (FingerprintStore): Fingerprints, defaults to the store at fingerprints_path
+            base_url (str): Base URL of the NHL API, see nhl_scraper_api.fetch_player_landing
+        Returns:
+            counts (dict): Number of pages changed and skipped, plus players not on a current roster
+    """
+    store = store or FingerprintStore()
+    active = current_roster_links(season)
+    players = players_metadata[players_metadata['player_link_official'].isin(active)]
+    print(f"{len(players)} of {len(players_metadata)} players are on a current season roster")
+
+    # Fingerprints are stored only once the rows are written, a failed write refreshes the players again next run
+    results = []
+    changed = []
+    changed_links = []
+    for _, player_metadata in players.iterrows():
+        try:
+            player_id = nhl_scraper.get_player_id(player_metadata['player_link_official'])
+            landing = nhl_scraper.fetch_player_landing(player_id, base_url)
+
+            key = f'stats:{player_id}'
+            digest = fingerprint(landing.get('seasonTotals') or [])
+            if not store.changed(key, digest):
+                continue
+
+            df_stats = nhl_scraper.landing_to_stats(landing, player_metadata['player_name'])
+        except Exception as e:
+            print(f"Failed to refresh stats of {player_metadata['player_name']}: {e}")
+            continue
+
+        if df_stats is not None:
+            # Rows are keyed by link, two players can share a name
+            df_stats['player_link_official'] = player_metadata['player_link_official']
+            results.append(df_stats)
+            changed_links.append(player_metadata['player_link_official'])
+        changed.append((key, digest))
+
+    if results:
+        replace_rows(output_path, pd.concat(results, ignore_index=True), 'player_link_official', changed_links,
+                     fill_keys=lambda df_old: fill_stats_links(df_old, players_metadata))
+        print(f"Replaced the stats of {len(changed_links)} players in {output_path}")
+
+    for key, digest in changed:
+        store.update(key, digest)
+    store.save()
+
+    counts = store.report("Player stats")
+    counts['not_on_roster'] = len(players_metadata) - len(players)
+    return counts
+
+def refresh_player_facts(players_metadata, output_path='./data/nhl/facts/nhl_players_facts_with_date_of_birth.csv',
+                         season=None, store=None):
+    """
+        Re-fetch the Elite Prospects facts of the players on current season rosters and replace the rows of the
+        players whose #player-facts section changed
+        Parameters:
+            players_metadata (pd.DataFrame): Rows with 'player_name', 'player_link_ep' and 'player_link_official'
+            output_path (str): Facts file written by get_player_facts_with_reusable_driver
+            season (str): Season whose rosters decide who is active, defaults to current_season()
+            store (FingerprintStore): Fingerprints, defaults to the store at fingerprints_path
+        Returns:
+            counts (dict): Number of pages changed and skipped, plus players not on a current roster
+    """
+    store = store or FingerprintStore()
+    active = current_roster_links(season)
+    players = players_metadata[players_metadata['player_link_official'].isin(active)]
+    print(f"{len(players)} of {len(players_metadata)} players are on a current season roster")
+
+    # Fingerprints are stored only once the rows are written, a failed write refreshes the players again next run
+    results = []
+    changed = []
+    for _, player_metadata in players.iterrows():
+        player_url = str(player_metadata['player_link_ep'])
+        try:
+            page = ep.fetch_page(player_url, use_cache=False)
+            if page.status_code != 200:
+                print(f"Request for {player_url} returned status {page.status_code}")
+                continue
+
+            # Fingerprint only the facts section, parsed the same way as parse_player_facts_html
+            section = ep.find_player_facts_section(page.content)
+            if section is None:
+                print(f"No #player-facts section for {player_metadata['player_name']}")
+                continue
+
+            key = f'facts:{player_url}'
+            digest = fingerprint(table_parsers.to_html(section))
+            if not store.changed(key, digest):
+                continue
+
+            results.append(ep.player_facts_from_section(section, str(player_metadata['player_name']), player_url))
+        except Exception as e:
+            print(f"Failed to refresh facts of {player_metadata['player_name']}: {e}")
+            continue
+        changed.append((key, digest))
+
+    if results:
+        df_facts = pd.concat(results, ignore_index=True)
+        # Files written before the draft split get the three draft columns, not a mix of both layouts
+        replace_rows(output_path, df_facts, 'player_link_ep', df_facts['player_link_ep'], migrate=migrate_draft_columns)
+        print(f"Replaced the facts of {len(df_facts)} players in {output_path}")
+
+    for key, digest in changed:
+        store.update(key, digest)
+    store.save()
+
+    counts = store.report("Player facts")
+    counts['not_on_roster'] = len(players_metadata) - len(players)
+    return counts
@@ -0,0 +1,147 @@
+"""
+    Parallel crawl of the official NHL team rosters over the full team x season grid
+    1. build_roster_grid(teams, seasons): Every (team, season) pair, without the 2004-2005 lockout and the seasons
+       before a franchise's first season
+    2. pending_roster_jobs(grid, output_dir): The pairs whose roster file does not exist yet
+    3. crawl_rosters(teams, seasons, output_dir, num_workers): Scrapes the pending pairs on a pool of browser workers
+       and writes ./data/nhl/official/teams/{team}/{team}_{season}.csv for each of them
+
+    Every file is written to a temporary file first and renamed into place, so an interrupted crawl never leaves a
+    partial roster behind and running crawl_rosters again only scrapes what is missing.
+"""
+
+import os
+import tempfile
+
+import nhl_scraper_api as nhl_scraper
+from driver_pool import imap_with_drivers
+from metrics import WRITE_SECONDS
+
+# Seasons 2000-2001 to 2024-2025
+valid_seasons = [f'20{str(i).zfill(2)}-20{str(i + 1).zfill(2)}' for i in range(0, 25)]
+
+# Season without games
+LOCKOUT_SEASONS = {"2004-2005"}
+
+# First season of the franchises that joined (or moved) after 2000-2001, nhl.com has no roster for the seasons before
+FIRST_SEASONS = {
+    'jets': '2011-2012',
+    'goldenknights': '2017-2018',
+    'kraken': '2021-2022',
+    'utah': '2024-2025',
+}
+
+# Folder the per team-season roster files are written to
+teams_output_dir = './data/nhl/official/teams'
+
+"""
+    The following section is helper functions
+"""
+def team_season_path(team, season, output_dir=None):
+    return os.path.join(output_dir or teams_output_dir, team, f'{team}_{season}.csv')
+
+def write_csv_atomic(df, path):
+    """
+        Write a DataFrame to CSV through a temporary file in the same folder, then rename it into place
+        Parameters:
+            df (pd.DataFrame): DataFrame to write
+            path (str): Final path of the CSV file
+    """
+    output_dir = os.path.dirname(path) or '.'
+    os.makedirs(output_dir, exist_ok=True)
+
+    fd, tmp_path = tempfile.mkstemp(dir=output_dir, prefix='.' + os.path.basename(path), suffix='.tmp')
+    try:
+        with WRITE_SECONDS.labels('csv_atomic').time():
+            with os.fdopen(fd, 'w', encoding='utf-8-sig', newline='') as f:
+                df.to_csv(f, index=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def build_roster_grid(teams=None, seasons=None):
+    """
+        Build every (team, season) pair of the crawl, without the lockout season and the seasons before the team's
+        first season in FIRST_SEASONS
+        Parameters:
+            teams (list): Teams to crawl, defaults to nhl_scraper_api.valid_teams
+            seasons (list): Seasons in YYYY-YYYY format, defaults to valid_seasons
+        Returns:
+            grid (list): (team, season) tuples, team by team
+    """
+    teams = teams or nhl_scraper.valid_teams
+    seasons = seasons or valid_seasons
+    return [(team, season) for team in teams for season in seasons
+            if season not in LOCKOUT_SEASONS and season >= FIRST_SEASONS.get(team, season)]
+
+def pending_roster_jobs(grid, output_dir=None):
+    """
+        Keep the (team, season) pairs whose roster file does not exist yet
+        Parameters:
+            grid (list): (team, season) tuples
+            output_dir (str): Folder of the roster files, defaults to teams_output_dir
+        Returns:
+            jobs (list): (team, season, path) tuples still to scrape
+    """
+    jobs = []
+    for team, season in grid:
+        path = team_season_path(team, season, output_dir)
+        if not os.path.exists(path):
+            jobs.append((team, season, path))
+    return jobs
+
+def scrape_team_season(job, driver, wait):
+    """
+        Scrape one team-season roster with the worker's driver and write it atomically
+        Parameters:
+            job (tuple): (team, season, path)
+            driver (webdriver.Chrome): The worker's driver
+            wait (WebDriverWait): WebDriverWait instance of the driver
+        Returns:
+            num_players (int): Number of players written
+    """
+    team, season, path = job
+    df_players = nhl_scraper.get_player_by_team_with_reusable_driver(team, season, driver, wait)
+    if df_players is None:
+        raise Exception(f"Failed to scrape {team} for {season}")
+
+    write_csv_atomic(df_players, path)
+    return len(df_players)
+
+"""
+    The following section is APIs to crawl the rosters
+"""
+def crawl_rosters(teams=None, seasons=None, output_dir=None, num_workers=4, driver_timeout=15):
+    """
+        Scrape every missing team-season roster on a pool of browser workers
+        Parameters:
+            teams (list): Teams to crawl, defaults to nhl_scraper_api.valid_teams
+            seasons (list): Seasons in YYYY-YYYY format, defaults to valid_seasons
+            output_dir (str): Folder of the roster files, defaults to teams_output_dir
+            num_workers (int): Number of worker processes (and drivers)
+            driver_timeout (int): Timeout of each worker's WebDriverWait
+        Returns:
+            summary (dict): Number of pairs in the grid, skipped, done and the (team, season) pairs that failed
+    """
+    grid = build_roster_grid(teams, seasons)
+    jobs = pending_roster_jobs(grid, output_dir)
+    print(f"{len(grid)} team-seasons, {len(grid) - len(jobs)} already scraped, {len(jobs)} to scrape")
+
+    done = 0
+    failed = []
+    for i, ((team, season, path), num_players, error) in enumerate(
+            imap_with_drivers(scrape_team_season, jobs, num_workers, driver_timeout)):
+        if error is None:
+            done += 1
+            print(f"[{i + 1}/{len(jobs)}] Wrote {num_players} players to {path}")
+        else:
+            failed.append((team, season))
+            print(f"[{i + 1}/{len(jobs)}] Failed {team} for {season}: {error}")
+
+    summary = {'grid': len(grid), 'skipped': len(grid) - len(jobs), 'done': done, 'failed': failed}
+    print(f"Finished: {done} written, {len(failed)} failed")
+    return summary
@@ -0,0 +1,254 @@
+"""
+    Column types of the roster, facts and stats DataFrames
+    1. apply_schema(df, schema, suffixes): Casts the columns of a schema that df has, other columns are left as they are
+    2. Schemas: ROSTER_SCHEMA, OFFICIAL_ROSTER_SCHEMA, FACTS_SCHEMA, MERGED_FACTS_SCHEMA, EP_STATS_SCHEMA,
+       CAREER_TABLE_SCHEMA, OFFICIAL_STATS_SCHEMA, HIGHLIGHTS_SCHEMA, PLAYER_TYPES_SCHEMA
+    3. compare_schema(df, schema, group_column): Memory and groupby time of the typed frame against the all-object
+       frame convert_NaN_to_None produces
+
+    Stats are nullable integers (Int64) and floats (Float64), so a missing stat is pd.NA instead of turning the
+    whole column into Python objects. Repeated labels (team, league, nation, position) are categoricals and
+    date_of_birth is a datetime. Free text and lists stay objects.
+"""
+
+import time
+
+import pandas as pd
+
+INT = 'Int64'
+FLOAT = 'Float64'
+STRING = 'string'
+CATEGORY = 'category'
+DATETIME = 'datetime'
+
+# Elite Prospects league tables, output of get_season_roster
+ROSTER_SCHEMA = {
+    'player': STRING,
+    'team': CATEGORY,
+    'gp': INT,
+    'g': INT,
+    'a': INT,
+    'tp': INT,
+    'ppg': FLOAT,
+    'pim': INT,
+    '+/-': INT,
+    'link': STRING,
+    'season': CATEGORY,
+    'league': CATEGORY,
+    'player_name': STRING,
+    'position': CATEGORY,
+    'fw_def': CATEGORY,
+}
+
+# Official team rosters, output of get_player_by_team
+OFFICIAL_ROSTER_SCHEMA = {
+    'player_name': STRING,
+    'player_pos': CATEGORY,
+    'player_link': STRING,
+    'player_image': STRING,
+}
+
+# Player facts, output of build_player_facts_row / get_player_facts
+FACTS_SCHEMA = {
+    'player_name': STRING,
+    'player_name_ep': STRING,
+    'player_link_ep': STRING,
+    'date_of_birth': DATETIME,
+    'nation': CATEGORY,
+    'position': CATEGORY,
+    'player_pos': CATEGORY,
+    'height_cm': INT,
+    'weight_kg': INT,
+    'shoots': CATEGORY,
+    'nhl_rights': STRING,
+    'draft_round': INT,
+    'draft_overall': INT,
+    'draft_year': INT,
+    'description': STRING,
+}
+
+# Merged official metadata and facts, e.g. nhl_players_metadata_facts_merged_final.csv
+MERGED_FACTS_SCHEMA = {
+    **FACTS_SCHEMA,
+    'player_id': INT,
+    'player_name_official': STRING,
+    'player_pos_official': CATEGORY,
+    'player_pos_ep': CATEGORY,
+    'player_link_official': STRING,
+    'player_image_official': STRING,
+    # Columns of the files written before facts_tables.migrate_facts_file
+    'player_type': STRING,
+    'draft': STRING,
+    'highlights': STRING,
+}
+
+# Long tables of facts_tables, one row per player and highlight / player type
+HIGHLIGHTS_SCHEMA = {
+    'player_id': INT,
+    'ep_id': INT,
+    'highlight': STRING,
+    'times': INT,
+    'award': CATEGORY,
+}
+
+PLAYER_TYPES_SCHEMA = {
+    'player_id': INT,
+    'ep_id': INT,
+    'player_type': CATEGORY,
+}
+
+# Elite Prospects career stats of get_stats, the merged frame has the same columns with a '_post' suffix
+EP_STATS_SCHEMA = {
+    'player_name': STRING,
+    'season': CATEGORY,
+    'team': CATEGORY,
+    'league': CATEGORY,
+    'gp': INT,
+    'g': INT,
+    'a': INT,
+    'tp': INT,
+    'ppg': FLOAT,
+    'pim': INT,
+    '+/-': INT,
+}
+
+# Official career stats table, one game type, as read from the page or built from the landing JSON
+CAREER_TABLE_SCHEMA = {
+    'Player': STRING,
+    'Season': CATEGORY,
+    'Team': CATEGORY,
+    'League': CATEGORY,
+    'GP': INT,
+    'G': INT,
+    'A': INT,
+    'P': INT,
+    '+/-': INT,
+    'PIM': INT,
+    'PPG': INT,
+    'PPP': INT,
+    'SHG': INT,
+    'SHP': INT,
+    'TOI/G': STRING,
+    'GWG': INT,
+    'OTG': INT,
+    'S': INT,
+    'S%': FLOAT,
+    'FO%': FLOAT,
+}
+
+# Official career stats after merge_stats, every stat has a '_regular' and a '_playoffs' column
+OFFICIAL_STATS_SCHEMA = {
+    'player_name_official': STRING,
+    'season': CATEGORY,
+    'team': CATEGORY,
+    'league': CATEGORY,
+    'gp': INT,
+    'g': INT,
+    'a': INT,
+    'p': INT,
+    'plus_minus': INT,
+    'pim': INT,
+    'ppg': INT,
+    'ppp': INT,
+    'shg': INT,
+    'shp': INT,
+    'toi_per_game': STRING,
+    'gwg': INT,
+    'otg': INT,
+    'sog': INT,
+    'shooting_pct': FLOAT,
+    'fo_pct': FLOAT,
+}
+
+# Values the sites use for "no value"
+MISSING_VALUES = ['', '-', '--']
+
+"""
+    The following section is helper functions
+"""
+def to_int(series):
+    numbers = pd.to_numeric(series.replace(MISSING_VALUES, None), errors='coerce')
+    # Counts never have decimals, a stray one must not stop the cast
+    return numbers.round().astype(INT)
+
+def to_float(series):
+    return pd.to_numeric(series.replace(MISSING_VALUES, None), errors='coerce').astype(FLOAT)
+
+def to_datetime(series):
+    # Scraped rows hold Timestamps, older CSV files use month/day/year and new ones ISO dates
+    return pd.to_datetime(series, format='mixed', errors='coerce')
+
+def cast_column(series, dtype):
+    if dtype == INT:
+        return to_int(series)
+    if dtype == FLOAT:
+        return to_float(series)
+    if dtype == DATETIME:
+        return to_datetime(series)
+    if dtype == STRING:
+        # Lists (player types, highlights) are kept as the text the CSV files store them as
+        return series.map(lambda value: str(value) if isinstance(value, (list, tuple)) else value).astype(STRING)
+    return series.astype(dtype)
+
+"""
+    The following section is APIs to apply the schemas
+"""
+def apply_schema(df, schema, suffixes=('',)):
+    """
+        Cast the columns of a DataFrame to the types of a schema
+        Parameters:
+            df (pd.DataFrame): Scraped or loaded DataFrame
+            schema (dict): Column name -> INT, FLOAT, STRING, CATEGORY or DATETIME
+            suffixes (tuple): Suffixes the schema columns may carry, e.g. ('_regular', '_playoffs')
+        Returns:
+            df (pd.DataFrame): Typed copy of df, columns missing from the schema are unchanged
+    """
+    df = df.copy()
+    for column, dtype in schema.items():
+        for suffix in suffixes:
+            name = f'{column}{suffix}'
+            if name in df.columns:
+                df[name] = cast_column(df[name], dtype)
+    return df
+
+def compare_schema(df, schema, group_column, suffixes=('',), repeat=5):
+    """
+        Compare the typed frame with the all-object frame of convert_NaN_to_None
+        Parameters:
+            df (pd.DataFrame): Frame to compare, e.g. pd.read_csv of the merged dataset
+            schema (dict): Schema of the frame
+            group_column (str): Column to group by for the timing, e.g. 'nation'
+            suffixes (tuple): Suffixes the schema columns may carry
+            repeat (int): Runs of each groupby, the fastest is reported
+        Returns:
+            result (pd.DataFrame): Memory in MB and groupby time in ms of both frames
+    """
+    df_object = df.astype(object).where(pd.notnull(df), None)
+    df_typed = apply_schema(df, schema, suffixes)
+
+    numeric_columns = [column for column in df_typed.columns
+                       if pd.api.types.is_numeric_dtype(df_typed[column]) and column != group_column]
+
+    def groupby_ms(frame):
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            if frame is df_object:
+                # Object columns have to be converted before they can be summed
+                frame[numeric_columns].apply(pd.to_numeric, errors='coerce').groupby(frame[group_column]).sum()
+            else:
+                frame.groupby(group_column, observed=True)[numeric_columns].sum()
+            elapsed = (time.perf_counter() - start) * 1000
+            best = elapsed if best is None else min(best, elapsed)
+        return best
+
+    rows = []
+    for name, frame in (('object', df_object), ('typed', df_typed)):
+        rows.append({
+            'frame': name,
+            'memory_mb': frame.memory_usage(deep=True).sum() / 1e6,
+            'groupby_ms': groupby_ms(frame),
+        })
+    result = pd.DataFrame(rows)
+    print(result.to_string(index=False))
+    return result
@@ -0,0 +1,410 @@
+"""
+    Indexed SQLite store of the players, their facts, their league seasons and their official career stats
+    1. get_engine(path): Opens (and creates) the database
+    2. upsert_players / upsert_player_facts / upsert_league_seasons / upsert_season_stats: Idempotent upserts from
+       the scraper outputs, a row that is already stored is updated in place instead of duplicated
+    3. load_csv_tree(engine, data_dir, stats_path): One-shot load of the existing CSV files
+    4. player_career(engine, ...) / league_players(engine, ...) / query(engine, sql, params): DataFrame queries
+
+    Players are keyed by their Elite Prospects ID (https://www.eliteprospects.com/player/8862/joe-sakic -> 8862),
+    the NHL ID (https://www.nhl.com/player/8451101 -> 8451101) is a unique column of the same row:
+        players         ep_id | nhl_id | player_name | player_name_official | player_pos | links | player_image
+        player_facts    ep_id | date_of_birth | nation | player_pos | height_cm | weight_kg | shoots | draft_round | ...
+        player_highlights  ep_id, award | times | highlight
+        player_types    ep_id, player_type
+        league_seasons  ep_id, league, season, team | gp | g | a | tp | ppg | pim | plus_minus | position | fw_def
+        season_stats    nhl_id, season, team, league | gp_regular ... fo_pct_playoffs
+    league_seasons and season_stats are indexed on (league, season) and (team, season), so "all 2024-2025 NCAA
+    defensemen" or "career of player X" are index seeks instead of a scan of every CSV. Draft year, awards and
+    player types are indexed too, e.g. "first round picks of 2015" or "Hart Trophy winners" are plain filters.
+"""
+
+import glob
+import os
+
+import pandas as pd
+from sqlalchemy import (Column, Float, Index, Integer, MetaData, String, Table, Text, create_engine, event, select,
+                        text)
+from sqlalchemy.dialects.sqlite import insert
+
+from facts_tables import ep_ids, normalize_facts
+
+# Default database file
+database_path = './data/nhl_prospects.db'
+
+# Rows per INSERT statement of an upsert
+chunk_size = 1000
+
+metadata = MetaData()
+
+"""
+    The following section is the tables
+"""
+players = Table(
+    'players', metadata,
+    Column('ep_id', Integer, primary_key=True),
+    Column('nhl_id', Integer, unique=True),
+    Column('player_name', String),
+    Column('player_name_official', String),
+    Column('player_pos', String),
+    Column('player_link_ep', String),
+    Column('player_link_official', String),
+    Column('player_image', String),
+)
+
+player_facts = Table(
+    'player_facts', metadata,
+    Column('ep_id', Integer, primary_key=True),
+    Column('player_name_ep', String),
+    Column('date_of_birth', String),
+    Column('nation', String),
+    Column('player_pos', String),
+    Column('height_cm', Integer),
+    Column('weight_kg', Integer),
+    Column('shoots', String),
+    Column('nhl_rights', String),
+    Column('draft_round', Integer),
+    Column('draft_overall', Integer),
+    Column('draft_year', Integer),
+    Column('description', Text),
+    Index('ix_player_facts_draft', 'draft_year', 'draft_round'),
+)
+
+player_highlights = Table(
+    'player_highlights', metadata,
+    Column('ep_id', Integer, primary_key=True),
+    Column('award', String, primary_key=True),
+    Column('times', Integer),
+    Column('highlight', String),
+    Index('ix_player_highlights_award', 'award'),
+)
+
+player_types = Table(
+    'player_types', metadata,
+    Column('ep_id', Integer, primary_key=True),
+    Column('player_type', String, primary_key=True),
+    Index('ix_player_types_player_type', 'player_type'),
+)
+
+league_seasons = Table(
+    'league_seasons', metadata,
+    Column('ep_id', Integer, primary_key=True),
+    Column('league', String, primary_key=True),
+    Column('season', String, primary_key=True),
+    Column('team', String, primary_key=True),
+    Column('player', String),
+    Column('player_name', String),
+    Column('position', String),
+    Column('fw_def', String),
+    Column('gp', Integer),
+    Column('g', Integer),
+    Column('a', Integer),
+    Column('tp', Integer),
+    Column('ppg', Float),
+    Column('pim', Integer),
+    Column('plus_minus', Integer),
+    Index('ix_league_seasons_league_season', 'league', 'season', 'fw_def'),
+    Index('ix_league_seasons_team_season', 'team', 'season'),
+)
+
+STAT_COLUMNS = ['gp', 'g', 'a', 'p', 'plus_minus', 'pim', 'ppg', 'ppp', 'shg', 'shp', 'toi_per_game', 'gwg', 'otg',
+                'sog', 'shooting_pct', 'fo_pct']
+FLOAT_STATS = {'shooting_pct', 'fo_pct'}
+TEXT_STATS = {'toi_per_game'}
+
+def _stat_column(name):
+    stat = name.rsplit('_', 1)[0]
+    if stat in FLOAT_STATS:
+        return Column(name, Float)
+    if stat in TEXT_STATS:
+        return Column(name, String)
+    return Column(name, Integer)
+
+season_stats = Table(
+    'season_stats', metadata,
+    Column('nhl_id', Integer, primary_key=True),
+    Column('season', String, primary_key=True),
+    Column('team', String, primary_key=True),
+    Column('league', String, primary_key=True),
+    Column('player_name_official', String),
+    *[_stat_column(f'{stat}_{game_type}') for game_type in ('regular', 'playoffs') for stat in STAT_COLUMNS],
+    Index('ix_season_stats_league_season', 'league', 'season'),
+    Index('ix_season_stats_team_season', 'team', 'season'),
+)
+
+"""
+    The following section is helper functions
+"""
+def get_engine(path=None):
+    """
+        Open the database and create the tables and indexes that are missing
+        Parameters:
+            path (str): Database file, defaults to database_path
+        Returns:
+            engine (sqlalchemy.Engine): Engine of the database
+    """
+    path = path or database_path
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    engine = create_engine(f'sqlite:///{path}')
+
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        # WAL lets the notebooks read while a scrape is upserting
+        cursor = dbapi_connection.cursor()
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute('PRAGMA synchronous=NORMAL')
+        cursor.close()
+
+    metadata.create_all(engine)
+    return engine
+
+def nhl_ids(links):
+    """
+        Get the NHL IDs of a Series of official player links, e.g. https://www.nhl.com/player/8451101 -> 8451101
+    """
+    return pd.to_numeric(links.astype(str).str.extract(r'(\d+)/?$', expand=False), errors='coerce').astype('Int64')
+
+def to_records(df, table):
+    """
+        Keep the columns of a table and turn the rows into dicts, with None for missing values
+    """
+    columns = [column.name for column in table.columns if column.name in df.columns]
+    df = df[columns].astype(object).where(pd.notnull(df[columns]), None)
+    return df.to_dict('records')
+
+def upsert(engine, table, df):
+    """
+        Insert the rows of a DataFrame, updating the rows whose primary key is already stored
+        Parameters:
+            engine (sqlalchemy.Engine): Engine of the database
+            table (sqlalchemy.Table): Table to write
+            df (pd.DataFrame): Rows with at least the primary key columns
+        Returns:
+            num_rows (int): Number of rows written
+    """
+    key_columns = [column.name for column in table.primary_key.columns]
+    df = df.dropna(subset=key_columns).drop_duplicates(subset=key_columns, keep='last')
+    records = to_records(df, table)
+    if not records:
+        return 0
+
+    update_columns = [name for name in records[0] if name not in key_columns]
+    with engine.begin() as connection:
+        for start in range(0, len(records), chunk_size):
+            statement = insert(table)
+            if update_columns:
+                statement = statement.on_conflict_do_update(
+                    index_elements=key_columns,
+                    set_={name: statement.excluded[name] for name in update_columns}
+                )
+            else:
+                statement = statement.on_conflict_do_nothing(index_elements=key_columns)
+            connection.execute(statement, records[start:start + chunk_size])
+    return len(records)
+
+def replace_player_rows(engine, table, df, keys):
+    """
+        Replace every row of some players, used for the long tables where a player's list can shrink
+        Parameters:
+            engine (sqlalchemy.Engine): Engine of the database
+            table (sqlalchemy.Table): Table keyed by ep_id
+            df (pd.DataFrame): New rows of the players
+            keys (pd.Series): ep_id of every player to replace, including the ones without rows now
+        Returns:
+            num_rows (int): Number of rows written
+    """
+    keys = [int(key) for key in keys.dropna().unique()]
+    with engine.begin() as connection:
+        for start in range(0, len(keys), chunk_size):
+            connection.execute(table.delete().where(table.c.ep_id.in_(keys[start:start + chunk_size])))
+    return upsert(engine, table, df)
+
+"""
+    The following section is APIs to write the store
+"""
+def upsert_players(engine, players_metadata):
+    """
+        Upsert the merged official / Elite Prospects metadata of players
+        Parameters:
+            engine (sqlalchemy.Engine): Engine of the database
+            players_metadata (pd.DataFrame): Rows with player_link_ep and player_link_official, e.g.
+                nhl_skaters_metadata_official_ep_merge_complete_final.csv
+        Returns:
+            num_rows (int): Number of rows written
+    """
+    df = players_metadata.copy()
+    df['ep_id'] = ep_ids(df['player_link_ep'])
+    if 'player_link_official' in df.columns:
+        df['nhl_id'] = nhl_ids(df['player_link_official'])
+    if 'player_name_ep' in df.columns:
+        df = df.rename(columns={'player_name_ep': 'player_name'})
+    return upsert(engine, players, df)
+
+def upsert_player_facts(engine, df_facts):
+    """
+        Upsert player facts, as returned by get_player_facts_with_reusable_driver or read from the facts CSV
+        Parameters:
+            engine (sqlalchemy.Engine): Engine of the database
+            df_facts (pd.DataFrame): Rows with player_link_ep
+        Returns:
+            num_rows (int): Number of rows written
+    """
+    df = df_facts.rename(columns={'position': 'player_pos', 'player_name': 'player_name_ep'})
+    # Draft in three columns, highlights and player types in their own tables
+    df, highlights, types = normalize_facts(df)
+    if 'date_of_birth' in df.columns:
+        df['date_of_birth'] = df['date_of_birth'].dt.strftime('%Y-%m-%d')
+    num_rows = upsert(engine, player_facts, df)
+    if highlights is not None:
+        replace_player_rows(engine, player_highlights, highlights, df['ep_id'])
+    if types is not None:
+        replace_player_rows(engine, player_types, types, df['ep_id'])
+    return num_rows
+
+def upsert_league_seasons(engine, df_players):
+    """
+        Upsert Elite Prospects league tables, as returned by get_season_roster / get_players_metadata
+        Parameters:
+            engine (sqlalchemy.Engine): Engine of the database
+            df_players (pd.DataFrame): Rows with link, league, season and team
+        Returns:
+            num_rows (int): Number of rows written
+    """
+    df = df_players.rename(columns={'playername': 'player_name', '+/-': 'plus_minus'})
+    df['ep_id'] = ep_ids(df['link'])
+    for column in ('gp', 'g', 'a', 'tp', 'pim', 'plus_minus'):
+        df[column] = pd.to_numeric(df[column], errors='coerce').astype('Int64')
+    df['ppg'] = pd.to_numeric(df['ppg'], errors='coerce')
+    return upsert(engine, league_seasons, df)
+
+def upsert_season_stats(engine, df_stats, players_metadata=None):
+    """
+        Upsert official career stats, as returned by get_player_stats_with_reusable_driver
+        Parameters:
+            engine (sqlalchemy.Engine): Engine of the database
+            df_stats (pd.DataFrame): Merged stats, with an nhl_id or player_link_official column, or a
+                player_name_official found in players_metadata
+            players_metadata (pd.DataFrame): player_name and player_link_official of the scraped players
+        Returns:
+            num_rows (int): Number of rows written
+    """
+    df = df_stats.copy()
+    if 'nhl_id' not in df.columns:
+        if 'player_link_official' in df.columns:
+            df['nhl_id'] = nhl_ids(df['player_link_official'])
+        elif players_metadata is not None:
+            ids = nhl_ids(players_metadata['player_link_official'])
+            ids.index = players_metadata['player_name']
+            df['nhl_id'] = df['player_name_official'].map(ids[~ids.index.duplicated()])
+        else:
+            raise ValueError("Stats need an nhl_id or player_link_official column, or players_metadata")
+    return upsert(engine, season_stats, df)
+
+def load_csv_tree(engine, data_dir='./data', stats_path=None):
+    """
+        Load the existing CSV files of the data folder into the store
+        Parameters:
+            engine (sqlalchemy.Engine): Engine of the database
+            data_dir (str): Root of the CSV tree
+            stats_path (str): Official career stats file, defaults to the output of nhl_official_data_prep.ipynb
+                              ({data_dir}/nhl/official/stats/nhl_players_official_stats.csv)
+        Returns:
+            counts (dict): Number of rows written to each table
+    """
+    counts = {}
+    metadata_path = os.path.join(data_dir, 'nhl', 'nhl_skaters_metadata_official_ep_merge_complete_final.csv')
+    if os.path.exists(metadata_path):
+        counts['players'] = upsert_players(engine, pd.read_csv(metadata_path, encoding='utf-8-sig'))
+
+    facts_path = os.path.join(data_dir, 'nhl', 'facts', 'nhl_players_facts_with_date_of_birth.csv')
+    if os.path.exists(facts_path):
+        counts['player_facts'] = upsert_player_facts(engine, pd.read_csv(facts_path, encoding='utf-8-sig'))
+
+    paths = sorted(glob.glob(os.path.join(data_dir, 'nhl', 'players', 'nhl_players_*.csv')))
+    paths += sorted(glob.glob(os.path.join(data_dir, 'ncaa', 'ncaa_players_*.csv')))
+    counts['league_seasons'] = sum(
+        upsert_league_seasons(engine, pd.read_csv(path, encoding='utf-8-sig', dtype=str)) for path in paths
+    )
+
+    stats_path = stats_path or os.path.join(data_dir, 'nhl', 'official', 'stats', 'nhl_players_official_stats.csv')
+    if not os.path.exists(stats_path):
+        print(f"No official stats at {stats_path}, season_stats is not loaded")
+    elif 'players' not in counts:
+        print(f"No players metadata at {metadata_path}, season_stats is not loaded")
+    else:
+        counts['season_stats'] = upsert_season_stats(
+            engine, pd.read_csv(stats_path, encoding='utf-8-sig', low_memory=False),
+            pd.read_csv(metadata_path, encoding='utf-8-sig')
+        )
+
+    print(f"Loaded {counts} rows")
+    return counts
+
+"""
+    The following section is APIs to query the store
+"""
+def query(engine, sql, params=None):
+    """
+        Run a SQL query and return the result as a DataFrame
+        Parameters:
+            engine (sqlalchemy.Engine): Engine of the database
+            sql (str or sqlalchemy.Select): Query, named parameters as :name
+            params (dict): Values of the named parameters
+        Returns:
+            df (pd.DataFrame): Result rows
+    """
+    if isinstance(sql, str):
+        sql = text(sql)
+    with engine.connect() as connection:
+        return pd.read_sql(sql, connection, params=params)
+
+def player_career(engine, ep_id=None, nhl_id=None, source='official'):
+    """
+        Get the career of one player
+        Parameters:
+            engine (sqlalchemy.Engine): Engine of the database
+            ep_id (int): Elite Prospects ID of the player
+            nhl_id (int): NHL ID of the player, used if ep_id is None
+            source (str): 'official' for the NHL career stats, 'ep' for the Elite Prospects league tables
+        Returns:
+            df (pd.DataFrame): One row per season and team, oldest first
+    """
+    if ep_id is None and nhl_id is None:
+        raise ValueError("Pass an ep_id or an nhl_id")
+
+    if source == 'official':
+        if nhl_id is None:
+            nhl_id = select(players.c.nhl_id).where(players.c.ep_id == int(ep_id)).scalar_subquery()
+        statement = select(season_stats).where(season_stats.c.nhl_id == nhl_id).order_by(season_stats.c.season)
+    elif source == 'ep':
+        if ep_id is None:
+            ep_id = select(players.c.ep_id).where(players.c.nhl_id == int(nhl_id)).scalar_subquery()
+        statement = select(league_seasons).where(league_seasons.c.ep_id == ep_id).order_by(league_seasons.c.season)
+    else:
+        raise ValueError("source must be 'official' or 'ep'")
+    return query(engine, statement)
+
+def league_players(engine, league, season, fw_def=None, team=None, columns=None):
+    """
+        Get the players of a league season from the Elite Prospects league tables
+        Parameters:
+            engine (sqlalchemy.Engine): Engine of the database
+            league (str): League slug, e.g. 'ncaa'
+            season (str or list): Season(s) in YYYY-YYYY format
+            fw_def (str): 'FW' or 'DEF' to keep forwards or defensemen only
+            team (str): Team name to keep a single team
+            columns (list): Columns to return, all columns if None
+        Returns:
+            df (pd.DataFrame): Matching rows, best scorers first
+    """
+    table_columns = [league_seasons.c[name] for name in columns] if columns else [league_seasons]
+    statement = select(*table_columns).where(league_seasons.c.league == league)
+    if isinstance(season, (list, tuple)):
+        statement = statement.where(league_seasons.c.season.in_(season))
+    else:
+        statement = statement.where(league_seasons.c.season == season)
+    if fw_def is not None:
+        statement = statement.where(league_seasons.c.fw_def == fw_def)
+    if team is not None:
+        statement = statement.where(league_seasons.c.team == team)
+    return query(engine, statement.order_by(league_seasons.c.tp.desc()))
@@ -0,0 +1,361 @@
+"""
+    Fast table parsing backends for the Elite Prospects and NHL stats tables
+    1. parse_html(html): Parses a page or a table fragment with lxml
+    2. find_table(root, table_class, table_id): Finds a table the same way soup.find('table', ...) does,
+       to_html(element) serializes it back
+    3. table_to_df(table): Same DataFrame as eliteprospects_scraper_api.table_data_to_rows, built with lxml
+    4. read_html_table(html): Same DataFrame as pd.read_html(StringIO(html))[0], without re-serializing a soup
+    5. benchmark_table_parsers(paths, table_class, table_id): Compares the backends on saved pages
+
+    lxml is the default backend. When it is not installed, backend falls back to 'bs4' and the callers
+    keep using their BeautifulSoup code paths.
+"""
+
+import re
+import time
+from io import StringIO
+
+import pandas as pd
+from bs4 import BeautifulSoup
+
+try:
+    import lxml.html
+    backend = 'lxml'
+    # Without a <meta charset> lxml would decode bytes as latin-1
+    _utf8_parser = lxml.html.HTMLParser(encoding='utf-8')
+except ImportError:
+    lxml = None
+    backend = 'bs4'
+
+# Elements whose content BeautifulSoup's get_text leaves out
+NON_TEXT_TAGS = {'script', 'style', 'template'}
+
+# Same whitespace clean-up pd.read_html applies to every cell
+_RE_WHITESPACE = re.compile(r"[\r\n]+|\s{2,}")
+
+# Numbers whose thousands separators pd.read_html(thousands=',') removes, e.g. 1,234 or 12,345.6
+_RE_NUMBER = re.compile(r"^[+-]?[0-9]*(,[0-9]*)*(\.[0-9]*)?([eE][+-]?[0-9]+)?$")
+
+# Default na_values of the pandas parsers, these cells are read as NaN
+NA_VALUES = {'', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN', '<NA>',
+             'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null'}
+
+"""
+    The following section is lxml helpers
+"""
+def parse_html(html):
+    """
+        Parse a page or a table fragment with lxml
+        Parameters:
+            html (str or bytes): Raw HTML, bytes are decoded as UTF-8 like the pages of both sites
+        Returns:
+            root (lxml.html.HtmlElement): Root element
+    """
+    if isinstance(html, bytes):
+        return lxml.html.fromstring(html, parser=_utf8_parser)
+    return lxml.html.fromstring(html)
+
+def is_element(obj):
+    """
+        Whether obj was parsed by lxml (as opposed to a BeautifulSoup object)
+    """
+    return lxml is not None and isinstance(obj, lxml.html.HtmlElement)
+
+def find_table(root, table_class=None, table_id=None):
+    """
+        Find the first table by its exact class attribute and / or id, like soup.find('table', {'class': ...})
+        Returns:
+            table (lxml.html.HtmlElement or None): The table, None if there is none
+    """
+    if root.tag == 'table' and (table_class is None or root.get('class') == table_class) \
+            and (table_id is None or root.get('id') == table_id):
+        return root
+
+    conditions = []
+    if table_class is not None:
+        conditions.append(f'@class="{table_class}"')
+    if table_id is not None:
+        conditions.append(f'@id="{table_id}"')
+    xpath = '//table' + (f'[{" and ".join(conditions)}]' if conditions else '')
+    tables = root.xpath(xpath)
+    return tables[0] if tables else None
+
+def to_html(element):
+    """
+        Serialized HTML of an lxml or BeautifulSoup element, e.g. to fingerprint a table, b'' for None
+    """
+    if element is None:
+        return b''
+    if is_element(element):
+        return lxml.html.tostring(element)
+    return str(element).encode('utf-8')
+
+def find_text(root, tag, css_class):
+    """
+        Get the stripped text of the first element with the given tag and class, None if there is none
+    """
+    elements = root.xpath(f'//{tag}[contains(concat(" ", normalize-space(@class), " "), " {css_class} ")]')
+    return element_text(elements[0]) if elements else None
+
+def _texts(element):
+    """
+        Text nodes of an element in document order, without the content of comments and of NON_TEXT_TAGS
+    """
+    if element.text:
+        yield element.text
+    for child in element:
+        # Comments and processing instructions have a function as tag
+        if isinstance(child.tag, str) and child.tag not in NON_TEXT_TAGS:
+            yield from _texts(child)
+        if child.tail:
+            yield child.tail
+
+def element_text(element):
+    """
+        Text of an element the way BeautifulSoup's get_text(strip=True) returns it
+    """
+    return ''.join(text.strip() for text in _texts(element) if text.strip()) \
+        if len(element) else (element.text or '').strip()
+
+def table_rows(table):
+    """
+        Header and data rows of a table, following table_data_to_rows: the <th> cells of the first row are the
+        header when there are any, every other row contributes its <td> cells
+        Returns:
+            header (list), rows (list of lists)
+    """
+    trs = table.iter('tr')
+    first = next(trs, None)
+    if first is None:
+        return [], []
+
+    header = [element_text(th) for th in first.iter('th')]
+    rows = [] if header else [[element_text(td) for td in first.iter('td')]]
+    for tr in trs:
+        rows.append([element_text(td) for td in tr.iter('td')])
+    return header, rows
+
+def table_to_df(table):
+    """
+        Build the same DataFrame as table_data_to_rows from an lxml table
+    """
+    header, rows = table_rows(table)
+    if not header:
+        # table_data_to_rows uses the first data row as the header when there is no <th> row
+        header, rows = rows[0], rows[1:]
+    return pd.DataFrame(rows, columns=header)
+
+def table_links(table):
+    """
+        hrefs of every link in a table, in document order
+    """
+    return [a.get('href') for a in table.iter('a') if a.get('href') is not None]
+
+"""
+    The following section is the pd.read_html equivalent
+"""
+def _cell_text(cell):
+    return _RE_WHITESPACE.sub(" ", cell.text_content().strip())
+
+def _span_rows(rows, pending=None, flush=False):
+    """
+        Texts of every row, the cells spanning several columns / rows are repeated in each of them
+        Parameters:
+            rows (list): <tr> elements
+            pending (dict): Column index -> (text, rows left) of the rowspans still open from the previous rows
+            flush (bool): Add rows for the rowspans still open after the last row, like pd.read_html does at
+                the end of the table
+        Returns:
+            texts (list of lists), pending (dict)
+    """
+    pending = dict(pending or {})
+    texts = []
+
+    def take(index, row):
+        text, rows_left = pending.pop(index)
+        row.append(text)
+        if rows_left > 1:
+            opened[index] = (text, rows_left - 1)
+
+    for tr in rows:
+        row = []
+        opened = {}
+        for cell in tr.xpath('./td|./th'):
+            for index in sorted(i for i in pending if i <= len(row)):
+                take(index, row)
+            text = _cell_text(cell)
+            rowspan = int(cell.get('rowspan') or 1)
+            for _ in range(int(cell.get('colspan') or 1)):
+                if rowspan > 1:
+                    opened[len(row)] = (text, rowspan - 1)
+                row.append(text)
+        for index in sorted(pending):
+            take(index, row)
+        texts.append(row)
+        pending = opened
+
+    while flush and pending:
+        row = []
+        opened = {}
+        for index in sorted(pending):
+            take(index, row)
+        texts.append(row)
+        pending = opened
+    return texts, pending
+
+def _column_names(head):
+    """
+        Column names of the header rows the way pd.read_html names them: blank names become 'Unnamed: i'
+        (or 'Unnamed: i_level_j' in a multi-row header) and repeated names get a .1, .2 suffix
+    """
+    if len(head) > 1:
+        return pd.MultiIndex.from_arrays([
+            [text or f'Unnamed: {i}_level_{level}' for i, text in enumerate(row)] for level, row in enumerate(head)
+        ])
+
+    names = []
+    seen = {}
+    for i, text in enumerate(head[0]):
+        name = text or f'Unnamed: {i}'
+        if name in seen:
+            seen[name] += 1
+            name = f'{name}.{seen[name]}'
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
+
+def _convert_column(values):
+    """
+        Convert one column the way pd.read_html does: NA strings become NaN, numbers with thousands separators
+        lose them, then the column is numeric if every value parses as a number and stays text otherwise
+    """
+    values = [None if value in NA_VALUES else value for value in values]
+    values = [value.replace(',', '') if value is not None and ',' in value and _RE_NUMBER.match(value) else value
+              for value in values]
+    try:
+        return pd.to_numeric(pd.Series(values, dtype=object))
+    except (ValueError, TypeError):
+        return pd.Series(values)
+
+def read_html_table(html, table_class=None, table_id=None):
+    """
+        Build the same DataFrame as pd.read_html(StringIO(html))[0] straight from the raw table HTML
+        Parameters:
+            html (str or bytes): Table fragment (e.g. the outerHTML of the table) or a whole page
+            table_class (str): Exact class of the table when html holds more than one table
+            table_id (str): Id of the table when html holds more than one table
+        Returns:
+            df (pd.DataFrame): Parsed table
+    """
+    if backend != 'lxml':
+        return pd.read_html(StringIO(html if isinstance(html, str) else html.decode('utf-8')))[0]
+
+    table = find_table(parse_html(html), table_class, table_id)
+    if table is None:
+        raise ValueError("No table found in the HTML")
+
+    # Same clean-up pd.read_html does before reading the cells
+    for br in table.xpath('.//br'):
+        br.tail = "\n" + (br.tail or "")
+    for elem in table.xpath('.//style'):
+        elem.drop_tree()
+    for elem in table.xpath('.//*[@style]'):
+        if "display:none" in elem.get("style", "").replace(" ", ""):
+            elem.drop_tree()
+
+    header_rows = []
+    for thead in table.xpath('.//thead'):
+        header_rows.extend(thead.xpath('./tr'))
+        if thead.xpath('./td|./th'):
+            header_rows.append(thead)
+    body_rows = table.xpath('.//tbody//tr') + table.xpath('./tr')
+    footer_rows = table.xpath('.//tfoot//tr')
+
+    if not header_rows:
+        # Leading rows made only of <th> cells are the header
+        while body_rows and all(cell.tag == 'th' for cell in body_rows[0].xpath('./td|./th')):
+            header_rows.append(body_rows.pop(0))
+
+    head, pending = _span_rows(header_rows)
+    body, pending = _span_rows(body_rows, pending, flush=not footer_rows)
+    foot, _ = _span_rows(footer_rows, pending, flush=True)
+    body += foot
+
+    # Fill out ragged rows, the header rows without any text are left out like pd.read_html does
+    width = max(len(row) for row in head + body)
+    head = [row + [''] * (width - len(row)) for row in head if any(row) or len(head) == 1]
+    body = [row + [''] * (width - len(row)) for row in body]
+
+    columns = _column_names(head) if head else pd.RangeIndex(width)
+    df = pd.DataFrame({i: _convert_column([row[i] for row in body]) for i in range(width)})
+    df.columns = columns
+    return df
+
+"""
+    The following section is benchmarks
+"""
+def benchmark_table_parsers(paths, table_class=None, table_id=None, repeat=5):
+    """
+        Compare the BeautifulSoup and lxml backends on saved pages, checking that they produce identical DataFrames
+        Parameters:
+            paths (list): Saved HTML pages, e.g. roster pages of get_season_roster or NHL player pages
+            table_class (str): Exact class of the table to parse (Elite Prospects tables)
+            table_id (str): Id of the table to parse (NHL career stats table)
+            repeat (int): Number of timed runs per page
+        Returns:
+            df (pd.DataFrame): Mean milliseconds per page of every backend and whether the outputs match
+    """
+    rows = []
+    for path in paths:
+        with open(path, 'rb') as f:
+            html = f.read()
+        attrs = {}
+        if table_class is not None:
+            attrs['class'] = table_class
+        if table_id is not None:
+            attrs['id'] = table_id
+
+        def bs4_rows():
+            # Current approach: html.parser soup of the whole page, then walk every <tr>/<td>
+            table = BeautifulSoup(html, 'html.parser').find('table', attrs)
+            trs = table.find_all('tr')
+            data = []
+            header = [td.get_text(strip=True) for td in trs[0].find_all('th')]
+            if header:
+                data.append(header)
+                trs = trs[1:]
+            for tr in trs:
+                data.append([td.get_text(strip=True) for td in tr.find_all('td')])
+            return pd.DataFrame(data[1:], columns=data[0])
+
+        def bs4_read_html():
+            # Current NHL approach: soup of the whole page, re-serialize the table, parse it again
+            table = BeautifulSoup(html, 'html.parser').find('table', attrs)
+            return pd.read_html(StringIO(str(table)))[0]
+
+        candidates = {
+            'bs4_rows': bs4_rows,
+            'lxml_rows': lambda: table_to_df(find_table(parse_html(html), table_class, table_id)),
+            'bs4_read_html': bs4_read_html,
+            'lxml_read_html': lambda: read_html_table(html, table_class, table_id),
+        }
+        timings = {}
+        outputs = {}
+        for name, func in candidates.items():
+            start = time.perf_counter()
+            for _ in range(repeat):
+                outputs[name] = func()
+            timings[name] = (time.perf_counter() - start) / repeat * 1000
+
+        rows.append({
+            'page': path,
+            **{f'{name}_ms': ms for name, ms in timings.items()},
+            'rows_identical': outputs['bs4_rows'].equals(outputs['lxml_rows']),
+            'read_html_identical': outputs['bs4_read_html'].equals(outputs['lxml_read_html']),
+        })
+
+    df = pd.DataFrame(rows)
+    print(df.filter(like='_ms').mean().round(2))
+    print(f"Identical outputs: rows {df['rows_identical'].all()}, read_html {df['read_html_identical'].all()}")
+    return df
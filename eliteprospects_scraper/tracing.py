@@ -0,0 +1,183 @@
+"""
+    Structured per-player trace spans for profiling slow scrapes
+    1. enable_tracing(path): Starts writing spans to a JSON lines trace file (also in driver_pool workers)
+    2. span(name, **attrs): Context manager timing one phase (navigate, dropdown_select, table_parse, merge, write, ...)
+    3. slowest_phases(path): Ranks the phases of a trace file by total time
+    4. slowest_players(path, top): Ranks the players of a trace file by duration, with their slowest phase
+
+    Tracing is off by default and span() then returns a shared no-op object, so the instrumented code pays one
+    attribute check per phase. One line is written per finished span:
+        {"trace_id": "...", "span_id": "...", "parent_id": "...", "name": "table_parse", "player": "Connor McDavid",
+         "start": 1752000000.0, "duration_ms": 12.3, "outcome": "ok", "error": null, "pid": 1234}
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+
+import pandas as pd
+
+# Default trace file
+trace_path = './data/traces/scrape_trace.jsonl'
+
+# Environment variable carrying the trace file to spawned worker processes
+TRACE_ENV = 'SCRAPER_TRACE_PATH'
+
+_trace_file = None
+_write_lock = threading.Lock()
+_local = threading.local()
+
+"""
+    The following section is the span API
+"""
+def enable_tracing(path=None):
+    """
+        Start appending spans to a JSON lines file
+        Parameters:
+            path (str): Trace file, defaults to trace_path
+    """
+    global _trace_file
+    disable_tracing()
+    path = path or trace_path
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    # Line buffered so every span reaches the file as a single append
+    _trace_file = open(path, 'a', encoding='utf-8', buffering=1)
+    os.environ[TRACE_ENV] = path
+    print(f"Tracing spans to {path}")
+
+def disable_tracing():
+    global _trace_file
+    if _trace_file is not None:
+        _trace_file.close()
+        _trace_file = None
+    os.environ.pop(TRACE_ENV, None)
+
+def _stack():
+    if not hasattr(_local, 'stack'):
+        _local.stack = []
+    return _local.stack
+
+class _Span:
+    def __init__(self, name, attrs):
+        self.name = name
+        self.attrs = attrs
+
+    def set(self, **attrs):
+        """
+            Add attributes to the span, e.g. the number of rows a phase produced
+        """
+        self.attrs.update(attrs)
+
+    def __enter__(self):
+        stack = _stack()
+        parent = stack[-1] if stack else None
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent.span_id if parent else None
+        self.trace_id = parent.trace_id if parent else self.span_id
+        self.player = self.attrs.pop('player', None) or (parent.player if parent else None)
+        stack.append(self)
+        self.start = time.time()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration_ms = (time.perf_counter() - self._start) * 1000
+        _stack().pop()
+        record = {
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'name': self.name,
+            'player': self.player,
+            'start': self.start,
+            'duration_ms': round(duration_ms, 3),
+            'outcome': 'ok' if exc_type is None else 'error',
+            'error': None if exc is None else str(exc)[:500],
+            'pid': os.getpid(),
+            **self.attrs,
+        }
+        line = json.dumps(record, default=str) + '\n'
+        with _write_lock:
+            if _trace_file is not None:
+                _trace_file.write(line)
+        return False
+
+class _NoopSpan:
+    def set(self, **attrs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+_NOOP_SPAN = _NoopSpan()
+
+def span(name, **attrs):
+    """
+        Time a phase of a scrape. Spans opened inside another span belong to the same trace and inherit its player.
+        Parameters:
+            name (str): Phase name, e.g. 'navigate'
+            attrs: Extra attributes written with the span, player=... names the player of a root span
+        Returns:
+            Context manager yielding the span, exceptions are recorded as outcome 'error' and re-raised
+    """
+    if _trace_file is None:
+        return _NOOP_SPAN
+    return _Span(name, attrs)
+
+# Worker processes started by driver_pool inherit the trace file through the environment
+if os.environ.get(TRACE_ENV):
+    enable_tracing(os.environ[TRACE_ENV])
+
+"""
+    The following section is the trace analyzer
+"""
+def load_trace(path=None):
+    """
+        Load a trace file into a DataFrame, one row per span
+    """
+    return pd.read_json(path or trace_path, lines=True)
+
+def slowest_phases(path=None):
+    """
+        Rank the phases of a trace by total time
+        Parameters:
+            path (str): Trace file, defaults to trace_path
+        Returns:
+            df (pd.DataFrame): count, total_s, mean_ms, p95_ms, max_ms and errors per phase, slowest total first
+    """
+    df = load_trace(path)
+    # Root spans without a player are background phases, e.g. the flushes of the batch writer thread
+    df = df[df['parent_id'].notna() | df['player'].isna()]
+    summary = df.groupby('name').agg(
+        count=('duration_ms', 'size'),
+        total_s=('duration_ms', lambda d: d.sum() / 1000),
+        mean_ms=('duration_ms', 'mean'),
+        p95_ms=('duration_ms', lambda d: d.quantile(0.95)),
+        max_ms=('duration_ms', 'max'),
+        errors=('outcome', lambda o: (o == 'error').sum()),
+    )
+    return summary.sort_values('total_s', ascending=False).reset_index()
+
+def slowest_players(path=None, top=20):
+    """
+        Rank the players of a trace by the duration of their root span
+        Parameters:
+            path (str): Trace file, defaults to trace_path
+            top (int): Number of players to return
+        Returns:
+            df (pd.DataFrame): player, duration_ms, outcome, and the name and duration of the slowest phase
+    """
+    df = load_trace(path)
+    roots = df[df['parent_id'].isna() & df['player'].notna()].nlargest(top, 'duration_ms')
+
+    phases = df[df['parent_id'].notna()]
+    slowest = phases.loc[phases.groupby('trace_id')['duration_ms'].idxmax(), ['trace_id', 'name', 'duration_ms']]
+    slowest = slowest.rename(columns={'name': 'slowest_phase', 'duration_ms': 'slowest_phase_ms'})
+
+    result = roots[['trace_id', 'player', 'name', 'duration_ms', 'outcome']].merge(slowest, on='trace_id', how='left')
+    return result.drop(columns=['trace_id']).reset_index(drop=True)
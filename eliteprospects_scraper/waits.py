@@ -0,0 +1,146 @@
+"""
+    Condition-driven waits and politeness pacing for the Selenium scrapers
+    1. timed_wait(wait, condition, label): Blocks only until condition holds and records how long it took
+    2. wait_for_table_update(driver, locator, old_html, label): Blocks until a table re-renders after a dropdown selection
+    3. polite_pause(): Sleeps for the configurable politeness delay between page loads
+    4. timing_summary(): Summarizes every recorded wait per label
+"""
+
+import random
+import threading
+import time
+from collections import defaultdict
+
+import pandas as pd
+from selenium.common import NoSuchElementException, StaleElementReferenceException, TimeoutException
+from selenium.webdriver.support.ui import WebDriverWait
+
+from metrics import WAIT_SECONDS
+
+# Extra seconds slept before page loads, drawn uniformly from this range. The per-domain rate limiter
+# already paces every navigation, so this only adds jitter on top of it. (0, 0) disables it
+politeness_delay = (0, 0)
+
+# Seconds to wait for a table to re-render after a selection before using the current table
+table_update_timeout = 5
+
+# Recorded durations in seconds per label
+wait_timings = defaultdict(list)
+_timings_lock = threading.Lock()
+
+"""
+    The following section is timing helpers
+"""
+def record_timing(label, seconds):
+    """
+        Record how long a step took
+        Parameters:
+            label (str): Name of the step, e.g. 'facts_section'
+            seconds (float): Duration of the step
+    """
+    with _timings_lock:
+        wait_timings[label].append(seconds)
+    WAIT_SECONDS.labels(label).observe(seconds)
+
+def reset_timings():
+    with _timings_lock:
+        wait_timings.clear()
+
+def timing_summary():
+    """
+        Summarize the recorded durations per label
+        Returns:
+            df (pd.DataFrame): count, total, mean, median and max seconds per label, slowest total first
+    """
+    with _timings_lock:
+        rows = [
+            {
+                'label': label,
+                'count': len(durations),
+                'total_s': sum(durations),
+                'mean_s': sum(durations) / len(durations),
+                'median_s': sorted(durations)[len(durations) // 2],
+                'max_s': max(durations),
+            }
+            for label, durations in wait_timings.items() if durations
+        ]
+    if not rows:
+        return pd.DataFrame(columns=['label', 'count', 'total_s', 'mean_s', 'median_s', 'max_s'])
+    return pd.DataFrame(rows).sort_values('total_s', ascending=False).reset_index(drop=True)
+
+"""
+    The following section is conditions and waits
+"""
+def element_html(driver, locator):
+    """
+        Get the outer HTML of the first element matching locator, None if there is none
+    """
+    try:
+        return driver.find_element(*locator).get_attribute('outerHTML')
+    except (NoSuchElementException, StaleElementReferenceException):
+        return None
+
+class table_changed:
+    """
+        Expected condition: the element at locator is present and its outer HTML differs from old_html.
+        Returns the element once the condition holds.
+    """
+    def __init__(self, locator, old_html):
+        self.locator = locator
+        self.old_html = old_html
+
+    def __call__(self, driver):
+        try:
+            element = driver.find_element(*self.locator)
+            html = element.get_attribute('outerHTML')
+        except (NoSuchElementException, StaleElementReferenceException):
+            return False
+        if html and html != self.old_html:
+            return element
+        return False
+
+def timed_wait(wait, condition, label):
+    """
+        Wait until condition holds and record how long it took
+        Parameters:
+            wait (WebDriverWait): WebDriverWait instance of the driver
+            condition (callable): Selenium expected condition
+            label (str): Name the duration is recorded under
+        Returns:
+            The value returned by the condition
+    """
+    start = time.perf_counter()
+    try:
+        return wait.until(condition)
+    finally:
+        record_timing(label, time.perf_counter() - start)
+
+def wait_for_table_update(driver, locator, old_html, label):
+    """
+        Wait until the table at locator re-renders after a selection. When it does not change within
+        table_update_timeout (e.g. the selection was already active) the current table is used.
+        Parameters:
+            driver (webdriver.Chrome): Selenium driver
+            locator (tuple): (By, value) of the table
+            old_html (str or None): Outer HTML of the table before the selection
+            label (str): Name the duration is recorded under
+        Returns:
+            bool: True if the table changed, False if it timed out unchanged
+    """
+    try:
+        timed_wait(WebDriverWait(driver, table_update_timeout), table_changed(locator, old_html), label)
+        return True
+    except TimeoutException:
+        print(f"Table did not change within {table_update_timeout}s, using the current table")
+        return False
+
+def polite_pause():
+    """
+        Sleep for the politeness delay between page loads and record it under 'politeness'
+    """
+    low, high = politeness_delay
+    if high <= 0:
+        return
+    seconds = random.uniform(low, high)
+    time.sleep(seconds)
+    record_timing('politeness', seconds)
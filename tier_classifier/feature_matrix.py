@@ -0,0 +1,14 @@
+"""
+    Entry point of the feature matrix for the tier classifier
+    The matrix is built by eliteprospects_scraper/feature_matrix.py, next to dataset_store and facts_tables which it
+    imports by plain name, so their folder is put on the path before importing it.
+"""
+
+import os
+import sys
+
+scraper_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'eliteprospects_scraper')
+if scraper_dir not in sys.path:
+    sys.path.append(scraper_dir)
+
+from feature_matrix import FeatureMatrix, build_feature_matrix, load_feature_matrix  # noqa: E402